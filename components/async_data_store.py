@@ -0,0 +1,208 @@
+import asyncio
+import os
+import threading
+
+import data_store
+from data_store import (
+    DEFAULT_DB_NAME, NAME_COLLATION, _SECTION_KEYS, _engine, _cache_candidate, _cache_confirm, _store_snapshot,
+    _section_projection, _index_document, _data_from_documents, _with_defaults, _dataset,
+    _mongo_projection, _mongo_failed, _mask_uri,
+)
+
+try:
+    from motor.motor_asyncio import AsyncIOMotorClient
+except ImportError:  # motor is optional; everything then runs on worker threads
+    AsyncIOMotorClient = None
+
+# Async counterpart of data_store for the FastAPI backend. With MongoDB and
+# motor installed, reads run on the event loop; otherwise (SQLite / JSON
+# engines, no motor, Mongo unreachable or a Mongo error) the blocking
+# data_store functions run via asyncio.to_thread. Writes always run
+# data_store's implementation on a thread: there is one copy of each write,
+# its version checks and its fallback, and a write that may have reached the
+# server is never sent again. The snapshot, version cache and semantics are
+# shared with data_store.
+
+# one client per process and event loop (motor clients are bound to a loop)
+_client = None
+_client_key = None
+_client_lock = threading.Lock()
+
+def _mongo_reachable():
+    # reachability is decided by data_store: its pinged client (created by the
+    # startup hook or the first call that went to a thread) and circuit breaker
+    if data_store._client is None or data_store._client_pid != os.getpid():
+        return False
+    return data_store._breaker.allow()
+
+def get_motor_client():
+    """
+    Return the shared AsyncIOMotorClient, or None when motor is missing or
+    MongoDB is not in use (another engine, no URI, or the server is unreachable).
+    """
+    global _client, _client_key
+    uri = os.environ.get("MONGO_URI")
+    if AsyncIOMotorClient is None or _engine() != "mongo" or not uri or not _mongo_reachable():
+        return None
+    key = (os.getpid(), id(asyncio.get_running_loop()))
+    with _client_lock:
+        if _client is not None and _client_key == key:
+            return _client
+        try:
+            # no I/O happens here; connection errors surface on the first query
+            _client = AsyncIOMotorClient(uri, **data_store._client_options())
+            _client_key = key
+        except Exception as e:
+            print("async_data_store: cannot create motor client for URI:", _mask_uri(uri), e)
+            _client = None
+        return _client
+
+def close_motor_client():
+    global _client, _client_key
+    with _client_lock:
+        client, owned = _client, _client_key is not None and _client_key[0] == os.getpid()
+        _client = None
+        _client_key = None
+    if client is not None and owned:
+        client.close()
+
+def get_db():
+    client = get_motor_client()
+    if client is None:
+        return None
+    return client[os.environ.get("MONGO_DB", DEFAULT_DB_NAME)]
+
+async def _read_version(db):
+    doc = await db.meta.find_one({"_id": "dataset"}, {"version": 1})
+    return (doc or {}).get("version", 0)
+
+async def _fetch_section(db, section, projection=None):
+    docs = {}
+    async for doc in db[section].find({}, _section_projection(section, projection)):
+        _index_document(docs, section, doc)
+    return docs
+
+async def load_data(sections=None, projection=None):
+    """Async data_store.load_data: same arguments, same result."""
+    db = get_db()
+    if db is None:
+        return await asyncio.to_thread(data_store.load_data, sections, projection)
+    wanted = tuple(sections) if sections else tuple(_SECTION_KEYS)
+    try:
+        loaded = None
+        version = _cache_candidate(wanted)
+        if version is not None and await _read_version(db) == version:
+            loaded = _cache_confirm(version, wanted)
+        if loaded is None:
+            # read the version first so a write racing with this load makes it stale
+            version = await _read_version(db)
+            existing = set(await db.list_collection_names())
+            loaded = {}
+            for section in wanted:
+                loaded[section] = await _fetch_section(db, section, projection) if section in existing else {}
+            if not projection:
+                _store_snapshot(loaded, version)
+        return _with_defaults(_dataset(_data_from_documents(loaded, projection), None if projection else loaded))
+    except Exception as e:
+        _mongo_failed(e)
+        print("async load_data: MongoDB failed, using data_store on a thread:", e)
+        return await asyncio.to_thread(data_store.load_data, sections, projection)
+
+async def save_data(data):
+    """Async data_store.save_data (on a thread); may raise VersionConflict, and then nothing is written."""
+    await asyncio.to_thread(data_store.save_data, data)
+
+async def allocate_ids(section, count=1):
+    """Async data_store.allocate_ids: first of `count` new consecutive ids for items/reservations."""
+    return await asyncio.to_thread(data_store.allocate_ids, section, count)
+
+async def ensure_role(name):
+    await asyncio.to_thread(data_store.ensure_role, name)
+
+async def ensure_department(name):
+    await asyncio.to_thread(data_store.ensure_department, name)
+
+class _AsyncRepository:
+    """Async wrapper over a data_store repository with the same methods."""
+    sync_class = None
+
+    def __init__(self):
+        self.sync = self.sync_class()
+
+    def _collection(self):
+        db = get_db()
+        return db[self.sync.section] if db is not None else None
+
+    def _fallback(self, action, e):
+        _mongo_failed(e)
+        print(f"{type(self).__name__}.{action}: MongoDB failed, using data_store on a thread:", e)
+
+    async def get(self, key):
+        coll = self._collection()
+        if coll is not None:
+            try:
+                doc = await coll.find_one({self.sync.key: key})
+                return self.sync._from_doc(doc)[1] if doc else None
+            except Exception as e:
+                self._fallback("get", e)
+        return await asyncio.to_thread(self.sync.get, key)
+
+    async def get_record(self, key):
+        doc = await self.get(key)
+        return self.sync.record_type.from_doc(doc, key) if doc is not None else None
+
+    async def find_records(self, filter=None):
+        return self.sync._records(await self.find(filter))
+
+    async def put_record(self, record):
+        return self.sync.record_type.from_doc(await self.put(record.key, record.to_doc()), record.key)
+
+    async def find(self, filter=None, projection=None):
+        coll = self._collection()
+        if coll is not None:
+            try:
+                cursor = coll.find(filter or {}, _mongo_projection(projection, keep_id=self.sync.key == "_id"))
+                return self.sync._result([self.sync._from_doc(doc) async for doc in cursor])
+            except Exception as e:
+                self._fallback("find", e)
+        return await asyncio.to_thread(self.sync.find, filter, projection)
+
+    # writes run the data_store repository's own implementation (see the top of the module)
+    async def put(self, key, record):
+        return await asyncio.to_thread(self.sync.put, key, record)
+
+    async def update_fields(self, key, fields, expected_version=None):
+        return await asyncio.to_thread(self.sync.update_fields, key, fields, expected_version)
+
+    async def delete(self, key, expected_version=None):
+        return await asyncio.to_thread(self.sync.delete, key, expected_version)
+
+class AsyncAdminRepository(_AsyncRepository):
+    sync_class = data_store.AdminRepository
+
+class AsyncStaffRepository(_AsyncRepository):
+    sync_class = data_store.StaffRepository
+
+class AsyncReservationRepository(_AsyncRepository):
+    sync_class = data_store.ReservationRepository
+
+class AsyncItemRepository(_AsyncRepository):
+    sync_class = data_store.ItemRepository
+
+    async def find_by_name(self, department, name):
+        coll = self._collection()
+        if coll is not None:
+            try:
+                doc = await coll.find_one({"department": department, "name": name}, sort=[("id", 1)], collation=NAME_COLLATION)
+                return self.sync._from_doc(doc)[1] if doc else None
+            except Exception as e:
+                self._fallback("find_by_name", e)
+        return await asyncio.to_thread(self.sync.find_by_name, department, name)
+
+    async def consume(self, item_id, department, amount):
+        """Async ItemRepository.consume: (item after update, just_depleted) or (None, False)."""
+        return await asyncio.to_thread(self.sync.consume, item_id, department, amount)
+
+async def connect():
+    """Create data_store's client (ping + indexes) on a thread so motor can be used right away."""
+    await asyncio.to_thread(data_store.get_mongo_client)
\ No newline at end of file
@@ -3,7 +3,7 @@ from data_store import load_data, save_data
 # admins and staff are separate in load_data/save_data as 'admins' and 'staff'
 
 def register_user(user_type):
-    data = load_data()
+    data = load_data(sections=("admins", "staff", "roles", "departments"))
     print("="*8, f" {user_type} Registration ", "="*8)
 
     # require non-empty name, email and password
@@ -69,7 +69,7 @@ def register_user(user_type):
     print("Registration successful!")
 
 def login_user(user_type):
-    data = load_data()
+    data = load_data(sections=("admins", "staff"))
     print("="*8, f" {user_type} Login ", "="*8)
     email = input("Enter your email: ").strip()
     password = input("Enter your password: ").strip()
@@ -1,5 +1,7 @@
 import sys
 import os
+import zlib
+from fastapi import HTTPException
 
 # Make parent (components) importable so we can import data_store, data_io, components.items etc.
 COMP_DIR = os.path.dirname(os.path.dirname(__file__))
@@ -7,8 +9,53 @@ if COMP_DIR not in sys.path:
     sys.path.insert(0, COMP_DIR)
 
 # Import the project's helper functions that live in components/
-from data_store import load_data, save_data
+from data_store import (
+    load_data, save_data, ensure_role, ensure_department,
+    AdminRepository, StaffRepository, ItemRepository, ReservationRepository, storage_status,
+    allocate_ids, VersionConflict, CONFLICT_RETRIES, snapshot, restore,
+)
+# async variants used by the FastAPI routers (motor when available, else worker threads)
+from records import Item, StaffMember, Reservation
+from async_data_store import (
+    load_data as async_load_data, save_data as async_save_data,
+    ensure_role as async_ensure_role, ensure_department as async_ensure_department,
+    allocate_ids as async_allocate_ids,
+    AsyncAdminRepository, AsyncStaffRepository, AsyncItemRepository, AsyncReservationRepository,
+)
 from items import send_depletion_email
-from data_io import import_csv_file, export_csv_file
+from data_io import (
+    import_csv_file, export_csv_file, iter_csv_export, import_file, export_file, iter_export,
+    export_filename, format_for_path, ALLOWED_KINDS, FORMATS, TEXT_FORMATS,
+)
+from import_jobs import submit_import, get_import_job
 
-__all__ = ["load_data", "save_data", "send_depletion_email", "import_csv_file", "export_csv_file"]
\ No newline at end of file
+__all__ = [
+    "load_data", "save_data", "ensure_role", "ensure_department",
+    "AdminRepository", "StaffRepository", "ItemRepository", "ReservationRepository", "storage_status",
+    "allocate_ids", "VersionConflict", "CONFLICT_RETRIES", "version_conflict", "snapshot", "restore",
+    "async_load_data", "async_save_data", "async_ensure_role", "async_ensure_department", "async_allocate_ids",
+    "AsyncAdminRepository", "AsyncStaffRepository", "AsyncItemRepository", "AsyncReservationRepository",
+    "Item", "StaffMember", "Reservation",
+    "send_depletion_email", "import_csv_file", "export_csv_file", "iter_csv_export", "export_filename",
+    "import_file", "export_file", "iter_export", "format_for_path", "FORMATS", "TEXT_FORMATS",
+    "ALLOWED_KINDS", "gzip_chunks", "wants_gzip", "submit_import", "get_import_job",
+]
+
+def version_conflict(e):
+    """HTTP 409 for a VersionConflict raised by the store."""
+    return HTTPException(status_code=409, detail=str(e))
+
+def wants_gzip(request, gzip=None):
+    """Whether to gzip a response: the explicit `gzip` query flag, else the client's Accept-Encoding."""
+    if gzip is not None:
+        return gzip
+    return "gzip" in request.headers.get("accept-encoding", "").lower()
+
+def gzip_chunks(chunks, level=6):
+    """Gzip-compress an iterable of str/bytes chunks on the fly (for StreamingResponse)."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8") if isinstance(chunk, str) else chunk)
+        if data:
+            yield data
+    yield compressor.flush()
\ No newline at end of file
@@ -9,6 +9,12 @@ from backend.routers import roles as roles_router
 from backend.routers import departments as depts_router
 from backend.routers import staff as staff_router
 from backend.routers import items as items_router
+from backend.routers import health as health_router
+from backend.routers import backup as backup_router
+from backend.routers import imports as imports_router
+from data_store import close_mongo_client
+from import_jobs import shutdown_import_jobs
+from async_data_store import connect as connect_storage, close_motor_client
 
 app = FastAPI(title="PhysioTracker API (backend)")
 
@@ -20,6 +26,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+async def _open_storage():
+    # connect (and create indexes) before the first request is served
+    await connect_storage()
+
+@app.on_event("shutdown")
+def _close_storage():
+    # let running imports finish their batch before the connections go away
+    shutdown_import_jobs()
+    # release the shared MongoDB connection pools
+    close_motor_client()
+    close_mongo_client()
+
 # include routers
 app.include_router(auth_router.router)
 app.include_router(roles_router.router)
@@ -27,6 +46,9 @@ app.include_router(depts_router.router)
 app.include_router(staff_router.router)
 app.include_router(items_router.router)
 app.include_router(reservations_router.router)
+app.include_router(health_router.router)
+app.include_router(backup_router.router)
+app.include_router(imports_router.router)
 # Serve static frontend from backend/frontend
 frontend_dir = Path(__file__).parent / "frontend"
 if frontend_dir.exists():
@@ -0,0 +1,45 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+from fastapi import APIRouter, HTTPException, UploadFile, File
+from fastapi.responses import FileResponse
+from starlette.background import BackgroundTask
+from backend.common import snapshot, restore
+
+router = APIRouter(prefix="/backup", tags=["backup"])
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+@router.get("")
+async def download_snapshot():
+    """The whole store as a gzip-compressed JSON Lines snapshot (see data_store.snapshot)."""
+    fd, path = tempfile.mkstemp(suffix=".jsonl.gz")
+    os.close(fd)
+    try:
+        await asyncio.to_thread(snapshot, path)
+    except Exception as e:
+        _remove(path)
+        raise HTTPException(status_code=500, detail=f"Snapshot failed: {e}")
+    name = time.strftime("snapshot_%Y%m%d_%H%M%S.jsonl.gz")
+    return FileResponse(path, media_type="application/gzip", filename=name, background=BackgroundTask(_remove, path))
+
+@router.post("/restore")
+async def upload_restore(file: UploadFile = File(...)):
+    """Replace all data with an uploaded snapshot; the file is verified before anything is written."""
+    suffix = ".zst" if (file.filename or "").endswith(".zst") else ".gz"
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            await asyncio.to_thread(shutil.copyfileobj, file.file, fh)
+        result = await asyncio.to_thread(restore, path)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        _remove(path)
+    return {"success": True, **result}
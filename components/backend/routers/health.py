@@ -0,0 +1,9 @@
+from fastapi import APIRouter
+from backend.common import storage_status
+
+router = APIRouter(prefix="/health", tags=["health"])
+
+@router.get("")
+def health():
+    """Storage engine in use plus the MongoDB circuit breaker state and fallback metrics."""
+    return storage_status()
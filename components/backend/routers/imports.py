@@ -0,0 +1,41 @@
+import asyncio
+import os
+import shutil
+import tempfile
+from typing import Optional
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+from backend.common import ALLOWED_KINDS, FORMATS, format_for_path, submit_import, get_import_job
+
+router = APIRouter(prefix="/imports", tags=["imports"])
+
+@router.post("", status_code=202)
+async def create_import(kind: str = Form(...), file: UploadFile = File(...), format: Optional[str] = Form(None)):
+    """
+    Start a background import of a CSV, JSON Lines, Parquet or Arrow file (the
+    format defaults to the file name's extension) and return the job at once;
+    poll GET /imports/{id} for its progress and result.
+    """
+    kind = kind.lower()
+    if kind not in ALLOWED_KINDS:
+        raise HTTPException(status_code=400, detail=f"Unsupported kind '{kind}'. Supported: {ALLOWED_KINDS}")
+    fmt = (format or format_for_path(file.filename or "")).lower()
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format '{fmt}'. Supported: {tuple(FORMATS)}")
+    fd, path = tempfile.mkstemp(prefix="import_", suffix=FORMATS[fmt][1])
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            # copied in chunks, not read into memory
+            await asyncio.to_thread(shutil.copyfileobj, file.file, fh)
+    except Exception:
+        os.remove(path)
+        raise
+    job = submit_import(kind, path, fmt, file.filename)
+    return job.to_dict()
+
+@router.get("/{job_id}")
+async def import_status(job_id: str):
+    """Status, row counts (rows, added, updated, invalid, duplicates) and throughput of an import job."""
+    job = get_import_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Import job not found (finished jobs expire)")
+    return job.to_dict()
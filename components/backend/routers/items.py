@@ -1,145 +1,164 @@
 from typing import Optional
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Query, Request
 from backend.schemas import ItemIn, ItemUpdate
-from backend.common import load_data, save_data, send_depletion_email, import_csv_file, export_csv_file
-from fastapi.responses import FileResponse
-import os
+from backend.common import (
+    async_load_data, async_allocate_ids, async_ensure_department, AsyncItemRepository, AsyncStaffRepository,
+    send_depletion_email, import_file, iter_export, export_filename, format_for_path, FORMATS, TEXT_FORMATS,
+    gzip_chunks, wants_gzip,
+    VersionConflict, CONFLICT_RETRIES, version_conflict, Item,
+)
+from fastapi.responses import StreamingResponse
+import asyncio
 
 router = APIRouter(prefix="/items", tags=["items"])
+items_repo = AsyncItemRepository()
+staff_repo = AsyncStaffRepository()
+
+async def _staff_department(user_email):
+    user = await staff_repo.get(user_email)
+    if not user:
+        raise HTTPException(status_code=403, detail="Unknown staff user")
+    return user.get("department")
 
 @router.get("")
-def list_items(admin: Optional[bool] = False, department: Optional[str] = None):
-    data = load_data()
+async def list_items(admin: Optional[bool] = False, department: Optional[str] = None):
+    data = await async_load_data(sections=("items",))
     items = data.get("items", [])
     if admin:
         return items
     if department:
-        return [it for it in items if it.get("department") == department]
+        return data.department_items(department)
     return items
 
 @router.get("/depleted")
-def depleted_items():
-    data = load_data()
+async def depleted_items():
+    data = await async_load_data(sections=("items",))
     return [it for it in data.get("items", []) if it.get("current_amount", 0) == 0]
 
-# CSV import/export endpoints must come before the parameterized route
+# import/export endpoints must come before the parameterized route
 @router.post("/import")
-async def api_import(kind: str = Form(...), file: UploadFile = File(...)):
-    tmp = f"tmp_import_{kind}.csv"
-    content = await file.read()
-    with open(tmp, "wb") as fh:
-        fh.write(content)
-    ok, msg = import_csv_file(kind, tmp)
-    try:
-        os.remove(tmp)
-    except Exception:
-        pass
+async def api_import(kind: str = Form(...), file: UploadFile = File(...), format: Optional[str] = Form(None)):
+    """Import a CSV, JSON Lines, Parquet or Arrow file; the format defaults to the file name's extension."""
+    fmt = (format or format_for_path(file.filename or "")).lower()
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format '{fmt}'. Supported: {tuple(FORMATS)}")
+    # parsed straight from the upload's spool file (no copy on disk, nothing
+    # shared between concurrent uploads); the import is blocking, so it runs
+    # on a worker thread
+    ok, msg = await asyncio.to_thread(import_file, kind, file.file, fmt)
     if not ok:
         raise HTTPException(status_code=400, detail=msg)
     return {"success": True, "message": msg}
 
 @router.get("/export")
-def api_export(kind: str):
-    ok, msg, fname = export_csv_file(kind, None)
-    if not ok:
-        raise HTTPException(status_code=400, detail=msg)
-    path = os.path.abspath(fname)
-    if not os.path.exists(path):
-        raise HTTPException(status_code=500, detail="Export file not found on server")
-    return FileResponse(path, media_type="text/csv", filename=os.path.basename(path))
+async def api_export(request: Request, kind: str, fmt: str = Query("csv", alias="format"), gzip: Optional[bool] = None):
+    """
+    Stream an export straight from the store (nothing is written to disk).
+    format: csv (default), jsonl, parquet or arrow.
+    gzip=true/false forces or disables gzip content-encoding of the text
+    formats; by default the client's Accept-Encoding decides. Parquet and
+    Arrow are compressed already and never gzipped.
+    """
+    fmt = fmt.lower()
+    try:
+        # a sync iterator: StreamingResponse pulls each chunk on a worker thread
+        chunks = iter_export(kind, fmt)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    headers = {"Content-Disposition": f'attachment; filename="{export_filename(kind, fmt)}"'}
+    if fmt in TEXT_FORMATS:
+        headers["Vary"] = "Accept-Encoding"
+        if wants_gzip(request, gzip):
+            chunks = gzip_chunks(chunks)
+            headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(chunks, media_type=FORMATS[fmt][2], headers=headers)
 
 @router.post("")
-def create_item(i: ItemIn):
-    data = load_data()
-    next_id = max([it.get("id", 0) for it in data.get("items", [])], default=0) + 1
-    item = {
-        "id": next_id,
-        "department": i.department,
-        "type": i.type,
-        "name": i.name,
-        "amount_needed": i.amount_needed,
-        "current_amount": i.amount_needed
-    }
-    data.setdefault("items", []).append(item)
-    if i.department not in data.get("departments", []):
-        data.setdefault("departments", []).append(i.department)
-    save_data(data)
-    return item
+async def create_item(i: ItemIn):
+    item = Item(
+        id=await async_allocate_ids("items"),
+        department=i.department,
+        type=i.type,
+        name=i.name,
+        amount_needed=i.amount_needed,
+        current_amount=i.amount_needed,
+    )
+    item = await items_repo.put_record(item)
+    await async_ensure_department(i.department)
+    return item.to_doc()
 
 @router.get("/{item_id}")
-def get_item(item_id: int):
-    data = load_data()
-    it = next((x for x in data.get("items", []) if x.get("id") == item_id), None)
+async def get_item(item_id: int):
+    it = await items_repo.get(item_id)
     if not it:
         raise HTTPException(status_code=404, detail="Item not found")
     return it
 
 @router.put("/{item_id}")
-def update_item(item_id: int, upd: ItemUpdate):
-    data = load_data()
-    it = next((x for x in data.get("items", []) if x.get("id") == item_id), None)
-    if not it:
-        raise HTTPException(status_code=404, detail="Item not found")
+async def update_item(item_id: int, upd: ItemUpdate):
+    fields = {}
     if upd.department:
-        it["department"] = upd.department
-        if upd.department not in data.get("departments", []):
-            data.setdefault("departments", []).append(upd.department)
+        fields["department"] = upd.department
     if upd.type:
-        it["type"] = upd.type
+        fields["type"] = upd.type
     if upd.name:
-        it["name"] = upd.name
+        fields["name"] = upd.name
     if upd.amount_needed is not None:
-        it["amount_needed"] = upd.amount_needed
-        it["current_amount"] = upd.amount_needed
-    save_data(data)
+        fields["amount_needed"] = upd.amount_needed
+        fields["current_amount"] = upd.amount_needed
+    try:
+        it = await (items_repo.update_fields(item_id, fields, expected_version=upd.version) if fields else items_repo.get(item_id))
+    except VersionConflict as e:
+        raise version_conflict(e)
+    if not it:
+        raise HTTPException(status_code=404, detail="Item not found")
+    if upd.department:
+        await async_ensure_department(upd.department)
     return it
 
 @router.delete("/{item_id}")
-def delete_item(item_id: int):
-    data = load_data()
-    it = next((x for x in data.get("items", []) if x.get("id") == item_id), None)
-    if not it:
+async def delete_item(item_id: int, version: Optional[int] = None):
+    try:
+        removed = await items_repo.delete(item_id, expected_version=version)
+    except VersionConflict as e:
+        raise version_conflict(e)
+    if not removed:
         raise HTTPException(status_code=404, detail="Item not found")
-    data["items"].remove(it)
-    save_data(data)
     return {"success": True}
 
 @router.post("/{item_id}/use")
-def use_item(item_id: int, user_email: str = Form(...), amount: int = Form(...)):
-    data = load_data()
-    staff = data.get("staff", {})
-    if user_email not in staff:
-        raise HTTPException(status_code=403, detail="Unknown staff user")
-    dept = staff[user_email].get("department")
-    it = next((x for x in data.get("items", []) if x.get("id") == item_id and x.get("department") == dept), None)
-    if not it:
-        raise HTTPException(status_code=404, detail="Item not found in user's department")
+async def use_item(item_id: int, user_email: str = Form(...), amount: int = Form(...)):
+    dept = await _staff_department(user_email)
     if amount <= 0:
         raise HTTPException(status_code=400, detail="Amount must be positive")
-    if amount >= it.get("current_amount", 0):
-        it["current_amount"] = 0
-        save_data(data)
+    it, just_depleted = await items_repo.consume(item_id, dept, amount)
+    if not it:
+        raise HTTPException(status_code=404, detail="Item not found in user's department")
+    if just_depleted:
+        # only the request that emptied the stock notifies the admins
         try:
-            send_depletion_email(it, data=data)
+            await asyncio.to_thread(send_depletion_email, it)
         except Exception:
             pass
-        return {"used": amount, "current_amount": 0, "depleted": True}
-    it["current_amount"] = it.get("current_amount", 0) - amount
-    save_data(data)
-    return {"used": amount, "current_amount": it["current_amount"], "depleted": False}
+    it = Item.of(it)
+    return {"used": amount, "current_amount": it.current_amount, "depleted": it.depleted}
 
 @router.post("/{item_id}/refill")
-def refill_item(item_id: int, user_email: str = Form(...)):
-    data = load_data()
-    staff = data.get("staff", {})
-    if user_email not in staff:
-        raise HTTPException(status_code=403, detail="Unknown staff user")
-    dept = staff[user_email].get("department")
-    it = next((x for x in data.get("items", []) if x.get("id") == item_id), None)
-    if not it:
-        raise HTTPException(status_code=404, detail="Item not found")
-    if it.get("department") != dept:
-        raise HTTPException(status_code=403, detail="Cannot refill item outside your department")
-    it["current_amount"] = it.get("amount_needed", it.get("current_amount", 0))
-    save_data(data)
-    return {"refilled_to": it["current_amount"]}
\ No newline at end of file
+async def refill_item(item_id: int, user_email: str = Form(...)):
+    dept = await _staff_department(user_email)
+    for attempt in range(CONFLICT_RETRIES):
+        it = await items_repo.get_record(item_id)
+        if not it:
+            raise HTTPException(status_code=404, detail="Item not found")
+        if it.department != dept:
+            raise HTTPException(status_code=403, detail="Cannot refill item outside your department")
+        try:
+            # conditional on the version read, so a concurrent edit of amount_needed isn't lost
+            it = await items_repo.update_fields(item_id, {"current_amount": it.amount_needed}, expected_version=it.version)
+        except VersionConflict as e:
+            if attempt == CONFLICT_RETRIES - 1:
+                raise version_conflict(e)
+            continue
+        if not it:
+            raise HTTPException(status_code=404, detail="Item not found")
+        return {"refilled_to": it["current_amount"]}
\ No newline at end of file
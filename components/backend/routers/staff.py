@@ -1,76 +1,75 @@
 from fastapi import APIRouter, HTTPException
-from backend.schemas import RegisterIn
-from backend.common import load_data, save_data
+from backend.schemas import RegisterIn, StaffUpdate
+from backend.common import (
+    async_ensure_role, async_ensure_department, AsyncAdminRepository, AsyncStaffRepository,
+    VersionConflict, CONFLICT_RETRIES, version_conflict,
+)
 
 router = APIRouter(prefix="/staff", tags=["staff"])
+admins_repo = AsyncAdminRepository()
+staff_repo = AsyncStaffRepository()
 
 @router.get("")
-def get_staff():
-    data = load_data()
-    return data.get("staff", {})
+async def get_staff():
+    return await staff_repo.find()
 
 @router.get("/{email}")
-def get_staff_user(email: str):
-    u = load_data().get("staff", {}).get(email)
+async def get_staff_user(email: str):
+    u = await staff_repo.get(email)
     if not u:
         raise HTTPException(status_code=404, detail="Staff not found")
     return u
 
 @router.post("")
-def create_staff(payload: RegisterIn):
+async def create_staff(payload: RegisterIn):
     if payload.type.lower() != "staff":
         raise HTTPException(status_code=400, detail="Use /auth/register for admins")
-    data = load_data()
     email = payload.email
-    if email in data.get("admins", {}) or email in data.get("staff", {}):
+    if await admins_repo.get(email) or await staff_repo.get(email):
         raise HTTPException(status_code=400, detail="Email already registered")
-    data.setdefault("staff", {})[email] = {
+    await staff_repo.put(email, {
         "name": payload.name,
         "password": payload.password,
         "role": payload.role or "Default Role",
         "department": payload.department or "Default Department",
         "type": "staff"
-    }
+    })
     # ensure department/role lists include values
-    if data.get("roles") is None:
-        data["roles"] = []
-    if data.get("departments") is None:
-        data["departments"] = []
-    if data[email := payload.email].get("role") not in data["roles"]:
-        if payload.role:
-            data.setdefault("roles", []).append(payload.role)
-    if payload.department and payload.department not in data["departments"]:
-        data.setdefault("departments", []).append(payload.department)
-    save_data(data)
+    await async_ensure_role(payload.role)
+    await async_ensure_department(payload.department)
     return {"success": True, "email": email}
 
 @router.put("/{email}")
-def update_staff(email: str, payload: RegisterIn):
-    data = load_data()
-    staff = data.get("staff", {})
-    if email not in staff:
+async def update_staff(email: str, payload: StaffUpdate):
+    # with payload.version the client's read decides; otherwise re-read and retry on a lost race
+    attempts = 1 if payload.version is not None else CONFLICT_RETRIES
+    for attempt in range(attempts):
+        current = await staff_repo.get_record(email)
+        if not current:
+            raise HTTPException(status_code=404, detail="Staff not found")
+        expected = payload.version if payload.version is not None else current.version
+        try:
+            # update fields; keep type 'staff'
+            user = await staff_repo.update_fields(email, {
+                "name": payload.name,
+                "password": payload.password,
+                "role": payload.role or current.role or "Default Role",
+                "department": payload.department or current.department or "Default Department",
+                "type": "staff"
+            }, expected_version=expected)
+            break
+        except VersionConflict as e:
+            if attempt == attempts - 1:
+                raise version_conflict(e)
+    if not user:
         raise HTTPException(status_code=404, detail="Staff not found")
-    # update fields; keep type 'staff'
-    staff[email] = {
-        "name": payload.name,
-        "password": payload.password,
-        "role": payload.role or staff[email].get("role", "Default Role"),
-        "department": payload.department or staff[email].get("department", "Default Department"),
-        "type": "staff"
-    }
     # ensure department/role lists include values
-    if staff[email]["role"] not in data.setdefault("roles", []):
-        data["roles"].append(staff[email]["role"])
-    if staff[email]["department"] not in data.setdefault("departments", []):
-        data["departments"].append(staff[email]["department"])
-    save_data(data)
+    await async_ensure_role(user["role"])
+    await async_ensure_department(user["department"])
     return {"success": True}
 
 @router.delete("/{email}")
-def delete_staff(email: str):
-    data = load_data()
-    if email in data.get("staff", {}):
-        del data["staff"][email]
-        save_data(data)
+async def delete_staff(email: str):
+    if await staff_repo.delete(email):
         return {"success": True}
     raise HTTPException(status_code=404, detail="Staff not found")
\ No newline at end of file
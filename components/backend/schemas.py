@@ -9,6 +9,13 @@ class RegisterIn(BaseModel):
     role: Optional[str] = None
     department: Optional[str] = None
 
+class StaffUpdate(BaseModel):
+    name: str
+    password: str
+    role: Optional[str] = None
+    department: Optional[str] = None
+    version: Optional[int] = None  # "_v" of the staff record the client read; 409 if it changed since
+
 class LoginIn(BaseModel):
     type: str
     email: EmailStr
@@ -30,4 +37,5 @@ class ItemUpdate(BaseModel):
     department: Optional[str] = None
     type: Optional[str] = None
     name: Optional[str] = None
-    amount_needed: Optional[int] = None
\ No newline at end of file
+    amount_needed: Optional[int] = None
+    version: Optional[int] = None  # "_v" the client read; 409 if the item changed since
\ No newline at end of file
@@ -1,210 +1,606 @@
+import codecs
 import csv
+import io
+import json
 import os
-from datetime import datetime
-from data_store import load_data, save_data
+from contextlib import contextmanager
+from datetime import date, datetime
+from itertools import islice
+from data_store import (
+    load_data, item_name_key, bump_counter, allocate_ids, ensure_roles, ensure_departments,
+    StaffRepository, ItemRepository, ReservationRepository,
+)
+from records import Reservation
 
-ALLOWED_KINDS = ("items", "staff", "roles", "departments")
+try:
+    import pyarrow as pa  # optional: Parquet and Arrow formats
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
 
-def _next_item_id(data):
-    return max([it.get("id", 0) for it in data.get("items", [])], default=0) + 1
+ALLOWED_KINDS = ("items", "staff", "roles", "departments", "reservations")
+# file formats: (label, extension, media type)
+FORMATS = {
+    "csv": ("CSV", ".csv", "text/csv; charset=utf-8"),
+    "jsonl": ("JSON Lines", ".jsonl", "application/x-ndjson"),
+    "parquet": ("Parquet", ".parquet", "application/vnd.apache.parquet"),
+    "arrow": ("Arrow", ".arrow", "application/vnd.apache.arrow.file"),
+}
+# formats whose output is text (worth gzipping); the others need pyarrow
+TEXT_FORMATS = ("csv", "jsonl")
+# other extensions format_for_path() recognizes
+_EXTENSIONS = {".ndjson": "jsonl", ".feather": "arrow", ".ipc": "arrow"}
+DEFAULT_BATCH_SIZE = 1000
+# rows per Parquet row group / Arrow record batch in exports
+DEFAULT_ROW_GROUP_SIZE = 50000
+# invalid and duplicate rows listed by line number in the import message
+MAX_REPORTED_ERRORS = 5
+RESERVATION_STATUSES = ("pending", "fulfilled", "cancelled")
 
-def import_csv_file(kind: str, csv_path: str):
+def _print_progress(kind, batch, rows, totals):
+    print(f"import_file: {kind} batch {batch}: {rows} row(s) ({totals})")
+
+def _env_size(name, default):
+    try:
+        return max(1, int(os.environ.get(name, default)))
+    except ValueError:
+        return default
+
+def _batches(rows, size):
+    """Lists of up to `size` entries from `rows`."""
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+def format_for_path(path, default="csv"):
+    """The format named by `path`'s extension, or `default` for one not in FORMATS."""
+    extension = os.path.splitext(str(path))[1].lower()
+    for fmt, (_label, ext, _media) in FORMATS.items():
+        if extension == ext:
+            return fmt
+    return _EXTENSIONS.get(extension, default)
+
+def _format_error(fmt):
+    if fmt not in FORMATS:
+        return f"Unsupported format '{fmt}'. Supported: {tuple(FORMATS)}"
+    if fmt not in TEXT_FORMATS and pa is None:
+        return f"The {FORMATS[fmt][0]} format needs pyarrow (pip install pyarrow)"
+    return None
+
+# CSV and JSON Lines give strings or JSON values, Parquet and Arrow give typed
+# values; the parsers accept any of them
+def _text(row, field):
+    value = row.get(field)
+    return "" if value is None else str(value).strip()
+
+def _int_field(row, field, default):
+    value = row.get(field)
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    value = "" if value is None else str(value).strip()
+    if not value:
+        return default
+    number = int(value)  # ValueError marks the row invalid
+    if number < 0:
+        raise ValueError(f"{field} must not be negative")
+    return number
+
+def _date_field(row, field):
+    value = row.get(field)
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    value = _text(row, field)
+    if not value:
+        return None
+    try:
+        date.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"invalid {field} {value!r}")
+    return value
+
+def _parse_name(row):
+    name = _text(row, "name")
+    if not name:
+        raise ValueError("missing name")
+    return name
+
+def _parse_staff(row):
+    # expected columns: email,name,password,role,department[,type]
+    email = _text(row, "email")
+    if not email:
+        raise ValueError("missing email")
+    role = _text(row, "role") or "Default Role"
+    department = _text(row, "department") or "Default Department"
+    # enforce staff-type constraints
+    if role == "Head":
+        role = "Default Role"
+    if department == "Office":
+        department = "Default Department"
+    return email, {
+        "name": _text(row, "name") or "Unknown",
+        "password": _text(row, "password") or "password",
+        "role": role,
+        "department": department,
+        "type": "staff"
+    }
+
+def _parse_item(row):
+    # expected columns: id,department,type,name,amount_needed,current_amount
+    try:
+        iid = _int_field(row, "id", None)
+    except ValueError:
+        raise ValueError(f"invalid id {row.get('id')!r}")
+    try:
+        amount_needed = _int_field(row, "amount_needed", 0)
+        current_amount = _int_field(row, "current_amount", amount_needed)
+    except ValueError as e:
+        raise ValueError(f"invalid amount: {e}")
+    return iid, {
+        "department": _text(row, "department") or "Unknown",
+        "type": _text(row, "type").lower() or "consumable",
+        "name": _text(row, "name") or "Unnamed",
+        "amount_needed": amount_needed,
+        "current_amount": current_amount
+    }
+
+def _parse_reservation(row):
+    # expected columns: id,item_id,item_name,department,user_email,created_on,
+    # expected_restock_date,amount_to_refill,status[,fulfilled_on]
+    ids = {}
+    for field in ("id", "item_id"):
+        try:
+            ids[field] = _int_field(row, field, None)
+        except ValueError:
+            raise ValueError(f"invalid {field} {row.get(field)!r}")
+    if ids["item_id"] is None:
+        raise ValueError("missing item_id")
+    try:
+        amount_to_refill = _int_field(row, "amount_to_refill", 0)
+    except ValueError as e:
+        raise ValueError(f"invalid amount: {e}")
+    status = _text(row, "status").lower() or "pending"
+    if status not in RESERVATION_STATUSES:
+        raise ValueError(f"invalid status {status!r}")
+    return ids["id"], {
+        "item_id": ids["item_id"],
+        "item_name": _text(row, "item_name") or "Unknown item",
+        "department": _text(row, "department") or "Unknown",
+        "user_email": _text(row, "user_email"),
+        "created_on": _date_field(row, "created_on") or date.today().isoformat(),
+        "expected_restock_date": _date_field(row, "expected_restock_date"),
+        "amount_to_refill": amount_to_refill,
+        "status": status,
+        "fulfilled_on": _date_field(row, "fulfilled_on"),
+    }
+
+def _row_keys(kind, parsed):
+    """(key, description) pairs that identify a parsed row's record, for duplicate detection."""
+    if kind in ("roles", "departments"):
+        return [(parsed, f"name {parsed!r}")]
+    if kind == "staff":
+        return [(parsed[0], f"email {parsed[0]!r}")]
+    if kind == "reservations":
+        return [(("id", parsed[0]), f"id {parsed[0]}")] if parsed[0] is not None else []
+    iid, fields = parsed
+    keys = [(item_name_key(fields["department"], fields["name"]), f"name {fields['name']!r} in {fields['department']!r}")]
+    if iid is not None:
+        keys.append((("id", iid), f"id {iid}"))
+    return keys
+
+def _ensure_new(section, names, known):
+    """ensure_roles/ensure_departments for the names not already handled by this import."""
+    new = list(dict.fromkeys(n for n in names if n not in known))
+    if not new:
+        return 0
+    known.update(new)
+    return (ensure_roles if section == "roles" else ensure_departments)(new)
+
+# each batch importer takes the parsed rows of one batch plus the import's
+# {"roles": set, "departments": set} of names already ensured, and returns
+# counts to add to the totals
+def _import_names(section, names, known):
+    return {"added": _ensure_new(section, names, known[section])}
+
+def _import_staff(parsed, repo, known):
+    parsed = dict(parsed)
+    existing = repo.get_many(list(parsed))
+    for email, doc in existing.items():
+        # replaces the whole record, but its version carries on from the stored one
+        parsed[email]["_v"] = doc.get("_v", 0)
+    repo.put_many(parsed.items())
+    _ensure_new("roles", (p["role"] for p in parsed.values()), known["roles"])
+    _ensure_new("departments", (p["department"] for p in parsed.values()), known["departments"])
+    return {"added": len(parsed) - len(existing), "updated": len(existing)}
+
+def _import_items(parsed, repo, known):
+    by_id = repo.get_many([iid for iid, _f in parsed if iid is not None])
+    by_name = repo.find_by_names([(f["department"], f["name"]) for iid, f in parsed if iid not in by_id])
+    # items this batch writes, so later rows for the same item update it again
+    written, pending_by_id, pending_by_name = {}, {}, {}
+    added = updated = 0
+    for iid, fields in parsed:
+        key = item_name_key(fields["department"], fields["name"])
+        item = None
+        if iid is not None:
+            item = pending_by_id.get(iid) or by_id.get(iid)
+        if item is None:
+            item = pending_by_name.get(key) or by_name.get(key)
+        if item is None:
+            item = {"id": iid}
+            added += 1
+        else:
+            item = pending_by_id.get(item.get("id"), item)
+            updated += 1
+            old_key = item_name_key(item.get("department"), item.get("name"))
+            if pending_by_name.get(old_key) is item:
+                del pending_by_name[old_key]
+        item.update(fields)
+        pending_by_name.setdefault(key, item)
+        if item["id"] is not None:
+            pending_by_id[item["id"]] = item
+        written[id(item)] = item
+    items = list(written.values())
+    # explicit ids raise the counter before ids are handed out to rows without one
+    explicit = [it["id"] for it in items if it["id"] is not None]
+    if explicit:
+        bump_counter("items", max(explicit))
+    new = [it for it in items if it["id"] is None]
+    if new:
+        first = allocate_ids("items", len(new))
+        for offset, item in enumerate(new):
+            item["id"] = first + offset
+    repo.put_many((it["id"], it) for it in items)
+    _ensure_new("departments", (it["department"] for it in items), known["departments"])
+    return {"added": added, "updated": updated}
+
+def _import_reservations(parsed, repo, known):
+    # a row with an id replaces that reservation (the last such row wins), one without adds a new one
+    by_id = {rid: Reservation(id=rid, **fields) for rid, fields in parsed if rid is not None}
+    new = [Reservation(**fields) for rid, fields in parsed if rid is None]
+    existing = repo.get_many(list(by_id))
+    for rid, doc in existing.items():
+        by_id[rid].version = doc.get("_v", 0)
+    if by_id:
+        bump_counter("reservations", max(by_id))
+    if new:
+        first = allocate_ids("reservations", len(new))
+        for offset, reservation in enumerate(new):
+            reservation.id = first + offset
+    repo.put_many((r.id, r.to_doc()) for r in list(by_id.values()) + new)
+    return {"added": len(by_id) - len(existing) + len(new), "updated": len(existing)}
+
+def _is_path(source):
+    return isinstance(source, (str, os.PathLike))
+
+@contextmanager
+def _open_text(source):
+    """`source` (a path or a binary file object) as UTF-8 text; a file object is left open."""
+    if _is_path(source):
+        with open(source, newline='', encoding='utf-8') as fh:
+            yield fh
+        return
+    try:
+        fh = io.TextIOWrapper(source, encoding='utf-8', newline='')
+    except AttributeError:
+        # before Python 3.11 SpooledTemporaryFile (an upload's spool file)
+        # lacks readable() and friends; a codecs reader needs only read()
+        yield codecs.getreader('utf-8')(source)
+        return
+    try:
+        yield fh
+    finally:
+        # hand the file back to the caller instead of closing it with the wrapper
+        fh.detach()
+
+def _csv_rows(source):
+    with _open_text(source) as fh:
+        reader = csv.DictReader(fh)
+        for row in reader:
+            yield reader.line_num, row
+
+def _jsonl_rows(source):
+    with _open_text(source) as fh:
+        for number, line in enumerate(fh, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"line {number}: invalid JSON ({e.msg})")
+            if not isinstance(row, dict):
+                raise ValueError(f"line {number}: expected a JSON object")
+            yield number, row
+
+def _arrow_batches(source):
+    if _is_path(source):
+        with pa.memory_map(str(source)) as mapped:
+            yield from _arrow_batches(mapped)
+        return
+    start = source.tell()
+    try:
+        reader = pa.ipc.open_file(source)
+    except pa.ArrowInvalid:
+        # not the file format: try the Arrow streaming format
+        source.seek(start)
+        yield from pa.ipc.open_stream(source)
+        return
+    for i in range(reader.num_record_batches):
+        yield reader.get_batch(i)
+
+def _columnar_rows(source, fmt, batch_size):
+    if fmt == "parquet":
+        batches = pq.ParquetFile(str(source) if _is_path(source) else source).iter_batches(batch_size=batch_size)
+    else:
+        batches = _arrow_batches(source)
+    number = 0
+    for batch in batches:
+        # a file written elsewhere may hold one huge batch; convert a slice at a time
+        for offset in range(0, batch.num_rows, batch_size):
+            for row in batch.slice(offset, batch_size).to_pylist():
+                number += 1
+                yield number, row
+
+def _import_rows(source, fmt, batch_size):
+    """(line or row number, row dict) pairs of an import file."""
+    if fmt == "csv":
+        return _csv_rows(source)
+    if fmt == "jsonl":
+        return _jsonl_rows(source)
+    return _columnar_rows(source, fmt, batch_size)
+
+def import_file(kind: str, path, format: str = None, batch_size: int = None, progress=None):
     """
-    Import CSV into the in-app data store.
-    kind: one of ALLOWED_KINDS ("items","staff","roles","departments")
-    csv_path: path to CSV file
+    Import a file into the in-app data store.
+    kind: one of ALLOWED_KINDS ("items","staff","roles","departments","reservations")
+    path: path to the file, or a binary file object (such as an upload's
+    spool file) read from its current position and left open; Parquet and
+    Arrow need it to be seekable
+    format: one of FORMATS ("csv","jsonl","parquet","arrow"); by default taken
+    from the file's extension (a file object's name), CSV if that isn't
+    known. Parquet and Arrow need pyarrow. Columns are those of the matching
+    export.
+    The file is streamed and written in batches of batch_size rows (default
+    IMPORT_BATCH_SIZE or 1000); progress(kind, batch, rows, totals) is called
+    after each batch (default: print a line). Rows that don't validate are
+    skipped and reported; rows repeating an earlier row's key (id, name or
+    email) are applied in file order, the last one winning, and reported.
+    Batches already written stay written if a later one fails.
     Returns (success: bool, message: str)
     """
     kind = kind.lower()
     if kind not in ALLOWED_KINDS:
         return False, f"Unsupported kind '{kind}'. Supported: {ALLOWED_KINDS}"
-    if not os.path.exists(csv_path):
-        return False, f"File not found: {csv_path}"
-
-    data = load_data()
+    fmt = (format or format_for_path(path if _is_path(path) else getattr(path, "name", ""))).lower()
+    error = _format_error(fmt)
+    if error:
+        return False, error
+    if _is_path(path) and not os.path.exists(path):
+        return False, f"File not found: {path}"
+    batch_size = max(1, batch_size) if batch_size else _env_size("IMPORT_BATCH_SIZE", DEFAULT_BATCH_SIZE)
+    progress = progress or _print_progress
+    known = {"roles": set(), "departments": set()}
+    if kind in ("roles", "departments"):
+        parse, write = _parse_name, lambda parsed: _import_names(kind, parsed, known)
+    elif kind == "staff":
+        parse, write = _parse_staff, lambda parsed: _import_staff(parsed, StaffRepository(), known)
+    elif kind == "reservations":
+        parse, write = _parse_reservation, lambda parsed: _import_reservations(parsed, ReservationRepository(), known)
+    else:
+        parse, write = _parse_item, lambda parsed: _import_items(parsed, ItemRepository(), known)
 
+    totals = {"added": 0} if kind in ("roles", "departments") else {"added": 0, "updated": 0}
+    invalid, duplicates = [], []
+    # keys of the rows seen so far
+    seen = set()
+    read_errors = (csv.Error, UnicodeDecodeError) + ((pa.ArrowException,) if pa is not None else ())
+    rows = _import_rows(path, fmt, batch_size)
     try:
-        with open(csv_path, newline='', encoding='utf-8') as fh:
-            reader = csv.DictReader(fh)
-            rows = list(reader)
+        for number, batch in enumerate(_batches(rows, batch_size), 1):
+            parsed = []
+            for line, row in batch:
+                try:
+                    value = parse(row)
+                except ValueError as e:
+                    # a bad row is skipped and reported, it doesn't take its batch down
+                    invalid.append((line, str(e)))
+                    continue
+                for key, description in _row_keys(kind, value):
+                    if key in seen:
+                        duplicates.append((line, f"duplicate {description}"))
+                    seen.add(key)
+                parsed.append(value)
+            for k, v in write(parsed).items():
+                totals[k] += v
+            progress(kind, number, len(batch), dict(totals, invalid=len(invalid), duplicates=len(duplicates)))
+    except read_errors as e:
+        return False, f"Failed to read {FORMATS[fmt][0]}: {e}"
     except Exception as e:
-        return False, f"Failed to read CSV: {e}"
+        return False, f"Import stopped: {e} ({_summary(kind, totals)} before the error)"
+    finally:
+        rows.close()
 
-    if kind == "roles":
-        added = 0
-        for r in rows:
-            name = (r.get("name") or "").strip()
-            if not name:
-                continue
-            if name not in data["roles"]:
-                data["roles"].append(name)
-                added += 1
-        save_data(data)
-        return True, f"Imported roles: added {added} new role(s)."
-
-    if kind == "departments":
-        added = 0
-        for r in rows:
-            name = (r.get("name") or "").strip()
-            if not name:
-                continue
-            if name not in data["departments"]:
-                data["departments"].append(name)
-                added += 1
-        save_data(data)
-        return True, f"Imported departments: added {added} new department(s)."
+    # text formats count file lines, the columnar ones rows
+    unit = "line" if fmt in TEXT_FORMATS else "row"
+    message = f"Imported {kind}: {_summary(kind, totals)}."
+    if invalid:
+        message += f" Skipped {len(invalid)} invalid row(s): {_listed(invalid, unit)}."
+    if duplicates:
+        message += f" {len(duplicates)} row(s) repeat an earlier row: {_listed(duplicates, unit)}."
+    return True, message
 
-    if kind == "staff":
-        # expected columns: email,name,password,role,department[,type]
-        added = 0
-        updated = 0
-        for r in rows:
-            email = (r.get("email") or "").strip()
-            if not email:
-                continue
-            name = (r.get("name") or "").strip() or "Unknown"
-            password = (r.get("password") or "").strip() or "password"
-            role = (r.get("role") or "").strip() or "Default Role"
-            department = (r.get("department") or "").strip() or "Default Department"
-            # enforce staff-type constraints
-            if role == "Head":
-                role = "Default Role"
-            if department == "Office":
-                department = "Default Department"
-            payload = {
-                "name": name,
-                "password": password,
-                "role": role,
-                "department": department,
-                "type": "staff"
-            }
-            if email in data.get("staff", {}):
-                data["staff"][email] = payload
-                updated += 1
-            else:
-                data.setdefault("staff", {})[email] = payload
-                added += 1
-            if role not in data["roles"]:
-                data["roles"].append(role)
-            if department not in data["departments"]:
-                data["departments"].append(department)
-        save_data(data)
-        return True, f"Imported staff: {added} added, {updated} updated."
-
-    if kind == "items":
-        # expected columns: id,department,type,name,amount_needed,current_amount
-        added = 0
-        updated = 0
-        for r in rows:
-            # parse id if provided
-            try:
-                iid = int(r.get("id")) if (r.get("id") or "").strip() else None
-            except Exception:
-                iid = None
-            department = (r.get("department") or "").strip() or "Unknown"
-            itype = (r.get("type") or "").strip().lower() or "consumable"
-            name = (r.get("name") or "").strip() or "Unnamed"
-            try:
-                amount_needed = int(r.get("amount_needed")) if (r.get("amount_needed") or "").strip() else 0
-            except Exception:
-                amount_needed = 0
-            try:
-                current_amount = int(r.get("current_amount")) if (r.get("current_amount") or "").strip() else amount_needed
-            except Exception:
-                current_amount = amount_needed
-
-            # find existing by id or by department+name
-            found = None
-            if iid is not None:
-                found = next((it for it in data["items"] if it.get("id") == iid), None)
-            if found is None:
-                found = next((it for it in data["items"] if it.get("department") == department and it.get("name","").lower() == name.lower()), None)
-            if found:
-                # update found item
-                found.update({
-                    "department": department,
-                    "type": itype,
-                    "name": name,
-                    "amount_needed": amount_needed,
-                    "current_amount": current_amount
-                })
-                updated += 1
-            else:
-                new_id = iid if iid is not None else _next_item_id(data)
-                item = {
-                    "id": new_id,
-                    "department": department,
-                    "type": itype,
-                    "name": name,
-                    "amount_needed": amount_needed,
-                    "current_amount": current_amount
-                }
-                data["items"].append(item)
-                added += 1
-            if department not in data["departments"]:
-                data["departments"].append(department)
-        save_data(data)
-        return True, f"Imported items: {added} added, {updated} updated."
-
-    return False, "Unhandled import kind."
+def import_csv_file(kind: str, csv_path, batch_size: int = None, progress=None):
+    """import_file() for a CSV file (path or binary file object), whatever its extension."""
+    return import_file(kind, csv_path, "csv", batch_size, progress)
 
-def export_csv_file(kind: str, out_path: str = None):
+def _listed(problems, unit="line"):
+    shown = "; ".join(f"{unit} {line}: {error}" for line, error in problems[:MAX_REPORTED_ERRORS])
+    more = f" (+{len(problems) - MAX_REPORTED_ERRORS} more)" if len(problems) > MAX_REPORTED_ERRORS else ""
+    return shown + more
+
+def _summary(kind, totals):
+    if kind in ("roles", "departments"):
+        noun = "role(s)" if kind == "roles" else "department(s)"
+        return f"added {totals['added']} new {noun}"
+    return f"{totals['added']} added, {totals['updated']} updated"
+
+# columns of each export kind; they name the record attributes (records.py)
+EXPORT_COLUMNS = {
+    "roles": ["name"],
+    "departments": ["name"],
+    "staff": ["email", "name", "password", "role", "department", "type"],
+    "items": ["id", "department", "type", "name", "amount_needed", "current_amount"],
+    "reservations": ["id", "item_id", "item_name", "department", "user_email", "created_on",
+                     "expected_restock_date", "amount_to_refill", "status", "fulfilled_on"],
+}
+# typed as integers in Parquet and Arrow exports; every other column is a string
+_INT_COLUMNS = ("id", "item_id", "amount_needed", "current_amount", "amount_to_refill")
+_REPOSITORIES = {"staff": StaffRepository, "items": ItemRepository, "reservations": ReservationRepository}
+
+def _export_rows(kind, batch_size=None):
+    """Rows of `kind` as lists in EXPORT_COLUMNS order; numbers are ints, missing values None."""
+    if kind in ("roles", "departments"):
+        for name in load_data(sections=(kind,)).get(kind, []):
+            yield [name]
+        return
+    columns = EXPORT_COLUMNS[kind]
+    repo = _REPOSITORIES[kind]()
+    for key, doc in repo.scan(batch_size):
+        record = repo.record_type.from_doc(doc, key)
+        yield [getattr(record, column) for column in columns]
+
+def _text_export(kind, fmt, chunk_size):
+    buf = io.StringIO()
+    if fmt == "csv":
+        writer = csv.writer(buf)
+        writer.writerow(EXPORT_COLUMNS[kind])
+        # the header goes out on its own, before the first page is read
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+        write = lambda row: writer.writerow(["" if v is None else v for v in row])
+    else:
+        columns = EXPORT_COLUMNS[kind]
+        write = lambda row: buf.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False) + "\n")
+    for row in _export_rows(kind):
+        write(row)
+        if buf.tell() >= chunk_size:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    if buf.tell():
+        yield buf.getvalue()
+
+class _ChunkSink:
+    """Write-only file that collects what pyarrow writes so it can be handed out as chunks."""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+def _columnar_export(kind, fmt, batch_size):
+    schema = pa.schema([(c, pa.int64() if c in _INT_COLUMNS else pa.string()) for c in EXPORT_COLUMNS[kind]])
+    # zstd by default; "none" turns compression off
+    compression = os.environ.get("EXPORT_COMPRESSION", "zstd").lower()
+    sink = _ChunkSink()
+    if fmt == "parquet":
+        writer = pq.ParquetWriter(sink, schema, compression=compression)
+    else:
+        codec = compression if compression in ("lz4", "zstd") else None
+        writer = pa.ipc.new_file(sink, schema, options=pa.ipc.IpcWriteOptions(compression=codec))
+    with writer:
+        # one Parquet row group / Arrow record batch per batch of rows
+        for rows in _batches(_export_rows(kind), batch_size):
+            columns = [pa.array(values, type=field.type) for values, field in zip(zip(*rows), schema)]
+            writer.write_batch(pa.record_batch(columns, schema=schema))
+            yield sink.take()
+    yield sink.take()
+
+def iter_export(kind: str, format: str = "csv", batch_size: int = None):
+    """
+    The export of `kind` in `format` as an iterator of bytes chunks. Records
+    are read from the store page by page, so memory use doesn't depend on
+    the export's size. CSV and JSON Lines come in chunks of about 64 KiB (the
+    CSV header on its own first); Parquet and Arrow in row groups / record
+    batches of batch_size rows (default EXPORT_ROW_GROUP_SIZE or 50000), with
+    integer columns typed as int64 and EXPORT_COMPRESSION (default zstd).
+    Raises ValueError for an unknown kind or format, or when a format needs
+    pyarrow and it isn't installed.
+    """
+    kind, fmt = kind.lower(), format.lower()
+    if kind not in ALLOWED_KINDS:
+        raise ValueError(f"Unsupported kind '{kind}'. Supported: {ALLOWED_KINDS}")
+    error = _format_error(fmt)
+    if error:
+        raise ValueError(error)
+    if fmt in TEXT_FORMATS:
+        return (chunk.encode("utf-8") for chunk in _text_export(kind, fmt, 1 << 16))
+    batch_size = max(1, batch_size) if batch_size else _env_size("EXPORT_ROW_GROUP_SIZE", DEFAULT_ROW_GROUP_SIZE)
+    return _columnar_export(kind, fmt, batch_size)
+
+def iter_csv_export(kind: str, chunk_size: int = 1 << 16):
+    """
+    Yield the CSV export of `kind` as text chunks of about chunk_size
+    characters, the header row on its own first. Records are read from the
+    store page by page, so memory use doesn't depend on the export's size.
     """
-    Export requested data to a CSV file.
+    kind = kind.lower()
+    if kind not in ALLOWED_KINDS:
+        raise ValueError(f"Unsupported kind '{kind}'. Supported: {ALLOWED_KINDS}")
+    yield from _text_export(kind, "csv", chunk_size)
+
+def export_filename(kind: str, format: str = "csv"):
+    """Default timestamped file name for an export of `kind`."""
+    return f"{kind.lower()}_{datetime.now().strftime('%Y%m%d%H%M%S')}{FORMATS[format.lower()][1]}"
+
+def export_file(kind: str, out_path: str = None, format: str = None):
+    """
+    Export requested data to a file.
     kind: one of ALLOWED_KINDS
     out_path: optional path; if not provided a timestamped file in cwd is created.
+    format: one of FORMATS; by default taken from out_path's extension, CSV
+    if there is none (see iter_export)
     Returns (success: bool, message: str, filename: str|None)
     """
-    kind = kind.lower()
-    if kind not in ALLOWED_KINDS:
-        return False, f"Unsupported kind '{kind}'. Supported: {ALLOWED_KINDS}", None
-
-    data = load_data()
-    ts = datetime.now().strftime("%Y%m%d%H%M%S")
-    default_names = {
-        "roles": f"roles_{ts}.csv",
-        "departments": f"departments_{ts}.csv",
-        "staff": f"staff_{ts}.csv",
-        "items": f"items_{ts}.csv"
-    }
-    filename = out_path or default_names[kind]
+    fmt = (format or (format_for_path(out_path) if out_path else "csv")).lower()
+    try:
+        chunks = iter_export(kind, fmt)
+    except ValueError as e:
+        return False, str(e), None
 
+    filename = out_path or export_filename(kind, fmt)
     try:
-        with open(filename, "w", newline='', encoding='utf-8') as fh:
-            if kind == "roles":
-                writer = csv.writer(fh)
-                writer.writerow(["name"])
-                for r in data.get("roles", []):
-                    writer.writerow([r])
-            elif kind == "departments":
-                writer = csv.writer(fh)
-                writer.writerow(["name"])
-                for d in data.get("departments", []):
-                    writer.writerow([d])
-            elif kind == "staff":
-                writer = csv.writer(fh)
-                writer.writerow(["email", "name", "password", "role", "department", "type"])
-                for email, info in data.get("staff", {}).items():
-                    writer.writerow([
-                        email,
-                        info.get("name", ""),
-                        info.get("password", ""),
-                        info.get("role", ""),
-                        info.get("department", ""),
-                        info.get("type", "staff")
-                    ])
-            elif kind == "items":
-                writer = csv.writer(fh)
-                writer.writerow(["id", "department", "type", "name", "amount_needed", "current_amount"])
-                for it in data.get("items", []):
-                    writer.writerow([
-                        it.get("id", ""),
-                        it.get("department", ""),
-                        it.get("type", ""),
-                        it.get("name", ""),
-                        it.get("amount_needed", ""),
-                        it.get("current_amount", "")
-                    ])
-        return True, f"Exported {kind} to {filename}", filename
+        with open(filename, "wb") as fh:
+            for chunk in chunks:
+                fh.write(chunk)
+        return True, f"Exported {kind.lower()} to {filename}", filename
     except Exception as e:
-        return False, f"Failed to write CSV: {e}", None
\ No newline at end of file
+        return False, f"Failed to write {FORMATS[fmt][0]}: {e}", None
+
+def export_csv_file(kind: str, out_path: str = None):
+    """export_file() as CSV, whatever out_path's extension."""
+    return export_file(kind, out_path, "csv")
@@ -1,13 +1,40 @@
 from pathlib import Path
 import os
+import re
 import json
+import gzip
+import atexit
+import hashlib
+import sqlite3
+import tempfile
+import threading
+import time
 import traceback
-from pymongo import MongoClient
-from pymongo.errors import ServerSelectionTimeoutError, PyMongoError, ConfigurationError
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from pymongo import MongoClient, DeleteOne, ReplaceOne, UpdateOne, ReturnDocument
+from pymongo.collation import Collation
+from pymongo.errors import ServerSelectionTimeoutError, PyMongoError, ConfigurationError, ConnectionFailure, BulkWriteError
+from collections import deque
 import urllib.parse
+from records import Item, StaffMember, Reservation
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+try:
+    import zstandard  # optional: .zst snapshots
+except ImportError:
+    zstandard = None
 
 DATA_JSON = Path(__file__).parent / "data.json"
+DATA_SQLITE = Path(__file__).parent / "data.sqlite3"
 DEFAULT_DB_NAME = "physiotherapy-detail"
+# case-insensitive comparison (strength 2 ignores case, not accents) for item names
+NAME_COLLATION = Collation(locale="en", strength=2)
 
 def _mask_uri(uri):
     try:
@@ -21,17 +48,34 @@ def _mask_uri(uri):
     except Exception:
         return uri
 
-def get_mongo_client():
-    uri = os.environ.get("MONGO_URI")
-    if not uri:
-        # no URI -> fall back to JSON but print notice
-        print("data_store: MONGO_URI not set — using local data.json fallback")
-        return None
+# Process-wide client shared by every load/save call. MongoClient is thread-safe and
+# keeps its own connection pool, so one instance per process is all we need.
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+_uri_notice_shown = False
 
+def _env_int(name, default):
     try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+def _client_options():
+    return {
+        "maxPoolSize": _env_int("MONGO_MAX_POOL_SIZE", 50),
+        "minPoolSize": _env_int("MONGO_MIN_POOL_SIZE", 0),
+        "maxIdleTimeMS": _env_int("MONGO_MAX_IDLE_MS", 300000),
         # short server selection timeout so failures are quick in CLI apps
-        client = MongoClient(uri, serverSelectionTimeoutMS=5000)
-        # ping to verify connection / credentials
+        "serverSelectionTimeoutMS": _env_int("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000),
+        "connectTimeoutMS": _env_int("MONGO_CONNECT_TIMEOUT_MS", 5000),
+        "socketTimeoutMS": _env_int("MONGO_SOCKET_TIMEOUT_MS", 20000),
+    }
+
+def _create_mongo_client(uri):
+    try:
+        client = MongoClient(uri, **_client_options())
+        # ping once to verify connection / credentials; later calls reuse the pool
         client.admin.command("ping")
         return client
     except Exception as e:
@@ -58,6 +102,74 @@ def get_mongo_client():
         traceback.print_exc()
         return None
 
+def _engine():
+    """Storage engine picked by DATA_ENGINE: "mongo" (default), "sqlite" or "json"."""
+    engine = os.environ.get("DATA_ENGINE", "").strip().lower()
+    return engine if engine in ("sqlite", "json") else "mongo"
+
+def get_mongo_client():
+    """
+    Return the process-wide MongoClient, creating it on first use.
+    Returns None when another engine is selected, MONGO_URI is unset, the
+    server cannot be reached or the circuit breaker is open, in which case
+    callers fall back to data.json.
+    """
+    global _client, _client_pid, _uri_notice_shown
+    if _engine() != "mongo":
+        return None
+    uri = os.environ.get("MONGO_URI")
+    if not uri:
+        # no URI -> fall back to JSON but print notice (once per process)
+        if not _uri_notice_shown:
+            print("data_store: MONGO_URI not set — using local data.json fallback")
+            _uri_notice_shown = True
+        return None
+    if not _breaker.allow():
+        # MongoDB is known to be down; don't wait out another timeout
+        return None
+
+    pid = os.getpid()
+    client = _client
+    if client is not None and _client_pid == pid:
+        return client
+
+    with _client_lock:
+        if _client is not None and _client_pid == pid:
+            return _client
+        # a client inherited across fork() must not be used by the child;
+        # drop the reference without closing the parent's sockets
+        _client = None
+        client = _create_mongo_client(uri)
+        if client is not None:
+            _install_client(client)
+        else:
+            _breaker.trip("connection failed")
+        return client
+
+def _install_client(client):
+    # caller holds _client_lock
+    global _client, _client_pid
+    _client = client
+    _client_pid = os.getpid()
+    # indexes are idempotent; make sure they exist once per process
+    ensure_collections(get_db(client))
+
+def close_mongo_client():
+    """Close the shared client (on app shutdown / interpreter exit)."""
+    global _client, _client_pid
+    with _client_lock:
+        client = _client
+        owned = _client_pid == os.getpid()
+        _client = None
+        _client_pid = None
+    if client is not None and owned:
+        try:
+            client.close()
+        except Exception as e:
+            print("data_store: error closing MongoClient:", e)
+
+atexit.register(close_mongo_client)
+
 def get_db(client=None):
     client = client or get_mongo_client()
     if client is None:
@@ -65,92 +177,463 @@ def get_db(client=None):
     dbname = os.environ.get("MONGO_DB", DEFAULT_DB_NAME)
     return client[dbname]
 
+# Circuit breaker in front of MongoDB. Closed: calls go to Mongo and network
+# failures are counted. After MONGO_BREAKER_FAILURES failures within
+# MONGO_BREAKER_WINDOW seconds (or a failed connect) it opens: get_mongo_client()
+# returns None at once so callers use the fallback store instead of waiting
+# out serverSelectionTimeoutMS. While open, a background thread probes the
+# server every MONGO_BREAKER_PROBE_INTERVAL seconds; a probe in flight is the
+# half-open state, and a successful ping closes the breaker again.
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+    def __init__(self, name, probe):
+        self.name = name
+        self._probe = probe
+        self._lock = threading.Lock()
+        self._failures = deque()
+        self._state = self.CLOSED
+        self._changed_at = time.monotonic()
+        self._probe_thread = None
+        self._probe_pid = None
+        self._last_error = None
+        self._transitions = deque(maxlen=20)
+        # metrics
+        self._opened_count = 0
+        self._failure_count = 0
+        self._short_circuited = 0
+        self._fallback_seconds = 0.0
+
+    def _set_state(self, state, reason):
+        # caller holds self._lock
+        now = time.monotonic()
+        if self._state != self.CLOSED:
+            self._fallback_seconds += now - self._changed_at
+        self._transitions.append({"at": time.time(), "from": self._state, "to": state, "reason": reason})
+        if state == self.OPEN and self._state == self.CLOSED:
+            self._opened_count += 1
+            print(f"data_store: {self.name} circuit open ({reason}); using the fallback store")
+        elif state == self.CLOSED:
+            print(f"data_store: {self.name} circuit closed ({reason})")
+        self._state = state
+        self._changed_at = now
+
+    def allow(self):
+        """True if calls may go to MongoDB; False routes them to the fallback."""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            self._short_circuited += 1
+            self._start_probe()
+            return False
+
+    def record_failure(self, error):
+        """Count a network failure; opens the breaker once the threshold is reached."""
+        now = time.monotonic()
+        with self._lock:
+            self._failure_count += 1
+            self._last_error = str(error)
+            if self._state != self.CLOSED:
+                return
+            window = _env_float("MONGO_BREAKER_WINDOW", 30)
+            self._failures.append(now)
+            while self._failures and now - self._failures[0] > window:
+                self._failures.popleft()
+            if len(self._failures) >= max(1, _env_int("MONGO_BREAKER_FAILURES", 3)):
+                self._set_state(self.OPEN, f"{len(self._failures)} failures in {window:g}s")
+                self._start_probe()
+
+    def trip(self, error):
+        """Open the breaker right away (e.g. the initial connect failed)."""
+        with self._lock:
+            self._failure_count += 1
+            self._last_error = str(error)
+            if self._state == self.CLOSED:
+                self._set_state(self.OPEN, str(error))
+            self._start_probe()
+
+    def _start_probe(self):
+        # caller holds self._lock; one probe thread per process (threads don't survive fork)
+        pid = os.getpid()
+        if self._probe_pid == pid and self._probe_thread is not None and self._probe_thread.is_alive():
+            return
+        self._probe_pid = pid
+        self._probe_thread = threading.Thread(target=self._probe_loop, name=f"{self.name}-probe", daemon=True)
+        self._probe_thread.start()
+
+    def _probe_loop(self):
+        while True:
+            time.sleep(max(0.1, _env_float("MONGO_BREAKER_PROBE_INTERVAL", 10)))
+            with self._lock:
+                if self._state == self.CLOSED:
+                    return
+                self._set_state(self.HALF_OPEN, "probing")
+            try:
+                ok, error = self._probe(), None
+            except Exception as e:
+                ok, error = False, e
+            with self._lock:
+                if ok:
+                    self._failures.clear()
+                    self._set_state(self.CLOSED, "probe succeeded")
+                    return
+                self._failure_count += 1
+                self._last_error = str(error or "probe failed")
+                self._set_state(self.OPEN, "probe failed")
+
+    def status(self):
+        """State, recent transitions and fallback metrics, for health checks."""
+        with self._lock:
+            now = time.monotonic()
+            fallback = self._fallback_seconds
+            if self._state != self.CLOSED:
+                fallback += now - self._changed_at
+            return {
+                "name": self.name,
+                "state": self._state,
+                "state_seconds": round(now - self._changed_at, 3),
+                "recent_failures": len(self._failures),
+                "failures": self._failure_count,
+                "opened": self._opened_count,
+                "short_circuited": self._short_circuited,
+                "fallback_seconds": round(fallback, 3),
+                "last_error": self._last_error,
+                "transitions": list(self._transitions),
+            }
+
+def _probe_mongo():
+    """Ping MongoDB; installs a client if the process never connected."""
+    uri = os.environ.get("MONGO_URI")
+    if not uri:
+        return False
+    with _client_lock:
+        client = _client if _client_pid == os.getpid() else None
+    if client is not None:
+        client.admin.command("ping")
+        return True
+    client = MongoClient(uri, **_client_options())
+    try:
+        client.admin.command("ping")
+    except Exception:
+        client.close()
+        raise
+    with _client_lock:
+        if _client is not None and _client_pid == os.getpid():
+            client.close()
+        else:
+            _install_client(client)
+    return True
+
+_breaker = CircuitBreaker("mongo", _probe_mongo)
+
+def _mongo_failed(error):
+    """Report a failed MongoDB call; only connection-level errors count toward opening the breaker."""
+    if isinstance(error, ConnectionFailure):
+        _breaker.record_failure(error)
+
+def storage_status():
+    """Selected engine and MongoDB circuit breaker state/metrics."""
+    return {"engine": _engine(), "mongo_breaker": _breaker.status()}
+
 def ensure_collections(db):
     if db is None:
         return
     try:
-        # create useful indexes
-        db.admins.create_index("_id", unique=True)
-        db.staff.create_index("_id", unique=True)
+        # create useful indexes (admins/staff are keyed by the built-in _id index)
         db.items.create_index("id", unique=True)
         db.roles.create_index("name", unique=True)
         db.departments.create_index("name", unique=True)
+        db.reservations.create_index("id", unique=True)
+        db.reservations.create_index("status")
+        db.reservations.create_index("department")
+        db.reservations.create_index("item_id")
+        # item lookup by department + name, ignoring case (find_item_by_name)
+        db.items.create_index([("department", 1), ("name", 1)], name="department_name_ci", collation=NAME_COLLATION)
     except Exception as e:
         print("data_store: ensure_collections error:", e)
 
-# migrate_json_to_mongo unchanged semantically but shows errors if occur
-def migrate_json_to_mongo(db, json_path=DATA_JSON, overwrite=False):
-    if db is None:
-        print("migrate_json_to_mongo: no db provided")
-        return
-    if not json_path.exists():
-        print("migrate_json_to_mongo: json file not found:", json_path)
-        return
-    try:
-        with json_path.open("r", encoding="utf-8") as f:
-            data = json.load(f)
-    except Exception as e:
-        print("migrate_json_to_mongo: failed to read json:", e)
-        return
+# migrate_json_to_mongo streams data.json (plus its log) into MongoDB in
+# batches, so memory use doesn't grow with the file. Progress is checkpointed
+# in the meta collection ({"_id": "migration"}) after every batch; running it
+# again on the same unchanged file resumes after the last completed batch.
 
-    try:
-        # users: previously a single dict; split into admins/staff on 'type'
-        users = data.get("users", {})
-        admins_docs = []
-        staff_docs = []
-        if overwrite:
-            db.admins.delete_many({})
-            db.staff.delete_many({})
-        for email, info in users.items():
-            doc = info.copy()
-            doc["_id"] = email
-            if doc.get("type") == "admin":
-                admins_docs.append(doc)
-            else:
-                staff_docs.append(doc)
-        if admins_docs:
-            try:
-                db.admins.insert_many(admins_docs, ordered=False)
-            except Exception:
-                pass
-        if staff_docs:
-            try:
-                db.staff.insert_many(staff_docs, ordered=False)
-            except Exception:
-                pass
+class _JsonStream:
+    """Incremental reader for a JSON document, one value at a time from a text file."""
 
-        # roles
-        roles = [{"name": r} for r in data.get("roles", [])]
-        if overwrite:
-            db.roles.delete_many({})
-        if roles:
+    def __init__(self, f, chunk_size=1 << 16):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        data = self.f.read(self.chunk_size)
+        if not data:
+            return False
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Next non-whitespace character ("" at the end of the file)."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, chars):
+        c = self.peek()
+        if not c or c not in chars:
+            raise ValueError(f"expected one of {chars!r}, found {c or 'end of file'!r}")
+        self.pos += 1
+        return c
+
+    def value(self):
+        self.peek()
+        while True:
             try:
-                db.roles.insert_many(roles, ordered=False)
-            except Exception:
-                # insert_many may fail on duplicates; ignore
-                pass
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # most likely cut off at the end of the buffer
+                if self._fill():
+                    continue
+                raise
+            # a number cut off by the end of the buffer ("12" of "12.5e3") goes on in the next chunk
+            if (isinstance(value, (int, float)) and not isinstance(value, bool)
+                    and not self.buf[end:].strip("0123456789.eE+-") and self._fill()):
+                continue
+            self.pos = end
+            return value
 
-        # departments
-        depts = [{"name": d} for d in data.get("departments", [])]
-        if overwrite:
-            db.departments.delete_many({})
-        if depts:
+    def members(self, close):
+        """Yield (key, value) for the container just opened ("}") or (None, value) ("]")."""
+        if self.peek() == close:
+            self.pos += 1
+            return
+        while True:
+            if close == "}":
+                key = self.value()
+                self.expect(":")
+                yield key, self.value()
+            else:
+                yield None, self.value()
+            if self.expect("," + close) == close:
+                return
+
+def _iter_json_sections(f):
+    """Yield (section, members) for each top-level key of a JSON object; members is a lazy iterator."""
+    stream = _JsonStream(f)
+    stream.expect("{")
+    if stream.peek() == "}":
+        return
+    while True:
+        section = stream.value()
+        stream.expect(":")
+        opener = stream.peek()
+        if opener in ("[", "{"):
+            stream.pos += 1
+            members = stream.members("]" if opener == "[" else "}")
+        else:
+            members = iter([(None, stream.value())])
+        yield section, members
+        for _ in members:
+            pass  # skip whatever the caller didn't read
+        if stream.expect(",}") == "}":
+            return
+
+# data.json sections copied into collections ("users" is the legacy combined admins/staff dict)
+_MIGRATED_SECTIONS = ("users", "admins", "staff", "roles", "departments", "items", "reservations")
+
+def _migration_sections(f, log):
+    """data.json's sections as streamed, then any that only appear in the log."""
+    seen = set()
+    for section, members in _iter_json_sections(f):
+        seen.add(section)
+        yield section, members
+    for section in log:
+        if section not in seen:
+            yield section, iter(())
+
+def _migration_doc(section, key, value):
+    """(collection, filter, document) for one member of a data.json section, or None."""
+    if section == "users":
+        # legacy single users dict; split into admins/staff on 'type'
+        coll = "admins" if (value or {}).get("type") == "admin" else "staff"
+        return coll, {"_id": key}, dict(value, _id=key)
+    if section in ("admins", "staff"):
+        return section, {"_id": key}, dict(value, _id=key)
+    if section in ("roles", "departments"):
+        return section, {"name": value}, {"name": value}
+    if section in ("items", "reservations"):
+        # numbers are normalized; a malformed one (say "current_amount": "lots") becomes the field's default
+        doc = (Item if section == "items" else Reservation).of(value).to_doc()
+        if not isinstance(doc.get("id"), int):
+            return None
+        return section, {"id": doc["id"]}, doc
+    return None
+
+def _migration_key(section, key, value):
+    """Key a log record for `section` would use for this member."""
+    if section in ("roles", "departments"):
+        return value
+    if section in ("items", "reservations"):
+        return value.get("id") if isinstance(value, dict) else None
+    return key
+
+def _migration_members(section, members, log):
+    """The section's members with the log's later versions applied, deletions dropped and new records appended."""
+    pending = dict(log.get(section) or {})
+    for key, value in members:
+        k = _migration_key(section, key, value)
+        if k in pending:
+            value = pending.pop(k)
+            if value is None:
+                continue
+        yield key, value
+    for k, value in pending.items():
+        if value is None:
+            continue
+        yield (None, k) if section in ("roles", "departments") else (k, value)
+
+def _read_json_log(json_path):
+    """Log records of the JSON store at `json_path` as {section: {key: document or None}}."""
+    log = {}
+    wal = _wal_path(json_path)
+    if not wal.exists():
+        return log
+    with wal.open("r", encoding="utf-8") as f:
+        for line in f:
             try:
-                db.departments.insert_many(depts, ordered=False)
-            except Exception:
-                pass
+                rec = json.loads(line)
+                log.setdefault(rec["s"], {})[rec["k"]] = rec.get("d")
+            except (ValueError, KeyError, TypeError):
+                continue
+    return log
 
-        # items
-        items = data.get("items", [])
+def _write_migration_batch(db, batch, overwrite):
+    """Upsert a batch of (collection, filter, doc); returns the number of documents that failed."""
+    by_coll = {}
+    for coll, filter, doc in batch:
         if overwrite:
-            db.items.delete_many({})
-        if items:
-            db.items.insert_many(items, ordered=False)
+            op = ReplaceOne(filter, doc, upsert=True)
+        else:
+            # like the old insert: documents already in MongoDB win
+            op = UpdateOne(filter, {"$setOnInsert": doc}, upsert=True)
+        by_coll.setdefault(coll, []).append(op)
+    errors = 0
+    for coll, ops in by_coll.items():
+        try:
+            db[coll].bulk_write(ops, ordered=False)
+        except BulkWriteError as e:
+            errors += len(e.details.get("writeErrors", []))
+    return errors
+
+def _migration_progress(db, source, done, section, position, stats, batch, number, overwrite):
+    """Write one batch, then checkpoint `position` members of `section` as migrated."""
+    errors = _write_migration_batch(db, batch, overwrite)
+    stats["written"] += len(batch) - errors
+    stats["errors"] += errors
+    db.meta.update_one({"_id": "migration"}, {"$set": {"source": source, "finished": sorted(done),
+                                                       "section": section, "done": position}}, upsert=True)
+    print(f"migrate_json_to_mongo: {section} batch {number}: {len(batch) - errors} written, {errors} failed"
+          f" ({position} read)")
 
-        print("migrate_json_to_mongo: migration completed")
+def migrate_json_to_mongo(db, json_path=DATA_JSON, overwrite=False, batch_size=None, resume=True):
+    """
+    Copy a JSON store (data.json and data.json.log) into MongoDB, `batch_size`
+    documents (default MIGRATE_BATCH_SIZE or 1000) per unordered bulk upsert.
+    With overwrite the collections are emptied first and replaced; otherwise
+    documents already in MongoDB are kept. Returns {section: {"written", "errors",
+    "skipped"}} or None if the migration could not run to the end.
+    """
+    if db is None:
+        print("migrate_json_to_mongo: no db provided")
+        return None
+    json_path = Path(json_path)
+    if not json_path.exists():
+        print("migrate_json_to_mongo: json file not found:", json_path)
+        return None
+    batch_size = max(1, batch_size or _env_int("MIGRATE_BATCH_SIZE", 1000))
+    wal = _wal_path(json_path)
+    source = {
+        "path": str(json_path.resolve()),
+        "stamp": [[p.stat().st_size, p.stat().st_mtime_ns] if p.exists() else None for p in (json_path, wal)],
+        "overwrite": bool(overwrite),
+    }
+    checkpoint = db.meta.find_one({"_id": "migration"}) if resume else None
+    checkpoint_matches = bool(checkpoint) and checkpoint.get("source") == source
+    if checkpoint_matches:
+        done = set(checkpoint.get("finished", []))
+        current, skip = checkpoint.get("section"), checkpoint.get("done", 0)
+        print(f"migrate_json_to_mongo: resuming after {sorted(done)}" + (f" and {skip} {current}" if current else ""))
+    else:
+        done, current, skip = set(), None, 0
+    summary = {}
+    try:
+        if overwrite and not checkpoint_matches:
+            # once per migration, not again when resuming
+            for coll in ("admins", "staff", "roles", "departments", "items", "reservations"):
+                db[coll].delete_many({})
+            db.meta.replace_one({"_id": "migration"}, {"source": source, "finished": [], "section": None, "done": 0},
+                                upsert=True)
+        # the log is small (compacted at DATA_WAL_MAX_BYTES); the snapshot is streamed
+        log = _read_json_log(json_path)
+        with json_path.open("r", encoding="utf-8") as f:
+            for section, members in _migration_sections(f, log):
+                if section == "counters":
+                    # ids written here must not be handed out again by allocate_ids
+                    for name, seq in _migration_members(section, members, log):
+                        db.counters.update_one({"_id": name}, {"$max": {"seq": seq or 0}}, upsert=True)
+                    continue
+                if section in done or section not in _MIGRATED_SECTIONS:
+                    continue
+                offset = skip if section == current else 0
+                stats = summary[section] = {"written": 0, "errors": 0, "skipped": offset}
+                batch, position, batches, top_id = [], 0, 0, 0
+                for key, value in _migration_members(section, members, log):
+                    position += 1
+                    if section in _COUNTED_SECTIONS and isinstance(value, dict) and isinstance(value.get("id"), int):
+                        top_id = max(top_id, value["id"])
+                    if position <= offset:
+                        continue
+                    try:
+                        op = _migration_doc(section, key, value)
+                    except (ValueError, TypeError, AttributeError) as e:
+                        # one unusable record must not stop the run (a resume would hit it again)
+                        print(f"migrate_json_to_mongo: {section}: skipping record {key!r}: {e!r}")
+                        op = None
+                    if op is None:
+                        stats["errors"] += 1  # not a record, or no usable id
+                        continue
+                    batch.append(op)
+                    if len(batch) >= batch_size:
+                        batches += 1
+                        _migration_progress(db, source, done, section, position, stats, batch, batches, overwrite)
+                        batch = []
+                if batch:
+                    batches += 1
+                    _migration_progress(db, source, done, section, position, stats, batch, batches, overwrite)
+                if top_id:
+                    db.counters.update_one({"_id": section}, {"$max": {"seq": top_id}}, upsert=True)
+                done.add(section)
+                db.meta.update_one({"_id": "migration"}, {"$set": {"source": source, "finished": sorted(done),
+                                                                   "section": None, "done": 0}}, upsert=True)
+        db.meta.delete_one({"_id": "migration"})
+        _bump_version(db)
+        _invalidate_cache()
     except Exception as e:
-        print("migrate_json_to_mongo: migration failed:", e)
+        print("migrate_json_to_mongo: migration stopped, run it again to resume:", e)
         traceback.print_exc()
+        return None
+    for section, stats in summary.items():
+        print(f"migrate_json_to_mongo: {section}: {stats['written']} written, {stats['errors']} failed"
+              + (f", {stats['skipped']} already migrated" if stats["skipped"] else ""))
+    print("migrate_json_to_mongo: migration completed")
+    return summary
 
 # convenience helpers
 def find_admin(db, email):
@@ -177,80 +660,994 @@ def list_depleted_items(db):
     return list(db.items.find({"current_amount": 0})) if db is not None else []
 
 # JSON fallback load/save helpers
-def _load_from_json():
-    if not DATA_JSON.exists():
-        # return default structure with separate admins/staff
-        return {"admins": {}, "staff": {}, "roles": [], "departments": [], "items": []}
-    with DATA_JSON.open("r", encoding="utf-8") as f:
-        return json.load(f)
+class _JsonStoreLock:
+    """
+    Serializes read-modify-write cycles on data.json: an RLock between threads
+    plus an advisory lock on data.json.lock between processes (API workers, a
+    CLI session). Re-entrant; the file lock is taken by the outermost `with`.
+    Readers never take it: they rely on writers only ever renaming complete
+    files into place or appending to the log.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._fh = None
+
+    def __enter__(self):
+        self._lock.acquire()
+        if self._depth == 0:
+            try:
+                self._fh = _lock_file(DATA_JSON.with_name(DATA_JSON.name + ".lock"))
+            except Exception:
+                self._lock.release()
+                raise
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc):
+        self._depth -= 1
+        if self._depth == 0:
+            fh, self._fh = self._fh, None
+            _unlock_file(fh)
+        self._lock.release()
+        return False
+
+def _lock_file(path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fh = open(path, "a+b")
+    try:
+        if fcntl is not None:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+        else:
+            fh.seek(0)
+            while True:
+                try:
+                    # LK_LOCK gives up after ~10 seconds; keep waiting like flock does
+                    msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+    except Exception:
+        fh.close()
+        raise
+    return fh
+
+def _unlock_file(fh):
+    try:
+        if fcntl is not None:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+        else:
+            fh.seek(0)
+            msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+    finally:
+        fh.close()
+
+_json_lock = _JsonStoreLock()
+
+def _env_float(name, default):
+    try:
+        return float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+def _cache_max_age():
+    # upper bound (seconds) on how long a cached dataset is trusted; 0 disables caching
+    return _env_float("DATA_CACHE_MAX_AGE", 60)
+
+def _copy_data(data):
+    """Copy the dataset two levels deep (sections and their documents) so callers may mutate it."""
+    out = {}
+    for section, value in data.items():
+        if isinstance(value, dict):
+            out[section] = {k: dict(v) if isinstance(v, dict) else v for k, v in value.items()}
+        elif isinstance(value, list):
+            out[section] = [dict(v) if isinstance(v, dict) else v for v in value]
+        else:
+            out[section] = value
+    return out
+
+# The JSON store is data.json (a snapshot) plus data.json.log, an append-only
+# log of compact {"s": section, "k": key, "d": document} records ("d" omitted
+# for deletes). Each mutation costs one fsync'd append; loading replays the
+# log over the snapshot, and the log is folded back into data.json once it
+# grows past DATA_WAL_MAX_RECORDS records or DATA_WAL_MAX_BYTES bytes.
+# Records hold whole documents, so replaying one twice is harmless.
+# Writers hold _json_lock (also across processes) and data.json is only ever
+# replaced by renaming a complete temp file over it, so a crash never leaves a
+# half-written snapshot. Readers take no lock; they re-read if either file
+# changed while they were reading.
+
+def _wal_path(json_path=None):
+    json_path = json_path or DATA_JSON
+    return json_path.with_name(json_path.name + ".log")
+
+def _empty_data():
+    # default structure with separate admins/staff
+    return {"admins": {}, "staff": {}, "roles": [], "departments": [], "items": [], "reservations": []}
+
+def _read_json_store(json_path):
+    """Read a snapshot and replay its log. Returns (data, log record count, log ends mid-record)."""
+    data = _empty_data()
+    if json_path.exists():
+        with json_path.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+    wal = _wal_path(json_path)
+    if not wal.exists():
+        return data, 0, False
+    with wal.open("r", encoding="utf-8") as f:
+        raw = f.read()
+    torn = bool(raw) and not raw.endswith("\n")
+    touched = {}
+    count = 0
+    for line in raw.splitlines():
+        if not line.strip():
+            continue
+        try:
+            rec = json.loads(line)
+            section = rec["s"]
+        except (ValueError, KeyError, TypeError):
+            # a record cut short by a crash; everything before it is intact
+            continue
+        count += 1
+        if section == "counters":
+            # id counters (allocate_ids) are plain numbers, not documents
+            data.setdefault("counters", {})[rec["k"]] = rec["d"]
+            continue
+        if section not in touched:
+            touched[section] = _section_documents(section, data.get(section))
+        if "d" in rec:
+            touched[section][rec["k"]] = rec["d"]
+        else:
+            touched[section].pop(rec["k"], None)
+    data.update(_data_from_documents(touched))
+    return data, count, torn
+
+# parsed store keyed by the (inode, mtime, size) of data.json and its log
+_json_cache = {"stamp": None, "data": None, "loaded_at": 0.0, "log_records": 0, "torn": False}
+
+def _json_stamp():
+    stamp = []
+    for path in (DATA_JSON, _wal_path()):
+        try:
+            st = path.stat()
+            stamp.append((st.st_ino, st.st_mtime_ns, st.st_size))
+        except FileNotFoundError:
+            stamp.append(None)
+    return tuple(stamp)
+
+def _json_view():
+    """
+    Return the cached JSON dataset, re-reading it only when data.json or its
+    log changed or the cache is older than DATA_CACHE_MAX_AGE. Do not mutate.
+    """
+    stamp = _json_stamp()
+    if stamp == (None, None):
+        return _empty_data()
+    with _snapshot_lock:
+        cached = _json_cache["data"]
+        if (cached is not None and _json_cache["stamp"] == stamp
+                and time.monotonic() - _json_cache["loaded_at"] < _cache_max_age()):
+            return cached
+    for _ in range(10):
+        try:
+            data, count, torn = _read_json_store(DATA_JSON)
+        except (FileNotFoundError, ValueError):
+            # raced a writer swapping the files; the stamp check below retries
+            data = None
+        after = _json_stamp()
+        if after == stamp and data is not None:
+            break
+        stamp = after
+    else:
+        # files kept changing under us; one read inside the writers' lock settles it
+        with _json_lock:
+            stamp = _json_stamp()
+            data, count, torn = _read_json_store(DATA_JSON)
+    with _snapshot_lock:
+        _json_cache.update(stamp=stamp, data=data, loaded_at=time.monotonic(), log_records=count, torn=torn)
+    return data
+
+def _load_from_json(sections=None, projection=None):
+    view = _json_view()
+    data = _select_sections(view, sections, projection)
+    return _dataset(data, None if projection else {s: _section_documents(s, view.get(s)) for s in data})
+
+def item_name_key(department, name):
+    """Key under which items are matched by name: same department, name ignoring case (casefolded)."""
+    return department, (name or "").casefold()
+
+# (department, lowercased name) -> item for the current JSON view; rebuilt
+# when a write replaces the view's items list
+_json_name_index = {"items": None, "index": {}}
+
+def _json_item_by_name(department, name):
+    items = _json_view().get("items") or []
+    with _snapshot_lock:
+        if _json_name_index["items"] is not items:
+            index = {}
+            for item in items:
+                # the first item wins, like a scan of the list would
+                index.setdefault(item_name_key(item.get("department"), item.get("name")), item)
+            _json_name_index.update(items=items, index=index)
+        item = _json_name_index["index"].get(item_name_key(department, name))
+    return dict(item) if item is not None else None
+
+def _replace_file(path, write):
+    """Atomically replace `path` with what write(f) puts in a temp file next to it."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        for attempt in range(5):
+            try:
+                os.replace(tmp, path)
+                break
+            except PermissionError:
+                # Windows refuses while a reader has the target open; it's brief
+                if attempt == 4:
+                    raise
+                time.sleep(0.05)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    if fcntl is not None:
+        # make the rename itself durable
+        dir_fd = os.open(path.parent, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+def _compact_json(data):
+    """Write the full dataset to data.json and start an empty log."""
+    with _json_lock:
+        _replace_file(DATA_JSON, lambda f: json.dump(data, f, indent=4))
+        # a crash before this line leaves the old log over the new snapshot, which replays harmlessly
+        _replace_file(_wal_path(), lambda f: None)
+    with _snapshot_lock:
+        _json_cache.update(stamp=_json_stamp(), data=data, loaded_at=time.monotonic(), log_records=0, torn=False)
+
+def _append_json_records(records, data):
+    """Append `records` to the log (one fsync) and make `data` the cached state. Call with _json_lock held."""
+    with _snapshot_lock:
+        count = _json_cache["log_records"] + len(records)
+        torn = _json_cache["torn"]
+    lines = "".join(json.dumps(r, separators=(",", ":")) + "\n" for r in records)
+    if torn:
+        # never glue a new record onto a half-written one
+        lines = "\n" + lines
+    wal = _wal_path()
+    with wal.open("a", encoding="utf-8") as f:
+        f.write(lines)
+        f.flush()
+        os.fsync(f.fileno())
+    if count >= _env_int("DATA_WAL_MAX_RECORDS", 1000) or wal.stat().st_size >= _env_int("DATA_WAL_MAX_BYTES", 1 << 20):
+        _compact_json(data)
+        return
+    with _snapshot_lock:
+        _json_cache.update(stamp=_json_stamp(), data=data, loaded_at=time.monotonic(), log_records=count, torn=False)
 
 def _save_to_json(data):
-    DATA_JSON.parent.mkdir(parents=True, exist_ok=True)
-    with DATA_JSON.open("w", encoding="utf-8") as f:
-        json.dump(data, f, indent=4)
+    # like the other engines: only the difference to data's base is written,
+    # applied to the stored state (which may hold records added since)
+    saved = {}
+    records = []
+    with _json_lock:
+        merged = _json_view()
+        for section in _SECTION_KEYS:
+            if section not in data:
+                continue
+            current = _section_documents(section, data[section])
+            deleted, changed, expected = _section_changes(section, current, _section_base(data, section))
+            if expected:
+                stored = _section_documents(section, merged.get(section))
+                for k, v in expected.items():
+                    if not _version_matches(stored.get(k), v):
+                        raise VersionConflict(section, k)
+            changes = [(k, None) for k in deleted] + list(changed.items())
+            if changes:
+                merged = _apply_json_records(merged, section, changes)
+                records.extend({"s": section, "k": k} for k in deleted)
+                records.extend({"s": section, "k": k, "d": doc} for k, doc in changed.items())
+            saved[section] = (current, deleted, changed)
+        if not DATA_JSON.exists():
+            _compact_json(merged)
+        elif records:
+            _append_json_records(records, merged)
+    # the Mongo snapshot cache doesn't hold JSON data
+    _after_save(data, saved, cached=False)
+
+def _apply_json_records(data, section, changes):
+    """Copy-on-write update of one section of a JSON view with (key, doc) changes (doc=None deletes)."""
+    value = data.get(section)
+    if section in ("admins", "staff"):
+        value = dict(value or {})
+        for key, doc in changes:
+            if doc is None:
+                value.pop(key, None)
+            else:
+                value[key] = {f: v for f, v in doc.items() if f != "_id"}
+    elif section in ("roles", "departments"):
+        for key, doc in changes:
+            value = [n for n in value or [] if n != key]
+            if doc is not None:
+                value.append(key)
+    else:
+        field = _SECTION_KEYS[section]
+        value = list(value or [])
+        positions = {}
+        for i, r in enumerate(value):
+            positions.setdefault(r.get(field), i)
+        removed = set()
+        for key, doc in changes:
+            idx = positions.get(key)
+            if doc is None:
+                if idx is not None:
+                    removed.add(idx)
+                    del positions[key]
+            elif idx is None:
+                positions[key] = len(value)
+                value.append(dict(doc))
+            else:
+                value[idx] = dict(doc)
+        if removed:
+            value = [r for i, r in enumerate(value) if i not in removed]
+    out = dict(data)
+    out[section] = value
+    return out
+
+def _json_write(section, key, doc=None):
+    """Persist one document change (doc=None deletes) as a single log append. Call with _json_lock held."""
+    _json_write_many(section, [(key, doc)])
+
+def _json_write_many(section, changes):
+    """Persist (key, doc) changes to one section with a single log append. Call with _json_lock held."""
+    data = _apply_json_records(_json_view(), section, changes)
+    records = []
+    for key, doc in changes:
+        record = {"s": section, "k": key}
+        if doc is not None:
+            record["d"] = doc
+        records.append(record)
+    if not DATA_JSON.exists():
+        _compact_json(data)
+    else:
+        _append_json_records(records, data)
+
+# {section: (records list of the current JSON view, {key: record})}; rebuilt
+# when a write replaces the view's list
+_json_key_index = {}
+
+def _json_records_by_key(section):
+    records = _json_view().get(section) or []
+    with _snapshot_lock:
+        cached = _json_key_index.get(section)
+        if cached is not None and cached[0] is records:
+            return cached[1]
+    field = _SECTION_KEYS[section]
+    index = {}
+    for r in records:
+        index.setdefault(r.get(field), r)
+    with _snapshot_lock:
+        _json_key_index[section] = (records, index)
+    return index
+
+# dataset section -> field that identifies a document in its Mongo collection
+_SECTION_KEYS = {
+    "admins": "_id",
+    "staff": "_id",
+    "roles": "name",
+    "departments": "name",
+    "items": "id",
+    "reservations": "id",
+}
+# sections holding documents (projections apply to these; roles/departments are name lists)
+_DOCUMENT_SECTIONS = ("admins", "staff", "items", "reservations")
+
+# Last state of each section known to be in MongoDB (from load_data, kept up
+# to date by this process's writes), as {section: {key: document}}. load_data
+# serves it as a read-through cache while its version matches the one stored
+# in the meta collection. save_data doesn't diff against it (other threads
+# write to it too) but against the base of the caller's Dataset.
+_snapshot = {}
+_snapshot_lock = threading.Lock()
+_cache_state = {"version": None, "loaded_at": 0.0}
+
+def _read_version(db):
+    doc = db.meta.find_one({"_id": "dataset"}, {"version": 1})
+    return (doc or {}).get("version", 0)
+
+def _bump_version(db):
+    """Record a write in the meta document so other workers drop their caches."""
+    doc = db.meta.find_one_and_update(
+        {"_id": "dataset"}, {"$inc": {"version": 1}},
+        upsert=True, return_document=ReturnDocument.AFTER,
+    )
+    return doc.get("version", 0)
+
+def _note_version(version):
+    """Adopt the version produced by our own write, or drop the cache if others wrote too."""
+    with _snapshot_lock:
+        # our cache stays valid only if nobody else wrote since we loaded it
+        if _cache_state["version"] is not None and version == _cache_state["version"] + 1:
+            _cache_state["version"] = version
+        else:
+            _cache_state["version"] = None
+
+def _store_snapshot(loaded, version):
+    """Cache freshly read sections; sections cached at another version are dropped."""
+    with _snapshot_lock:
+        if _cache_state["version"] != version:
+            _snapshot.clear()
+        # copies: writes update the cache in place, `loaded` becomes a Dataset's base
+        _snapshot.update((section, dict(docs)) for section, docs in loaded.items())
+        _cache_state.update(version=version, loaded_at=time.monotonic())
+
+def _invalidate_cache():
+    with _snapshot_lock:
+        _snapshot.clear()
+        _cache_state["version"] = None
+
+def _cache_candidate(sections):
+    """Version of the cache if it holds all `sections` and is within its max age, else None."""
+    with _snapshot_lock:
+        version = _cache_state["version"]
+        fresh = time.monotonic() - _cache_state["loaded_at"] < _cache_max_age()
+        complete = all(section in _snapshot for section in sections)
+    return version if fresh and complete else None
+
+def _cache_confirm(version, sections):
+    """Cached documents of `sections` once the stored version was read back as `version`."""
+    with _snapshot_lock:
+        if _cache_state["version"] != version:
+            return None
+        return {section: dict(_snapshot[section]) for section in sections}
+
+def _cached_snapshot(read_version, sections):
+    """Return the cached documents of `sections` if they are still current (per read_version()), else None."""
+    version = _cache_candidate(sections)
+    if version is None or read_version() != version:
+        return None
+    return _cache_confirm(version, sections)
+
+def _section_documents(section, value):
+    """Convert one section of the in-app data dict into {key: mongo document}."""
+    docs = {}
+    if section in ("admins", "staff"):
+        for email, info in (value or {}).items():
+            doc = dict(info)
+            doc["_id"] = email
+            docs[email] = doc
+    elif section in ("roles", "departments"):
+        for name in value or []:
+            docs[name] = {"name": name}
+    else:
+        key = _SECTION_KEYS[section]
+        for it in value or []:
+            doc = dict(it)
+            doc.pop("_id", None)
+            docs[doc.get(key)] = doc
+    return docs
+
+def _remember_changes(section, deleted, changed):
+    """Apply a save's deleted keys and {key: document} changes to the cached snapshot."""
+    with _snapshot_lock:
+        docs = _snapshot.get(section)
+        if docs is not None:
+            for k in deleted:
+                docs.pop(k, None)
+            docs.update(changed)
+
+def _section_diff(current, previous):
+    """Return (keys removed, {key: document} added or changed) between two {key: document} maps."""
+    deleted = [k for k in previous if k not in current]
+    changed = {k: doc for k, doc in current.items() if k is not None and previous.get(k) != doc}
+    return deleted, changed
+
+# Optimistic concurrency: items, staff and reservations documents carry a
+# "_v" version, incremented by every write. A write based on an earlier read
+# only succeeds if the stored "_v" still equals the one that was read;
+# otherwise VersionConflict is raised and the caller reloads (and retries or
+# reports the conflict). Documents written before versioning count as _v 0.
+_VERSIONED_SECTIONS = ("items", "staff", "reservations")
+# how often callers re-read and re-apply an update that lost a version race
+CONFLICT_RETRIES = 3
+
+class VersionConflict(Exception):
+    """A conditional write found a newer version than the one it was based on."""
+
+    def __init__(self, section, key=None):
+        self.section = section
+        self.key = key
+        what = f"{section} {key!r}" if key is not None else section
+        super().__init__(f"{what} was changed by someone else; reload and try again")
+
+def _version_of(doc):
+    return (doc or {}).get("_v") or 0
+
+def _version_filter(version):
+    # "_v": None also matches documents that have no _v yet
+    return {"_v": version} if version else {"_v": {"$in": [None, 0]}}
+
+def _expected_version(doc, before):
+    # records rebuilt from scratch by older code lose "_v"; they are based on the last known state
+    return doc["_v"] if "_v" in doc else _version_of(before)
+
+def _adopt_versions(section, value, docs):
+    """Copy the "_v" written for each document back onto the caller's records."""
+    if section not in _VERSIONED_SECTIONS or not value:
+        return
+    key = _SECTION_KEYS[section]
+    pairs = value.items() if isinstance(value, dict) else ((r.get(key), r) for r in value)
+    for k, record in pairs:
+        doc = docs.get(k)
+        if doc is not None and "_v" in doc:
+            record["_v"] = doc["_v"]
+
+def _section_base(data, section):
+    """{key: document} of `section` as `data` was loaded, or None if it wasn't (see Dataset)."""
+    return getattr(data, "base", {}).get(section)
+
+def _section_changes(section, current, base):
+    """
+    Diff `current` against `base` (the section as the caller loaded it, None
+    if it wasn't) and stamp the new "_v" on changed versioned documents.
+    Returns (deleted, changed, expected): only keys of `base` are deleted (so
+    documents added by others since are kept), `changed` maps keys to added
+    or changed documents and, for versioned sections, `expected` maps every
+    deleted or changed key to the "_v" the stored document must still have,
+    or None where it must not exist yet. Without a base nothing is deleted,
+    every document counts as changed and is based on its own "_v".
+    """
+    if base is None:
+        deleted, changed = [], {k: doc for k, doc in current.items() if k is not None}
+    else:
+        deleted, changed = _section_diff(current, base)
+    expected = {}
+    if section in _VERSIONED_SECTIONS:
+        for k in deleted:
+            expected[k] = _version_of(base[k])
+        for k, doc in changed.items():
+            before = base.get(k) if base is not None else (doc if "_v" in doc else None)
+            expected[k] = None if before is None else _expected_version(doc, before)
+            doc["_v"] = (expected[k] or 0) + 1
+    return deleted, changed, expected
+
+def _version_matches(stored, version):
+    """Whether a stored document (None: missing) is at the expected "_v" (None: must be missing)."""
+    if version is None:
+        return stored is None
+    return stored is not None and _version_of(stored) == version
+
+def _section_ops(section, deleted, changed, expected):
+    """
+    Build the bulk_write operations for a section's changes (see
+    _section_changes). Versioned documents are replaced or deleted only if
+    their "_v" is still the expected one and added only if they don't exist.
+    Returns (ops, conditional): `conditional` is the number of replacements,
+    deletions and insertions that must take effect (see _check_bulk).
+    """
+    key = _SECTION_KEYS[section]
+    if section not in _VERSIONED_SECTIONS:
+        ops = [DeleteOne({key: k}) for k in deleted]
+        ops.extend(ReplaceOne({key: k}, doc, upsert=True) for k, doc in changed.items())
+        return ops, (0, 0, 0)
+    ops = [DeleteOne(dict({key: k}, **_version_filter(expected[k]))) for k in deleted]
+    replaced = inserted = 0
+    for k, doc in changed.items():
+        if expected[k] is None:
+            # inserted only if still missing: $setOnInsert leaves a document added meanwhile alone
+            ops.append(UpdateOne({key: k}, {"$setOnInsert": {f: v for f, v in doc.items() if f != key}}, upsert=True))
+            inserted += 1
+        else:
+            ops.append(ReplaceOne(dict({key: k}, **_version_filter(expected[k])), doc))
+            replaced += 1
+    return ops, (replaced, len(deleted), inserted)
+
+def _check_bulk(section, result, conditional):
+    """Raise VersionConflict if a conditional replacement, deletion or insertion didn't take effect."""
+    replaced, deleted, inserted = conditional
+    if result.matched_count < replaced or result.deleted_count < deleted or result.upserted_count < inserted:
+        raise VersionConflict(section)
+
+def _version_query(section, expected):
+    """find() filter and projection reading the stored "_v" of the `expected` keys."""
+    key = _SECTION_KEYS[section]
+    return {key: {"$in": list(expected)}}, {key: 1, "_v": 1}
+
+def _check_versions(section, expected, docs):
+    """Raise VersionConflict unless every expected key of `docs` (stored documents) is at its expected "_v" (see _version_matches)."""
+    key = _SECTION_KEYS[section]
+    stored = {doc.get(key): doc for doc in docs}
+    for k, version in expected.items():
+        if not _version_matches(stored.get(k), version):
+            raise VersionConflict(section, k)
+
+def _save_plan(data):
+    """
+    Diff each section of `data` against its base. Returns (plan, saved):
+    plan lists (section, ops, conditional, expected) for the bulk writes (see
+    _section_ops), saved maps each section to (current, deleted, changed)
+    for _after_save().
+    """
+    plan, saved = [], {}
+    for section in _SECTION_KEYS:
+        if section not in data:
+            continue
+        current = _section_documents(section, data[section])
+        deleted, changed, expected = _section_changes(section, current, _section_base(data, section))
+        plan.append((section,) + _section_ops(section, deleted, changed, expected) + (expected,))
+        saved[section] = (current, deleted, changed)
+    return plan, saved
+
+def _after_save(data, saved, cached=True):
+    """
+    Once a save went through: apply it to the cached snapshot (if `cached`),
+    copy the new "_v" onto the records of `data` and make the saved
+    documents its base.
+    """
+    for section, (current, deleted, changed) in saved.items():
+        if cached:
+            _remember_changes(section, deleted, changed)
+        _adopt_versions(section, data[section], changed)
+        if isinstance(data, Dataset):
+            data.base[section] = current
+
+def _supports_transactions(client):
+    try:
+        return client.topology_description.topology_type_name in ("ReplicaSetWithPrimary", "Sharded")
+    except Exception:
+        return False
+
+@contextmanager
+def _mongo_transaction(client):
+    """
+    Yield the bulk_write() keyword arguments that put a save's writes in one
+    transaction, where the deployment has transactions (replica set or
+    sharded cluster); on a standalone server they are plain writes ({}).
+    A transaction that collides with another writer becomes a VersionConflict.
+    """
+    if not _supports_transactions(client):
+        yield {}
+        return
+    with client.start_session() as session:
+        try:
+            with session.start_transaction():
+                yield {"session": session}
+        except PyMongoError as e:
+            if e.has_error_label("TransientTransactionError"):
+                raise VersionConflict("data") from e
+            raise
+
+def _section_projection(section, projection):
+    """Mongo projection used to fetch `section` (None: whole documents)."""
+    key = _SECTION_KEYS[section]
+    if not projection or section not in _DOCUMENT_SECTIONS:
+        return None
+    projection = _mongo_projection(projection, keep_id=key == "_id")
+    if any(v for f, v in projection.items() if f != "_id"):
+        # inclusion projection: the key is needed to index the result
+        projection[key] = 1
+    return projection
+
+def _index_document(docs, section, doc):
+    """Add a fetched document to {key: document}; documents without a key are skipped."""
+    key = _SECTION_KEYS[section]
+    if key != "_id":
+        doc.pop("_id", None)
+    k = doc.get(key)
+    if k is not None and k != "":
+        docs[k] = doc
+
+def _fetch_section(db, section, projection=None):
+    """Read a whole collection into {key: document}, optionally with only some fields."""
+    docs = {}
+    for doc in db[section].find({}, _section_projection(section, projection)):
+        _index_document(docs, section, doc)
+    return docs
+
+def _data_from_documents(loaded, projection=None):
+    """Build the in-app data dict from {section: {key: document}}."""
+    data = {}
+    for section, docs in loaded.items():
+        if section in ("admins", "staff"):
+            data[section] = {k: _project({f: v for f, v in d.items() if f != "_id"}, projection) for k, d in docs.items()}
+        elif section in ("roles", "departments"):
+            data[section] = list(docs)
+        else:
+            data[section] = [_project(d, projection) for d in docs.values()]
+    return data
 
-def load_data():
+def _with_defaults(data):
+    # ensure defaults (only for the sections that were loaded)
+    if "roles" in data and "Head" not in data["roles"]:
+        data["roles"].append("Head")
+    if "departments" in data and "Office" not in data["departments"]:
+        data["departments"].append("Office")
+    return data
+
+def _select_sections(data, sections, projection):
+    """Copy the requested sections (all when sections is None) out of a JSON view."""
+    if sections is None and not projection:
+        return _copy_data({s: v for s, v in data.items() if s != "counters"})
+    out = {}
+    for section in sections or [s for s in data if s != "counters"]:
+        value = data.get(section)
+        if value is None:
+            value = {} if section in ("admins", "staff") else []
+        if section in _DOCUMENT_SECTIONS:
+            if isinstance(value, dict):
+                out[section] = {k: _project(v, projection) for k, v in value.items()}
+            else:
+                out[section] = [_project(v, projection) for v in value]
+        else:
+            out[section] = _copy_data({section: value})[section]
+    return out
+
+# The dataset returned by load_data(): a plain dict of sections whose item and
+# reservation lists keep dict indexes (by id, and grouped by department or
+# status) in step with list mutations, so lookups don't rescan the list.
+# Changing an indexed field of a record in place must go through
+# Dataset.update_item()/update_reservation() (or IndexedRecords.update()).
+
+class IndexedRecords(list):
+    """A list of records indexed by `key` and grouped by the fields in `groups`."""
+
+    def __init__(self, records=(), key="id", groups=()):
+        super().__init__()
+        self.key = key
+        self.groups = tuple(groups)
+        self._reindex()
+        self.extend(records)
+
+    def _reindex(self):
+        self.by_key = {}
+        self.grouped = {field: {} for field in self.groups}
+        self._duplicates = False
+        for record in self:
+            self._index(record)
+
+    def _index(self, record):
+        k = record.get(self.key)
+        if k in self.by_key:
+            # first record wins, like a scan of the list would
+            self._duplicates = True
+        else:
+            self.by_key[k] = record
+        for field in self.groups:
+            self.grouped[field].setdefault(record.get(field), []).append(record)
+
+    def _unindex(self, record):
+        k = record.get(self.key)
+        if self.by_key.get(k) is record:
+            del self.by_key[k]
+            if self._duplicates:
+                other = next((r for r in self if r is not record and r.get(self.key) == k), None)
+                if other is not None:
+                    self.by_key[k] = other
+        for field in self.groups:
+            group = self.grouped[field].get(record.get(field))
+            # by identity: another record may compare equal
+            idx = next((i for i, r in enumerate(group or ()) if r is record), None)
+            if idx is not None:
+                del group[idx]
+                if not group:
+                    del self.grouped[field][record.get(field)]
+
+    def get(self, key, default=None):
+        """Record with `key` (first one if duplicated), or `default`."""
+        return self.by_key.get(key, default)
+
+    def group(self, field, value):
+        """Records whose `field` equals `value` (updated records move to the end)."""
+        return list(self.grouped[field].get(value, ()))
+
+    def update(self, record, fields):
+        """Change fields of a record held by this list, keeping the indexes right."""
+        self._unindex(record)
+        record.update(fields)
+        self._index(record)
+        return record
+
+    # list mutations keep the indexes in step
+    def append(self, record):
+        super().append(record)
+        self._index(record)
+
+    def extend(self, records):
+        for record in records:
+            self.append(record)
+
+    def __iadd__(self, records):
+        self.extend(records)
+        return self
+
+    def insert(self, index, record):
+        super().insert(index, record)
+        self._reindex()
+
+    def remove(self, record):
+        # list.remove drops the first *equal* record, which need not be `record`
+        # itself: unindex the one actually removed
+        self.pop(self.index(record))
+
+    def pop(self, index=-1):
+        record = super().pop(index)
+        self._unindex(record)
+        return record
+
+    def clear(self):
+        super().clear()
+        self._reindex()
+
+    def __setitem__(self, index, value):
+        super().__setitem__(index, value)
+        self._reindex()
+
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        self._reindex()
+
+    def sort(self, *args, **kwargs):
+        super().sort(*args, **kwargs)
+        self._reindex()
+
+    def reverse(self):
+        super().reverse()
+        self._reindex()
+
+    def __reduce_ex__(self, protocol):
+        # copy/pickle as a fresh IndexedRecords rather than replaying list items over copied indexes
+        return (IndexedRecords, (list(self), self.key, self.groups))
+
+# indexed sections of a Dataset and the fields their records are grouped by
+_INDEXED_SECTIONS = {
+    "items": ("department",),
+    "reservations": ("status", "department", "item_id"),
+}
+
+class Dataset(dict):
+    """
+    dict of sections as returned by load_data(); "items" and "reservations"
+    are IndexedRecords. Sections assigned later are wrapped as well.
+    `base` maps each loaded section to the {key: document} it was loaded with
+    (updated by every save): save_data() writes only the difference to it.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+        self.base = {}
+        self.update(*args, **kwargs)
+
+    @staticmethod
+    def _wrap(section, value):
+        if section in _INDEXED_SECTIONS and isinstance(value, list) and not isinstance(value, IndexedRecords):
+            return IndexedRecords(value, key=_SECTION_KEYS[section], groups=_INDEXED_SECTIONS[section])
+        return value
+
+    def __setitem__(self, section, value):
+        super().__setitem__(section, self._wrap(section, value))
+
+    def setdefault(self, section, default=None):
+        if section not in self:
+            self[section] = default
+        return self[section]
+
+    def update(self, *args, **kwargs):
+        for section, value in dict(*args, **kwargs).items():
+            self[section] = value
+
+    def copy(self):
+        out = Dataset(self)
+        out.base = dict(self.base)
+        return out
+
+    def _records(self, section):
+        value = self.get(section)
+        if isinstance(value, IndexedRecords):
+            return value
+        # section not loaded: empty indexes, without adding the section (save_data would write it)
+        return self._wrap(section, list(value or []))
+
+    @property
+    def items_by_id(self):
+        return self._records("items").by_key
+
+    @property
+    def items_by_department(self):
+        return self._records("items").grouped["department"]
+
+    @property
+    def reservations_by_id(self):
+        return self._records("reservations").by_key
+
+    @property
+    def reservations_by_status(self):
+        return self._records("reservations").grouped["status"]
+
+    def department_items(self, department):
+        return self._records("items").group("department", department)
+
+    def reservations_with_status(self, status):
+        return self._records("reservations").group("status", status)
+
+    def update_item(self, item, fields):
+        return self._records("items").update(item, fields)
+
+    def update_reservation(self, reservation, fields):
+        return self._records("reservations").update(reservation, fields)
+
+def load_data(sections=None, projection=None):
+    """
+    Load the dataset as a Dataset. `sections` (e.g. ("items",)) limits it to
+    those sections and only they are fetched; `projection` (a list of field
+    names or a Mongo-style projection dict) limits the fields of admins,
+    staff, items and reservations documents. Data loaded with a projection is
+    for reading only: saving it would drop the fields that were left out.
+    """
+    return _load_data(sections, projection)
+
+def _dataset(data, loaded):
+    """A Dataset of `data` whose base is `loaded` ({section: {key: document}}; None for projected data)."""
+    dataset = Dataset(data)
+    if loaded is not None:
+        dataset.base = loaded
+    return dataset
+
+def _load_data(sections, projection):
+    if sections is not None:
+        sections = tuple(sections)
+    wanted = sections or tuple(_SECTION_KEYS)
+    if _engine() == "sqlite":
+        return _with_defaults(_load_from_sqlite(wanted, projection))
     client = get_mongo_client()
     if client is None:
-        return _load_from_json()
+        return _load_from_json(sections, projection)
 
     try:
         db = get_db(client)
     except Exception as e:
         print("load_data: cannot get db, falling back to JSON:", e)
-        return _load_from_json()
+        return _load_from_json(sections, projection)
 
     try:
-        data = {"admins": {}, "staff": {}, "roles": [], "departments": [], "items": []}
-
-        # admins
-        if "admins" in db.list_collection_names():
-            for u in db.admins.find({}):
-                email = u.get("_id")
-                if not email:
-                    continue
-                u_copy = u.copy()
-                u_copy.pop("_id", None)
-                data["admins"][email] = u_copy
-
-        # staff
-        if "staff" in db.list_collection_names():
-            for u in db.staff.find({}):
-                email = u.get("_id")
-                if not email:
-                    continue
-                u_copy = u.copy()
-                u_copy.pop("_id", None)
-                data["staff"][email] = u_copy
-
-        data["roles"] = [r.get("name") for r in db.roles.find({})] if "roles" in db.list_collection_names() else []
-        data["departments"] = [d.get("name") for d in db.departments.find({})] if "departments" in db.list_collection_names() else []
-
-        if "items" in db.list_collection_names():
-            items = []
-            for it in db.items.find({}):
-                it_copy = it.copy()
-                it_copy.pop("_id", None)
-                items.append(it_copy)
-            data["items"] = items
-        else:
-            data["items"] = []
-
-        # ensure defaults
-        if "Head" not in data.get("roles", []):
-            data.setdefault("roles", []).append("Head")
-        if "Office" not in data.get("departments", []):
-            data.setdefault("departments", []).append("Office")
-        if "items" not in data:
-            data["items"] = []
-
-        return data
+        loaded = _cached_snapshot(lambda: _read_version(db), wanted)
+        if loaded is None:
+            # read the version first so a write racing with this load makes it stale
+            version = _read_version(db)
+            existing = set(db.list_collection_names())
+            loaded = {}
+            for section in wanted:
+                loaded[section] = _fetch_section(db, section, projection) if section in existing else {}
+            if not projection:
+                _store_snapshot(loaded, version)
+        return _with_defaults(_dataset(_data_from_documents(loaded, projection), None if projection else loaded))
     except Exception as e:
+        _mongo_failed(e)
         print("load_data: failed to load from MongoDB, falling back to JSON:", e)
         traceback.print_exc()
-        return _load_from_json()
+        return _load_from_json(sections, projection)
 
 def save_data(data):
+    """
+    Persist `data`. Only the documents that differ from the state `data` was
+    loaded with (its Dataset base) are written, with MongoDB as one ordered
+    bulk_write per collection: records others added since are kept, and
+    sections missing from `data` are left untouched. Raises VersionConflict if
+    a versioned record was changed or deleted by someone else since it was
+    loaded, and then nothing is written; the "_v" of saved records is updated
+    in `data`.
+    """
+    if _engine() == "sqlite":
+        _save_to_sqlite(data)
+        return
     client = get_mongo_client()
     if client is None:
         _save_to_json(data)
@@ -264,59 +1661,1133 @@ def save_data(data):
         return
 
     try:
-        # overwrite admins
-        db.admins.delete_many({})
-        admins_docs = []
-        for email, info in data.get("admins", {}).items():
-            doc = info.copy()
-            doc["_id"] = email
-            admins_docs.append(doc)
-        if admins_docs:
+        written = False
+        plan, saved = _save_plan(data)
+        # all versions are checked before the first write, so a stale save
+        # writes nothing (like the JSON and SQLite engines). The conditional
+        # writes still catch a change made in between: inside a transaction
+        # that undoes the save, on a standalone server it may leave earlier
+        # sections written.
+        for section, _ops, _conditional, expected in plan:
+            if expected:
+                _check_versions(section, expected, db[section].find(*_version_query(section, expected)))
+        with _mongo_transaction(client) as options:
+            for section, ops, conditional, _expected in plan:
+                if ops:
+                    written = True
+                    _check_bulk(section, db[section].bulk_write(ops, ordered=True, **options), conditional)
+        _after_save(data, saved)
+        if written:
+            _note_version(_bump_version(db))
+    except VersionConflict:
+        # drop the cache so the caller reloads fresh data
+        _invalidate_cache()
+        if written:
+            _bump_version(db)
+        raise
+    except Exception as e:
+        _mongo_failed(e)
+        print("save_data: failed to write to MongoDB, saving to JSON as fallback:", e)
+        traceback.print_exc()
+        # the collections may be partially written
+        _invalidate_cache()
+        _save_to_json(data)
+
+# SQLite engine (DATA_ENGINE=sqlite): one table per section holding each
+# document as JSON under its key, expression indexes on the fields that are
+# queried, and a WAL journal so readers never block the writer. It shares
+# the snapshot/version cache with the MongoDB path; the version lives in
+# the meta table. Items also keep their casefolded name in name_key, set
+# from Python on every write: SQLite's lower() only folds ASCII.
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS admins (key TEXT PRIMARY KEY, doc TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS staff (key TEXT PRIMARY KEY, doc TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS roles (key TEXT PRIMARY KEY, doc TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS departments (key TEXT PRIMARY KEY, doc TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS items (key INTEGER PRIMARY KEY, doc TEXT NOT NULL, name_key TEXT);
+CREATE TABLE IF NOT EXISTS reservations (key INTEGER PRIMARY KEY, doc TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+INSERT OR IGNORE INTO meta (name, value) VALUES ('version', 0);
+"""
+
+# created once _sqlite_upgrade() has added any missing columns
+_SQLITE_INDEXES = """
+CREATE INDEX IF NOT EXISTS items_department_name_key ON items (json_extract(doc, '$.department'), name_key);
+CREATE INDEX IF NOT EXISTS reservations_status ON reservations (json_extract(doc, '$.status'));
+CREATE INDEX IF NOT EXISTS reservations_department ON reservations (json_extract(doc, '$.department'));
+CREATE INDEX IF NOT EXISTS reservations_item_id ON reservations (json_extract(doc, '$.item_id'));
+"""
+
+_sqlite_local = threading.local()
+
+def _sqlite_conn():
+    """Return this thread's connection to the SQLite store, opening it on first use."""
+    conn = getattr(_sqlite_local, "conn", None)
+    if conn is not None and _sqlite_local.pid == os.getpid():
+        return conn
+    path = os.environ.get("SQLITE_PATH") or str(DATA_SQLITE)
+    # autocommit mode; writes use explicit BEGIN IMMEDIATE transactions
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SQLITE_SCHEMA)
+    _sqlite_upgrade(conn)
+    conn.executescript(_SQLITE_INDEXES)
+    _sqlite_local.conn = conn
+    _sqlite_local.pid = os.getpid()
+    return conn
+
+def _sqlite_upgrade(conn):
+    """Add the items name_key column to a store created without it and fill it in."""
+    if "name_key" in {row[1] for row in conn.execute("PRAGMA table_info(items)")}:
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # another process may have upgraded the store meanwhile
+        if "name_key" not in {row[1] for row in conn.execute("PRAGMA table_info(items)")}:
+            conn.execute("ALTER TABLE items ADD COLUMN name_key TEXT")
+            conn.execute("DROP INDEX IF EXISTS items_department_name")
+            rows = conn.execute("SELECT key, doc FROM items").fetchall()
+            conn.executemany("UPDATE items SET name_key = ? WHERE key = ?",
+                             [(_sqlite_name_key(json.loads(doc)), key) for key, doc in rows])
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+def _sqlite_name_key(doc):
+    return item_name_key(None, doc.get("name"))[1]
+
+def _sqlite_columns(section):
+    return ("key", "doc", "name_key") if section == "items" else ("key", "doc")
+
+def _sqlite_values(section, key, doc):
+    """Column values (see _sqlite_columns) of the row holding `doc` (in snapshot form)."""
+    row = {f: v for f, v in doc.items() if f != "_id"}
+    values = (key, json.dumps(row, separators=(",", ":")))
+    return values + (_sqlite_name_key(row),) if section == "items" else values
+
+@contextmanager
+def _sqlite_transaction(immediate=True):
+    conn = _sqlite_conn()
+    conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+def _sqlite_field(field):
+    """SQL expression for a document field (literal path so expression indexes apply)."""
+    if not re.fullmatch(r"\w+", field):
+        raise ValueError(f"invalid field name: {field!r}")
+    return f"json_extract(doc, '$.{field}')"
+
+def _sqlite_read_version(conn):
+    return conn.execute("SELECT value FROM meta WHERE name = 'version'").fetchone()[0]
+
+def _sqlite_bump(conn):
+    conn.execute("UPDATE meta SET value = value + 1 WHERE name = 'version'")
+    return _sqlite_read_version(conn)
+
+def _sqlite_doc(conn, section, key):
+    row = conn.execute(f"SELECT doc FROM {section} WHERE key = ?", (key,)).fetchone()
+    return json.loads(row[0]) if row else None
+
+def _sqlite_put(conn, section, key, doc):
+    """Upsert (or with doc=None delete) one row; `doc` is in snapshot form."""
+    if doc is None:
+        return conn.execute(f"DELETE FROM {section} WHERE key = ?", (key,)).rowcount
+    columns = _sqlite_columns(section)
+    updates = ", ".join(f"{c} = excluded.{c}" for c in columns[1:])
+    conn.execute(
+        f"INSERT INTO {section} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+        f" ON CONFLICT(key) DO UPDATE SET {updates}",
+        _sqlite_values(section, key, doc),
+    )
+    return 1
+
+def _sqlite_fetch_section(conn, section):
+    docs = {}
+    for key, raw in conn.execute(f"SELECT key, doc FROM {section} ORDER BY rowid"):
+        doc = json.loads(raw)
+        if _SECTION_KEYS[section] == "_id":
+            doc["_id"] = key
+        docs[key] = doc
+    return docs
+
+def _load_from_sqlite(sections, projection=None):
+    conn = _sqlite_conn()
+    loaded = _cached_snapshot(lambda: _sqlite_read_version(conn), sections)
+    if loaded is None:
+        # one read transaction so every table comes from the same point in time
+        with _sqlite_transaction(immediate=False) as conn:
+            version = _sqlite_read_version(conn)
+            loaded = {section: _sqlite_fetch_section(conn, section) for section in sections}
+        _store_snapshot(loaded, version)
+    return _dataset(_data_from_documents(loaded, projection), None if projection else loaded)
+
+def _save_to_sqlite(data):
+    saved = {}
+    written = False
+    version = None
+    with _sqlite_transaction() as conn:
+        for section in _SECTION_KEYS:
+            if section not in data:
+                continue
+            current = _section_documents(section, data[section])
+            deleted, changed, expected = _section_changes(section, current, _section_base(data, section))
+            # the transaction is rolled back on a conflict, so nothing is half-written
+            for k, v in expected.items():
+                if not _version_matches(_sqlite_doc(conn, section, k), v):
+                    raise VersionConflict(section, k)
+            for k in deleted:
+                _sqlite_put(conn, section, k, None)
+            for k, doc in changed.items():
+                _sqlite_put(conn, section, k, doc)
+            written = written or bool(deleted or changed)
+            saved[section] = (current, deleted, changed)
+        version = _sqlite_bump(conn) if written else None
+    _after_save(data, saved)
+    if version is not None:
+        _note_version(version)
+
+# Per-entity repositories: single-record reads and writes that go straight to
+# an indexed MongoDB query (or the JSON file when Mongo is unavailable)
+# instead of loading and saving the whole dataset.
+
+def _remember_write(section, key, doc, version):
+    """Apply a single-document write to the cached snapshot (doc=None: deleted)."""
+    with _snapshot_lock:
+        docs = _snapshot.get(section)
+        if docs is not None:
+            if doc is None:
+                docs.pop(key, None)
+            else:
+                docs[key] = doc
+    _note_version(version)
+
+def _remember_writes(section, docs, version):
+    """Apply {key: doc} written in one go to the cached snapshot."""
+    with _snapshot_lock:
+        cached = _snapshot.get(section)
+        if cached is not None:
+            cached.update(docs)
+    _note_version(version)
+
+def _record_write(coll, key, doc=None):
+    _remember_write(coll.name, key, doc, _bump_version(coll.database))
+
+def _sqlite_write(section, key, doc=None):
+    """Write one document (doc=None deletes) in its own transaction; returns rows affected."""
+    with _sqlite_transaction() as conn:
+        changed = _sqlite_put(conn, section, key, doc)
+        version = _sqlite_bump(conn) if changed else None
+    if changed:
+        _remember_write(section, key, doc, version)
+    return changed
+
+def _matches(record, filter):
+    return all(record.get(k) == v for k, v in (filter or {}).items())
+
+def _project(record, projection):
+    if not projection:
+        return dict(record)
+    if not isinstance(projection, dict):
+        projection = {f: 1 for f in projection}
+    included = [f for f, on in projection.items() if on and f != "_id"]
+    if included:
+        return {f: record[f] for f in included if f in record}
+    return {f: v for f, v in record.items() if projection.get(f, 1)}
+
+def _mongo_projection(projection, keep_id=False):
+    if not projection:
+        return None if keep_id else {"_id": 0}
+    if not isinstance(projection, dict):
+        projection = {f: 1 for f in projection}
+    projection = dict(projection)
+    if keep_id:
+        # the key of user documents lives in _id, so it is always fetched
+        projection.pop("_id", None)
+    else:
+        projection["_id"] = 0
+    return projection or None
+
+def _ensure_names(section, names):
+    """Add the `names` not yet in the roles/departments list; returns how many were added."""
+    names = list(dict.fromkeys(n for n in names if n))
+    if not names:
+        return 0
+    client = get_mongo_client()
+    if client is not None:
+        try:
+            coll = get_db(client)[section]
+            ops = [UpdateOne({"name": n}, {"$setOnInsert": {"name": n}}, upsert=True) for n in names]
+            upserted = coll.bulk_write(ops, ordered=False).upserted_ids
+            if upserted:
+                added = {names[i]: {"name": names[i]} for i in upserted}
+                _remember_writes(section, added, _bump_version(coll.database))
+            return len(upserted)
+        except Exception as e:
+            _mongo_failed(e)
+            print(f"data_store: cannot update {section} in MongoDB, using JSON:", e)
+    if _engine() == "sqlite":
+        added = {}
+        with _sqlite_transaction() as conn:
+            for n in names:
+                if conn.execute(f"INSERT OR IGNORE INTO {section} (key, doc) VALUES (?, ?)",
+                                (n, json.dumps({"name": n}))).rowcount:
+                    added[n] = {"name": n}
+            version = _sqlite_bump(conn) if added else None
+        if added:
+            _remember_writes(section, added, version)
+        return len(added)
+    with _json_lock:
+        existing = set(_json_view().get(section) or [])
+        missing = [n for n in names if n not in existing]
+        if missing:
+            _json_write_many(section, [(n, {"name": n}) for n in missing])
+    return len(missing)
+
+def _ensure_name(section, name):
+    """Add `name` to the roles/departments list if it is not there yet."""
+    _ensure_names(section, [name])
+
+def ensure_role(name):
+    _ensure_name("roles", name)
+
+def ensure_department(name):
+    _ensure_name("departments", name)
+
+def ensure_roles(names):
+    """ensure_role() for many names in one write; returns how many were new."""
+    return _ensure_names("roles", names)
+
+def ensure_departments(names):
+    """ensure_department() for many names in one write; returns how many were new."""
+    return _ensure_names("departments", names)
+
+class _Repository(ABC):
+    section = None
+    key = None
+    # records.py class for get_record/find_records/put_record (None: documents only)
+    record_type = None
+
+    def _collection(self):
+        client = get_mongo_client()
+        if client is None:
+            return None
+        try:
+            return get_db(client)[self.section]
+        except Exception as e:
+            print(f"{type(self).__name__}: cannot get db, using JSON:", e)
+            return None
+
+    def _fallback(self, action, e):
+        _mongo_failed(e)
+        print(f"{type(self).__name__}.{action}: MongoDB failed, using JSON:", e)
+
+    # subclasses define how records map to documents and JSON sections
+    @abstractmethod
+    def _from_doc(self, doc):
+        """(key, record) for a stored document."""
+
+    @abstractmethod
+    def _to_doc(self, key, record):
+        """The document stored for `record` under `key`."""
+
+    @abstractmethod
+    def _json_records(self, data):
+        """(key, record) pairs of the section in a JSON store view."""
+
+    @abstractmethod
+    def _result(self, pairs):
+        """find()'s result built from (key, record) pairs."""
+
+    @abstractmethod
+    def _records(self, result):
+        """find()'s result as record_type objects."""
+
+    @abstractmethod
+    def _json_index(self):
+        """{key: record} of the section in the current JSON store view."""
+
+    def _sqlite_get(self, conn, key):
+        return _sqlite_doc(conn, self.section, key)
+
+    @property
+    def versioned(self):
+        return self.section in _VERSIONED_SECTIONS
+
+    def _stamp(self, record, base=None):
+        """Copy of `record` carrying the next "_v" after `base` (default: the record's own)."""
+        if not self.versioned:
+            return dict(record)
+        return dict(record, _v=_version_of(record if base is None else base) + 1)
+
+    def _check(self, stored, expected_version, key):
+        if expected_version is not None and self.versioned and _version_of(stored) != expected_version:
+            raise VersionConflict(self.section, key)
+
+    def get(self, key):
+        """Return the record stored under `key`, or None."""
+        coll = self._collection()
+        if coll is not None:
             try:
-                db.admins.insert_many(admins_docs, ordered=False)
-            except Exception:
-                pass
+                doc = coll.find_one({self.key: key})
+                return self._from_doc(doc)[1] if doc else None
+            except Exception as e:
+                self._fallback("get", e)
+        if _engine() == "sqlite":
+            return self._sqlite_get(_sqlite_conn(), key)
+        for k, record in self._json_records(_json_view()):
+            if k == key:
+                return dict(record)
+        return None
 
-        # overwrite staff
-        db.staff.delete_many({})
-        staff_docs = []
-        for email, info in data.get("staff", {}).items():
-            doc = info.copy()
-            doc["_id"] = email
-            staff_docs.append(doc)
-        if staff_docs:
+    def get_record(self, key):
+        """Like get(), as a typed record."""
+        doc = self.get(key)
+        return self.record_type.from_doc(doc, key) if doc is not None else None
+
+    def find_records(self, filter=None):
+        """Like find() without a projection, as a list of typed records."""
+        return self._records(self.find(filter))
+
+    def put_record(self, record):
+        """put() a typed record under its own key; returns the stored record."""
+        return self.record_type.from_doc(self.put(record.key, record.to_doc()), record.key)
+
+    def find(self, filter=None, projection=None):
+        """
+        Return records matching the equality `filter`, limited to the fields in
+        `projection` (a list of names or a Mongo-style projection dict).
+        """
+        coll = self._collection()
+        if coll is not None:
             try:
-                db.staff.insert_many(staff_docs, ordered=False)
-            except Exception:
-                pass
+                cursor = coll.find(filter or {}, _mongo_projection(projection, keep_id=self.key == "_id"))
+                return self._result(self._from_doc(doc) for doc in cursor)
+            except Exception as e:
+                self._fallback("find", e)
+        if _engine() == "sqlite":
+            where, params = [], []
+            for field, value in (filter or {}).items():
+                where.append("key = ?" if field == self.key else f"{_sqlite_field(field)} = ?")
+                params.append(value)
+            sql = f"SELECT key, doc FROM {self.section}"
+            if where:
+                sql += " WHERE " + " AND ".join(where)
+            rows = _sqlite_conn().execute(sql + " ORDER BY rowid", params)
+            return self._result((k, _project(json.loads(raw), projection)) for k, raw in rows)
+        records = self._json_records(_json_view())
+        return self._result((k, _project(r, projection)) for k, r in records if _matches(r, filter))
 
-        # overwrite roles
-        db.roles.delete_many({})
-        roles_docs = [{"name": r} for r in data.get("roles", [])]
-        if roles_docs:
+    def scan(self, batch_size=None):
+        """
+        Yield (key, record) for every record, fetching `batch_size` (default
+        1000) at a time, for exports that must not hold the whole section.
+        Each page is read on the calling thread, so a consumer may move
+        between threads (as StreamingResponse does) between pages.
+        """
+        batch_size = batch_size or 1000
+        coll = self._collection()
+        if coll is not None:
+            started = False
             try:
-                db.roles.insert_many(roles_docs, ordered=False)
-            except Exception:
-                pass
+                for doc in coll.find({}, _mongo_projection(None, keep_id=self.key == "_id"), batch_size=batch_size):
+                    started = True
+                    yield self._from_doc(doc)
+                return
+            except Exception as e:
+                if started:
+                    _mongo_failed(e)
+                    raise
+                self._fallback("scan", e)
+        if _engine() == "sqlite":
+            last = 0
+            while True:
+                rows = _sqlite_conn().execute(
+                    f"SELECT rowid, key, doc FROM {self.section} WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                    (last, batch_size),
+                ).fetchall()
+                for last, key, raw in rows:
+                    yield key, json.loads(raw)
+                if len(rows) < batch_size:
+                    return
+        for key, record in self._json_records(_json_view()):
+            yield key, dict(record)
 
-        # overwrite departments
-        db.departments.delete_many({})
-        dept_docs = [{"name": d} for d in data.get("departments", [])]
-        if dept_docs:
+    def get_many(self, keys):
+        """Return {key: record} for those of `keys` that exist."""
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        coll = self._collection()
+        if coll is not None:
             try:
-                db.departments.insert_many(dept_docs, ordered=False)
-            except Exception:
-                pass
+                return dict(self._from_doc(doc) for doc in coll.find({self.key: {"$in": keys}}))
+            except Exception as e:
+                self._fallback("get_many", e)
+        if _engine() == "sqlite":
+            found = {}
+            conn = _sqlite_conn()
+            # stay under SQLite's bound-parameter limit
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                sql = f"SELECT key, doc FROM {self.section} WHERE key IN ({', '.join('?' * len(chunk))})"
+                found.update((k, json.loads(raw)) for k, raw in conn.execute(sql, chunk))
+            return found
+        records = self._json_index()
+        return {k: dict(records[k]) for k in keys if k in records}
 
-        # overwrite items
-        db.items.delete_many({})
-        items_docs = [it.copy() for it in data.get("items", [])]
-        if items_docs:
-            db.items.insert_many(items_docs, ordered=False)
-    except Exception as e:
-        print("save_data: failed to write to MongoDB, saving to JSON as fallback:", e)
-        traceback.print_exc()
-        _save_to_json(data)
+    def put_many(self, pairs):
+        """
+        put() each (key, record) in `pairs` with one bulk write (one transaction
+        for SQLite, one log append for JSON). Returns the stored records.
+        """
+        stored = [(key, self._stamp(record)) for key, record in pairs]
+        if not stored:
+            return []
+        docs = {key: self._to_doc(key, record) for key, record in stored}
+        coll = self._collection()
+        if coll is not None:
+            try:
+                coll.bulk_write([ReplaceOne({self.key: k}, doc, upsert=True) for k, doc in docs.items()], ordered=False)
+                _remember_writes(self.section, docs, _bump_version(coll.database))
+                return [record for _key, record in stored]
+            except Exception as e:
+                self._fallback("put_many", e)
+        if _engine() == "sqlite":
+            with _sqlite_transaction() as conn:
+                for k, doc in docs.items():
+                    _sqlite_put(conn, self.section, k, doc)
+                version = _sqlite_bump(conn)
+            _remember_writes(self.section, docs, version)
+        else:
+            with _json_lock:
+                _json_write_many(self.section, list(docs.items()))
+        return [record for _key, record in stored]
+
+    def put(self, key, record):
+        """Insert or replace the whole record stored under `key` (unconditionally; "_v" advances from the record's)."""
+        record = self._stamp(record)
+        coll = self._collection()
+        if coll is not None:
+            try:
+                doc = self._to_doc(key, record)
+                coll.replace_one({self.key: key}, doc, upsert=True)
+                _record_write(coll, key, doc)
+                return record
+            except Exception as e:
+                self._fallback("put", e)
+        if _engine() == "sqlite":
+            _sqlite_write(self.section, key, self._to_doc(key, record))
+            return record
+        with _json_lock:
+            _json_write(self.section, key, self._to_doc(key, record))
+        return record
+
+    def update_fields(self, key, fields, expected_version=None):
+        """
+        Set `fields` on the record under `key`; returns the updated record or
+        None if there is none. With `expected_version`, the update only
+        applies if the record's "_v" still equals it (else VersionConflict).
+        """
+        fields = {f: v for f, v in fields.items() if f != "_v"}
+        coll = self._collection()
+        if coll is not None:
+            try:
+                match = {self.key: key}
+                if expected_version is not None and self.versioned:
+                    match.update(_version_filter(expected_version))
+                update = {"$set": fields}
+                if self.versioned:
+                    update["$inc"] = {"_v": 1}
+                doc = coll.find_one_and_update(match, update, return_document=ReturnDocument.AFTER)
+                if doc is None:
+                    if len(match) > 1 and coll.count_documents({self.key: key}, limit=1):
+                        raise VersionConflict(self.section, key)
+                    return None
+                doc_key, record = self._from_doc(doc)
+                _record_write(coll, doc_key, self._to_doc(doc_key, record))
+                return record
+            except VersionConflict:
+                raise
+            except Exception as e:
+                self._fallback("update_fields", e)
+        if _engine() == "sqlite":
+            with _sqlite_transaction() as conn:
+                record = self._sqlite_get(conn, key)
+                if record is None:
+                    return None
+                self._check(record, expected_version, key)
+                record = self._stamp(dict(record, **fields), base=record)
+                doc = self._to_doc(key, record)
+                _sqlite_put(conn, self.section, key, doc)
+                version = _sqlite_bump(conn)
+            _remember_write(self.section, key, doc, version)
+            return record
+        with _json_lock:
+            for k, record in self._json_records(_json_view()):
+                if k == key:
+                    self._check(record, expected_version, key)
+                    record = self._stamp(dict(record, **fields), base=record)
+                    _json_write(self.section, key, self._to_doc(key, record))
+                    return record
+        return None
+
+    def delete(self, key, expected_version=None):
+        """
+        Remove the record under `key`; returns True if one was removed. With
+        `expected_version`, only a record still at that "_v" is removed.
+        """
+        coll = self._collection()
+        if coll is not None:
+            try:
+                match = {self.key: key}
+                if expected_version is not None and self.versioned:
+                    match.update(_version_filter(expected_version))
+                removed = coll.delete_one(match).deleted_count > 0
+                if removed:
+                    _record_write(coll, key)
+                elif len(match) > 1 and coll.count_documents({self.key: key}, limit=1):
+                    raise VersionConflict(self.section, key)
+                return removed
+            except VersionConflict:
+                raise
+            except Exception as e:
+                self._fallback("delete", e)
+        if _engine() == "sqlite":
+            with _sqlite_transaction() as conn:
+                record = self._sqlite_get(conn, key)
+                if record is None:
+                    return False
+                self._check(record, expected_version, key)
+                _sqlite_put(conn, self.section, key, None)
+                version = _sqlite_bump(conn)
+            _remember_write(self.section, key, None, version)
+            return True
+        with _json_lock:
+            for k, record in self._json_records(_json_view()):
+                if k == key:
+                    self._check(record, expected_version, key)
+                    _json_write(self.section, key)
+                    return True
+        return False
+
+class _UserRepository(_Repository):
+    """Admins/staff: documents keyed by email (_id), JSON section is {email: info}."""
+    key = "_id"
+
+    def _from_doc(self, doc):
+        record = dict(doc)
+        return record.pop("_id", None), record
+
+    def _to_doc(self, key, record):
+        doc = dict(record)
+        doc["_id"] = key
+        return doc
+
+    def _json_records(self, data):
+        return (data.get(self.section) or {}).items()
+
+    def _result(self, pairs):
+        return dict(pairs)
+
+    def _records(self, result):
+        return [self.record_type.from_doc(doc, k) for k, doc in result.items()]
+
+    def _json_index(self):
+        return _json_view().get(self.section) or {}
+
+class _ListRepository(_Repository):
+    """Items/reservations: documents keyed by an integer "id", JSON section is a list."""
+    key = "id"
+
+    def _from_doc(self, doc):
+        record = dict(doc)
+        record.pop("_id", None)
+        return record.get(self.key), record
+
+    def _to_doc(self, key, record):
+        doc = dict(record)
+        doc.pop("_id", None)
+        doc[self.key] = key
+        return doc
+
+    def _json_records(self, data):
+        return [(r.get(self.key), r) for r in data.get(self.section) or []]
+
+    def _result(self, pairs):
+        return [record for _key, record in pairs]
+
+    def _records(self, result):
+        return [self.record_type.from_doc(doc) for doc in result]
+
+    def _json_index(self):
+        return _json_records_by_key(self.section)
+
+class AdminRepository(_UserRepository):
+    section = "admins"
+
+class StaffRepository(_UserRepository):
+    section = "staff"
+    record_type = StaffMember
+
+class ItemRepository(_ListRepository):
+    section = "items"
+    record_type = Item
+
+    def consume(self, item_id, department, amount):
+        """
+        Atomically take `amount` units of item `item_id` in `department`, clamping
+        the stock at zero. Returns (item after the update, just_depleted) where
+        just_depleted is True only for the call that took the stock to zero,
+        or (None, False) if no such item exists in that department.
+        """
+        if amount <= 0:
+            raise ValueError("amount must be positive")
+        coll = self._collection()
+        if coll is not None:
+            try:
+                return self._consume_mongo(coll, item_id, department, amount)
+            except Exception as e:
+                self._fallback("consume", e)
+        if _engine() == "sqlite":
+            with _sqlite_transaction() as conn:
+                record = self._sqlite_get(conn, item_id)
+                if record is None or record.get("department") != department:
+                    return None, False
+                before = Item.of(record).current_amount
+                if before <= 0:
+                    # already depleted: nothing changes, so nothing is written (as with MongoDB)
+                    return record, False
+                record = self._stamp(dict(record, current_amount=max(0, before - amount)), base=record)
+                doc = self._to_doc(item_id, record)
+                _sqlite_put(conn, self.section, item_id, doc)
+                version = _sqlite_bump(conn)
+            _remember_write(self.section, item_id, doc, version)
+            return record, record["current_amount"] == 0
+        with _json_lock:
+            for k, record in self._json_records(_json_view()):
+                if k == item_id and record.get("department") == department:
+                    before = Item.of(record).current_amount
+                    if before <= 0:
+                        return dict(record), False
+                    record = self._stamp(dict(record, current_amount=max(0, before - amount)), base=record)
+                    _json_write(self.section, k, self._to_doc(k, record))
+                    return record, record["current_amount"] == 0
+        return None, False
+
+    def _consume_mongo(self, coll, item_id, department, amount):
+        match = {"id": item_id, "department": department}
+        # common case: enough stock, a single conditional $inc
+        doc = coll.find_one_and_update(
+            dict(match, current_amount={"$gte": amount}),
+            {"$inc": {"current_amount": -amount, "_v": 1}},
+            return_document=ReturnDocument.AFTER,
+        )
+        if doc is None:
+            # not enough stock: clamp to zero; only the caller that still saw
+            # a positive amount gets the "just depleted" document back
+            doc = coll.find_one_and_update(
+                dict(match, current_amount={"$gt": 0}),
+                {"$set": {"current_amount": 0}, "$inc": {"_v": 1}},
+                return_document=ReturnDocument.AFTER,
+            )
+            if doc is None:
+                doc = coll.find_one(match)
+                if doc is None:
+                    return None, False
+                key, record = self._from_doc(doc)
+                return record, False
+        key, record = self._from_doc(doc)
+        _record_write(coll, key, self._to_doc(key, record))
+        return record, record.get("current_amount") == 0
+
+    def find_by_name(self, department, name):
+        """Return the item named `name` (ignoring case) in `department`, or None; uses the name index."""
+        coll = self._collection()
+        if coll is not None:
+            try:
+                doc = coll.find_one({"department": department, "name": name}, sort=[("id", 1)], collation=NAME_COLLATION)
+                return self._from_doc(doc)[1] if doc else None
+            except Exception as e:
+                self._fallback("find_by_name", e)
+        if _engine() == "sqlite":
+            # served by the items_department_name_key index
+            row = _sqlite_conn().execute(
+                "SELECT doc FROM items WHERE json_extract(doc, '$.department') = ?"
+                " AND name_key = ? ORDER BY key LIMIT 1",
+                item_name_key(department, name),
+            ).fetchone()
+            return json.loads(row[0]) if row else None
+        return _json_item_by_name(department, name)
+
+    def find_by_names(self, pairs):
+        """
+        Batch find_by_name() for (department, name) pairs; returns
+        {item_name_key(department, name): item} for those that exist.
+        """
+        pairs = list(dict.fromkeys(pairs))
+        if not pairs:
+            return {}
+        coll = self._collection()
+        if coll is not None:
+            try:
+                found = {}
+                query = {"$or": [{"department": d, "name": n} for d, n in pairs]}
+                for doc in coll.find(query, sort=[("id", 1)], collation=NAME_COLLATION):
+                    _key, record = self._from_doc(doc)
+                    found.setdefault(item_name_key(record.get("department"), record.get("name")), record)
+                return found
+            except Exception as e:
+                self._fallback("find_by_names", e)
+        found = {}
+        for department, name in pairs:
+            item = self.find_by_name(department, name)
+            if item is not None:
+                found[item_name_key(department, name)] = item
+        return found
+
+class ReservationRepository(_ListRepository):
+    section = "reservations"
+    record_type = Reservation
+
+def find_item_by_name(department, name):
+    return ItemRepository().find_by_name(department, name)
+
+# Id allocation for items and reservations. Each section has a counter holding
+# the last id handed out: a {"_id": section, "seq": n} document in the MongoDB
+# counters collection (advanced with one atomic $inc), a row in the SQLite
+# counters table, or a "counters" entry in the JSON store. A missing counter
+# is seeded from the highest existing id once; ids written explicitly (e.g.
+# by a CSV import) must be reported with bump_counter().
+_COUNTED_SECTIONS = ("items", "reservations")
+
+def _max_id(records):
+    return max((r.get("id") for r in records or [] if isinstance(r.get("id"), int)), default=0)
+
+def _allocate_mongo(db, section, count):
+    coll = db.counters
+    doc = coll.find_one_and_update({"_id": section}, {"$inc": {"seq": count}}, return_document=ReturnDocument.AFTER)
+    if doc is None:
+        top = db[section].find_one({"id": {"$type": "number"}}, {"id": 1}, sort=[("id", -1)])
+        # $max keeps a seed written concurrently by another worker if it is higher
+        coll.update_one({"_id": section}, {"$max": {"seq": (top or {}).get("id", 0)}}, upsert=True)
+        doc = coll.find_one_and_update({"_id": section}, {"$inc": {"seq": count}}, return_document=ReturnDocument.AFTER)
+    return doc["seq"] - count + 1
+
+def _allocate_sqlite(section, count):
+    with _sqlite_transaction() as conn:
+        conn.execute(f"INSERT OR IGNORE INTO counters (name, value) SELECT ?, coalesce(max(key), 0) FROM {section}", (section,))
+        conn.execute("UPDATE counters SET value = value + ? WHERE name = ?", (count, section))
+        last = conn.execute("SELECT value FROM counters WHERE name = ?", (section,)).fetchone()[0]
+    return last - count + 1
+
+def _allocate_json(section, count, at_least=None):
+    with _json_lock:
+        view = _json_view()
+        last = (view.get("counters") or {}).get(section)
+        if last is None:
+            last = _max_id(view.get(section))
+        new = last + count if at_least is None else max(last, at_least)
+        if new != last or section not in (view.get("counters") or {}):
+            data = dict(view, counters=dict(view.get("counters") or {}, **{section: new}))
+            if DATA_JSON.exists():
+                _append_json_records([{"s": "counters", "k": section, "d": new}], data)
+            else:
+                _compact_json(data)
+    return last + 1
+
+def allocate_ids(section, count=1):
+    """
+    Reserve `count` consecutive ids for new "items" or "reservations" records
+    and return the first one. Safe across threads and workers.
+    """
+    if section not in _COUNTED_SECTIONS:
+        raise ValueError(f"no id counter for {section!r}")
+    if count < 1:
+        raise ValueError("count must be positive")
+    client = get_mongo_client()
+    if client is not None:
+        try:
+            return _allocate_mongo(get_db(client), section, count)
+        except Exception as e:
+            _mongo_failed(e)
+            print("allocate_ids: MongoDB failed, using JSON:", e)
+    if _engine() == "sqlite":
+        return _allocate_sqlite(section, count)
+    return _allocate_json(section, count)
+
+def bump_counter(section, at_least):
+    """Make sure ids up to `at_least` are never allocated (after writing explicit ids)."""
+    if section not in _COUNTED_SECTIONS:
+        raise ValueError(f"no id counter for {section!r}")
+    client = get_mongo_client()
+    if client is not None:
+        try:
+            get_db(client).counters.update_one({"_id": section}, {"$max": {"seq": at_least}}, upsert=True)
+            return
+        except Exception as e:
+            _mongo_failed(e)
+            print("bump_counter: MongoDB failed, using JSON:", e)
+    if _engine() == "sqlite":
+        with _sqlite_transaction() as conn:
+            conn.execute("INSERT OR IGNORE INTO counters (name, value) VALUES (?, 0)", (section,))
+            conn.execute("UPDATE counters SET value = max(value, ?) WHERE name = ?", (at_least, section))
+        return
+    _allocate_json(section, 0, at_least=at_least)
+
+class IdAllocator:
+    """Hands out ids one by one from blocks reserved with allocate_ids() (for bulk inserts)."""
+
+    def __init__(self, section, block=100):
+        self.section = section
+        self.block = block
+        self._next = self._end = 0
+
+    def next(self):
+        if self._next >= self._end:
+            self._next = allocate_ids(self.section, self.block)
+            self._end = self._next + self.block
+        self._next += 1
+        return self._next - 1
+
+# Snapshots: the whole store (every section plus the id counters) as one
+# compressed JSON Lines file, written and read as a stream. Line 1 is a header,
+# then one {"s": section, "k": key, "d": document} record per line (counters
+# carry their number as "d"), then a trailer with per-section record counts and
+# SHA-256 checksums of the record lines. A ".zst" path uses zstd (needs the
+# zstandard package), anything else gzip at SNAPSHOT_GZIP_LEVEL (default 1).
+SNAPSHOT_FORMAT = "physiotracker-snapshot"
+SNAPSHOT_VERSION = 1
+_SNAPSHOT_SECTIONS = tuple(_SECTION_KEYS) + ("counters",)
+
+def _snapshot_open(path, mode):
+    if str(path).endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError("zstd snapshots need the zstandard package; use a .gz path instead")
+        return zstandard.open(path, mode, encoding="utf-8")
+    if "w" in mode:
+        return gzip.open(path, mode, encoding="utf-8", compresslevel=_env_int("SNAPSHOT_GZIP_LEVEL", 1))
+    return gzip.open(path, mode, encoding="utf-8")
+
+def _snapshot_batch_size(batch_size=None):
+    return max(1, batch_size or _env_int("SNAPSHOT_BATCH_SIZE", 1000))
+
+def _mongo_snapshot_records(db):
+    batch = _snapshot_batch_size()
+    for section, field in _SECTION_KEYS.items():
+        for doc in db[section].find({}, batch_size=batch):
+            if field != "_id":
+                doc.pop("_id", None)
+            yield section, doc.get(field), doc
+    for doc in db.counters.find({}, batch_size=batch):
+        yield "counters", doc["_id"], doc.get("seq", 0)
+
+def _sqlite_snapshot_records():
+    # one read transaction so every table comes from the same point in time
+    with _sqlite_transaction(immediate=False) as conn:
+        for section in _SECTION_KEYS:
+            for key, doc in _sqlite_rows(conn, section):
+                yield section, key, doc
+        for name, value in conn.execute("SELECT name, value FROM counters ORDER BY name"):
+            yield "counters", name, value
+
+def _sqlite_rows(conn, section):
+    user_section = _SECTION_KEYS[section] == "_id"
+    for key, raw in conn.execute(f"SELECT key, doc FROM {section} ORDER BY rowid"):
+        doc = json.loads(raw)
+        if user_section:
+            doc["_id"] = key
+        yield key, doc
+
+def _json_snapshot_records():
+    view = _json_view()
+    for section in _SECTION_KEYS:
+        yield from ((section, k, doc) for k, doc in _section_documents(section, view.get(section)).items())
+    for name, value in (view.get("counters") or {}).items():
+        yield "counters", name, value
+
+def snapshot(path):
+    """
+    Stream every section of the active store into the compressed JSON Lines
+    file `path` (see above). The file appears only once complete. Returns
+    {"path", "engine", "counts"}.
+    """
+    path = Path(path)
+    client = get_mongo_client()
+    if client is not None:
+        engine, records = "mongo", _mongo_snapshot_records(get_db(client))
+    elif _engine() == "sqlite":
+        engine, records = "sqlite", _sqlite_snapshot_records()
+    else:
+        engine, records = "json", _json_snapshot_records()
+    header = {"format": SNAPSHOT_FORMAT, "version": SNAPSHOT_VERSION, "engine": engine,
+              "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), "sections": list(_SNAPSHOT_SECTIONS)}
+    counts, digests = {}, {}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    os.close(fd)
+    try:
+        with _snapshot_open(tmp, "wt") as f:
+            f.write(json.dumps(header) + "\n")
+            for section, key, doc in records:
+                line = json.dumps({"s": section, "k": key, "d": doc}, separators=(",", ":"), default=str) + "\n"
+                f.write(line)
+                counts[section] = counts.get(section, 0) + 1
+                if section not in digests:
+                    digests[section] = hashlib.sha256()
+                digests[section].update(line.encode("utf-8"))
+            trailer = {"end": True, "counts": counts, "sha256": {s: d.hexdigest() for s, d in digests.items()}}
+            f.write(json.dumps(trailer) + "\n")
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    return {"path": str(path), "engine": engine, "counts": counts}
+
+def _snapshot_lines(path):
+    """Yield the parsed header, then (line, record) for each record; checks format and version."""
+    with _snapshot_open(path, "rt") as f:
+        try:
+            header = json.loads(f.readline() or "null")
+        except ValueError:
+            header = None
+        if not isinstance(header, dict) or header.get("format") != SNAPSHOT_FORMAT:
+            raise ValueError(f"{path} is not a snapshot file")
+        if header.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"unsupported snapshot version {header.get('version')!r}")
+        yield header
+        for line in f:
+            yield line, json.loads(line)
+
+def verify_snapshot(path):
+    """Check a snapshot file's header, completeness, record counts and checksums; returns the header plus "counts"."""
+    counts, digests = {}, {}
+    trailer = None
+    try:
+        lines = _snapshot_lines(path)
+        header = next(lines)
+        for line, rec in lines:
+            if trailer is not None:
+                raise ValueError("data after the snapshot trailer")
+            if rec.get("end"):
+                trailer = rec
+                continue
+            section = rec["s"]
+            counts[section] = counts.get(section, 0) + 1
+            if section not in digests:
+                digests[section] = hashlib.sha256()
+            digests[section].update(line.encode("utf-8"))
+    except (EOFError, OSError, KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"snapshot {path} is unreadable: {e}") from e
+    if trailer is None:
+        raise ValueError(f"snapshot {path} is truncated (no trailer)")
+    if trailer.get("counts") != counts:
+        raise ValueError(f"snapshot {path}: record counts don't match the trailer")
+    for section, digest in digests.items():
+        if trailer.get("sha256", {}).get(section) != digest.hexdigest():
+            raise ValueError(f"snapshot {path}: checksum mismatch in {section}")
+    return dict(header, counts=counts)
+
+def _snapshot_records(path):
+    """(section, key, document) for each record of an already verified snapshot."""
+    lines = _snapshot_lines(path)
+    next(lines)
+    for _line, rec in lines:
+        if rec.get("end"):
+            return
+        yield rec["s"], rec["k"], rec["d"]
+
+def _snapshot_batches(path, batch_size):
+    """Records of a snapshot grouped into lists of up to batch_size records of one section."""
+    batch = []
+    for record in _snapshot_records(path):
+        if batch and (len(batch) >= batch_size or batch[0][0] != record[0]):
+            yield batch[0][0], batch
+            batch = []
+        batch.append(record)
+    if batch:
+        yield batch[0][0], batch
+
+def _restore_mongo(db, path, sections, batch_size):
+    for section in sections:
+        db[section].delete_many({})
+    for section, batch in _snapshot_batches(path, batch_size):
+        if section == "counters":
+            docs = [{"_id": k, "seq": d} for _s, k, d in batch]
+        elif section in ("roles", "departments"):
+            docs = [{"name": k} for _s, k, _d in batch]
+        elif _SECTION_KEYS[section] == "_id":
+            docs = [dict(d, _id=k) for _s, k, d in batch]
+        else:
+            docs = [d for _s, _k, d in batch]
+        db[section].insert_many(docs, ordered=False)
+    _bump_version(db)
+
+def _restore_sqlite(path, sections, batch_size):
+    # a single transaction: the store switches to the snapshot all at once
+    with _sqlite_transaction() as conn:
+        for section in sections:
+            conn.execute(f"DELETE FROM {section}")
+        for section, batch in _snapshot_batches(path, batch_size):
+            if section == "counters":
+                conn.executemany("INSERT OR REPLACE INTO counters (name, value) VALUES (?, ?)",
+                                 [(k, d) for _s, k, d in batch])
+                continue
+            columns = _sqlite_columns(section)
+            conn.executemany(f"INSERT OR REPLACE INTO {section} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                             [_sqlite_values(section, k, d) for _s, k, d in batch])
+        _sqlite_bump(conn)
+
+def _restore_json(path, sections):
+    # the JSON store lives in memory anyway; build it and write it out once
+    loaded = {section: {} for section in sections if section in _SECTION_KEYS}
+    counters = {}
+    for section, key, doc in _snapshot_records(path):
+        if section == "counters":
+            counters[key] = doc
+        elif section in loaded:
+            loaded[section][key] = doc
+    data = _data_from_documents(loaded)
+    if counters or "counters" in sections:
+        data["counters"] = counters
+    with _json_lock:
+        merged = dict(_json_view())
+        merged.update(data)
+        _compact_json(merged)
+
+def restore(path, batch_size=None):
+    """
+    Replace the active store's contents with a snapshot() file, after checking
+    it with verify_snapshot(). Records are written in batches of `batch_size`
+    (default SNAPSHOT_BATCH_SIZE or 1000). Returns {"engine", "counts"}.
+    MongoDB has no multi-collection transaction here: if a restore into it
+    fails part way, run it again.
+    """
+    header = verify_snapshot(path)
+    sections = [s for s in header.get("sections", []) if s in _SNAPSHOT_SECTIONS]
+    batch_size = _snapshot_batch_size(batch_size)
+    client = get_mongo_client()
+    if client is not None:
+        engine = "mongo"
+        _restore_mongo(get_db(client), path, sections, batch_size)
+    elif _engine() == "sqlite":
+        engine = "sqlite"
+        _restore_sqlite(path, sections, batch_size)
+    else:
+        engine = "json"
+        _restore_json(path, sections)
+    _invalidate_cache()
+    return {"engine": engine, "counts": header["counts"]}
 
 def init_db(migrate=False, overwrite=False):
     client = get_mongo_client()
@@ -336,11 +2807,35 @@ def init_db(migrate=False, overwrite=False):
 #     - items       : documents representing inventory items, fields:
 #                     id (int), department (string), type (consumable/non-consumable),
 #                     name (string), amount_needed (int), current_amount (int)
+#                     indexed on (department, name) with a case-insensitive collation (find_item_by_name)
+#     - reservations: documents keyed by id (int), indexed on status, department and item_id;
+#                     fields: item_id, item_name, department, user_email, created_on,
+#                     expected_restock_date, amount_to_refill, status[, fulfilled_on]
+#     - meta        : {"_id": "dataset", "version": n} bumped on every write (cache invalidation);
+#                     {"_id": "migration", ...} checkpoint of an unfinished migrate_json_to_mongo
+#     - counters    : {"_id": "items" | "reservations", "seq": n}, the last id handed out (allocate_ids)
 # - Environment variables:
 #     - MONGO_URI : your Atlas connection string (mongodb+srv://... or mongodb://...)
 #     - MONGO_DB  : optional override for the DB name (defaults to DEFAULT_DB_NAME)
+#     - MONGO_MAX_POOL_SIZE / MONGO_MIN_POOL_SIZE / MONGO_MAX_IDLE_MS : connection pool tuning
+#     - MONGO_SERVER_SELECTION_TIMEOUT_MS / MONGO_CONNECT_TIMEOUT_MS / MONGO_SOCKET_TIMEOUT_MS : timeouts
+#     - MONGO_BREAKER_FAILURES / MONGO_BREAKER_WINDOW / MONGO_BREAKER_PROBE_INTERVAL : circuit breaker
+#       (failures within the window that open it, seconds between background probes); see storage_status()
 # - Notes:
 #     - For mongodb+srv URIs, ensure dnspython is installed: py -m pip install dnspython
+#     - load_data() is cached in-process; the meta collection's "dataset" document holds a
+#       version bumped by every write so other workers notice staleness with one small query.
+#       DATA_CACHE_MAX_AGE (seconds, default 60, 0 disables) bounds how long a cache is trusted.
+#     - One MongoClient is created lazily per process and reused; close_mongo_client() releases it.
 #     - Users are keyed by email in the users collection to simplify lookups and upserts.
-#     - To migrate local data.json into MongoDB run: init_db(migrate=True)
+#     - Routers use AdminRepository/StaffRepository/ItemRepository/ReservationRepository for
+#       single-record reads and writes instead of load_data()/save_data().
+#     - DATA_ENGINE selects the store: "mongo" (default; JSON fallback when unreachable), "sqlite"
+#       (SQLITE_PATH, default data.sqlite3 next to this file) or "json".
+#     - Without MongoDB, data lives in data.json plus the append-only data.json.log; see
+#       _read_json_store(). DATA_WAL_MAX_RECORDS / DATA_WAL_MAX_BYTES control compaction.
+#     - snapshot(path) / restore(path) back up and restore the whole store (any engine) as one
+#       compressed JSON Lines file; SNAPSHOT_BATCH_SIZE / SNAPSHOT_GZIP_LEVEL tune them.
+#     - To migrate local data.json into MongoDB run: init_db(migrate=True). The file is streamed in
+#       MIGRATE_BATCH_SIZE (default 1000) document batches; an interrupted run resumes where it stopped.
 #     - If SRV DNS lookups fail, use Atlas "Standard" (non-SRV) connection string or verify cluster host.
\ No newline at end of file
@@ -1,7 +1,7 @@
 from data_store import load_data, save_data
 
 def manage_departments():
-    data = load_data()
+    data = load_data(sections=("departments",))
     while True:
         print("="*8, " Manage Departments ", "="*8)
         print("Current departments:", data["departments"])
@@ -0,0 +1,151 @@
+# Background imports.
+#
+# An upload saved to a file is handed to a small in-process thread pool and
+# the caller gets a job back at once; import_file()'s progress callback keeps
+# the job's counters current so it can be polled while it runs. Finished jobs
+# are kept for IMPORT_JOB_RETENTION seconds (default an hour), then dropped.
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from data_io import import_file
+
+DEFAULT_WORKERS = 2
+DEFAULT_RETENTION = 3600
+
+_jobs = {}
+_jobs_lock = threading.Lock()
+_executor = None
+
+def _env_number(name, default, convert=int):
+    try:
+        return max(convert(0), convert(os.environ.get(name, default)))
+    except ValueError:
+        return default
+
+def _iso(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat() if timestamp else None
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+class ImportJob:
+    """One import_file() run on a pool thread; to_dict() is its current state."""
+
+    def __init__(self, kind, path, fmt=None, filename=None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.path = path
+        self.format = fmt
+        self.filename = filename
+        self.status = "queued"  # queued / running / succeeded / failed / cancelled
+        self.message = None
+        self.submitted = time.time()
+        self.started = self.finished = None
+        self.rows = self.batches = 0
+        self.counts = {}
+        self._lock = threading.Lock()
+
+    def _progress(self, kind, batch, rows, totals):
+        with self._lock:
+            self.batches = batch
+            self.rows += rows
+            self.counts = totals
+
+    def run(self):
+        with self._lock:
+            if self.status != "queued":
+                return
+            self.status, self.started = "running", time.time()
+        try:
+            ok, message = import_file(self.kind, self.path, self.format, progress=self._progress)
+        except Exception as e:
+            ok, message = False, f"Import failed: {e}"
+        finally:
+            # the job owns its upload file
+            _remove(self.path)
+        self._finish("succeeded" if ok else "failed", message)
+
+    def cancel(self):
+        """Cancel the job if it hasn't started; returns whether it was cancelled."""
+        with self._lock:
+            if self.status != "queued":
+                return False
+            self.status, self.message, self.finished = "cancelled", "Cancelled before it started", time.time()
+        _remove(self.path)
+        return True
+
+    def _finish(self, status, message):
+        with self._lock:
+            self.status, self.message, self.finished = status, message, time.time()
+
+    def to_dict(self):
+        with self._lock:
+            elapsed = (self.finished or time.time()) - self.started if self.started else 0.0
+            return {
+                "id": self.id,
+                "kind": self.kind,
+                "format": self.format,
+                "filename": self.filename,
+                "status": self.status,
+                "message": self.message,
+                "submitted_at": _iso(self.submitted),
+                "started_at": _iso(self.started),
+                "finished_at": _iso(self.finished),
+                "batches": self.batches,
+                "rows": self.rows,
+                "added": self.counts.get("added", 0),
+                "updated": self.counts.get("updated", 0),
+                "invalid": self.counts.get("invalid", 0),
+                "duplicates": self.counts.get("duplicates", 0),
+                "elapsed_seconds": round(elapsed, 3),
+                "rows_per_second": round(self.rows / elapsed, 1) if elapsed > 0 else None,
+            }
+
+def _prune(now):
+    retention = _env_number("IMPORT_JOB_RETENTION", DEFAULT_RETENTION, float)
+    for job_id, job in list(_jobs.items()):
+        if job.finished and now - job.finished > retention:
+            del _jobs[job_id]
+
+def _pool():
+    global _executor
+    if _executor is None:
+        workers = max(1, _env_number("IMPORT_WORKERS", DEFAULT_WORKERS))
+        _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="import")
+    return _executor
+
+def submit_import(kind, path, fmt=None, filename=None):
+    """
+    Queue import_file(kind, path, fmt) on the import pool (IMPORT_WORKERS
+    threads, default 2) and return its ImportJob. The job deletes `path`
+    when it's done with it.
+    """
+    job = ImportJob(kind, path, fmt, filename)
+    with _jobs_lock:
+        _prune(time.time())
+        _jobs[job.id] = job
+        _pool().submit(job.run)
+    return job
+
+def get_import_job(job_id):
+    """The ImportJob with this id, or None if it's unknown or expired."""
+    with _jobs_lock:
+        _prune(time.time())
+        return _jobs.get(job_id)
+
+def shutdown_import_jobs():
+    """Cancel queued jobs and wait for running ones, so no import stops half way through a batch."""
+    global _executor
+    with _jobs_lock:
+        executor, _executor = _executor, None
+        queued = list(_jobs.values())
+    for job in queued:
+        job.cancel()
+    if executor is not None:
+        executor.shutdown(wait=True)
@@ -1,5 +1,6 @@
 import json
 import os
+import time
 import smtplib
 from email.message import EmailMessage
 from auth import register_user, login_user
@@ -7,8 +8,8 @@ from items import manage_items, send_depletion_email
 from staff import manage_staff
 from roles import manage_roles
 from departments import manage_departments
-from data_store import load_data as ds_load_data, save_data as ds_save_data
-from data_io import import_csv_file, export_csv_file
+from data_store import load_data as ds_load_data, save_data as ds_save_data, snapshot, restore
+from data_io import import_file, export_file
 
 DATA_FILE = "data.json"
 DEFAULT_ROLES_FILE = "default_roles.json"
@@ -45,7 +46,7 @@ def save_data(data):
 def admin_dashboard(logged_in_email):
     while True:
         # Refresh data each loop so notification is up-to-date
-        data = load_data()
+        data = ds_load_data(sections=("items",), projection=["id", "department", "name", "current_amount"])
         depleted = [it for it in data.get("items", []) if it.get("current_amount", 0) == 0]
         if depleted:
             print("="*8, " REFILL NOTICE ", "="*8)
@@ -62,8 +63,10 @@ def admin_dashboard(logged_in_email):
             3. Manage Roles
             4. Manage Departments
             5. Logout
-            6. Import Data (CSV)
-            7. Export Data (CSV)'''
+            6. Import Data (CSV, JSON Lines, Parquet, Arrow)
+            7. Export Data (CSV, JSON Lines, Parquet, Arrow)
+            8. Backup (snapshot)
+            9. Restore from snapshot'''
         )
         try:
             choice = int(input("Enter your choice: "))
@@ -79,17 +82,36 @@ def admin_dashboard(logged_in_email):
                 print("Logging out...")
                 break
             elif choice == 6:
-                print("Import kinds: items, staff, roles, departments")
+                print("Import kinds: items, staff, roles, departments, reservations")
                 kind = input("Enter kind to import: ").strip().lower()
-                path = input("Enter path to CSV file: ").strip()
-                ok, msg = import_csv_file(kind, path)
+                path = input("Enter path to file (.csv, .jsonl, .parquet or .arrow): ").strip()
+                ok, msg = import_file(kind, path)
                 print(msg)
             elif choice == 7:
-                print("Export kinds: items, staff, roles, departments")
+                print("Export kinds: items, staff, roles, departments, reservations")
                 kind = input("Enter kind to export: ").strip().lower()
-                path = input("Enter output filename (or press enter for default): ").strip() or None
-                ok, msg, fname = export_csv_file(kind, path)
+                path = input("Enter output filename (.csv, .jsonl, .parquet or .arrow; enter for a default CSV): ").strip() or None
+                ok, msg, fname = export_file(kind, path)
                 print(msg)
+            elif choice == 8:
+                path = input("Enter snapshot filename (or press enter for default): ").strip()
+                path = path or time.strftime("snapshot_%Y%m%d_%H%M%S.jsonl.gz")
+                try:
+                    result = snapshot(path)
+                    print(f"Snapshot written to {result['path']}: {result['counts']}")
+                except Exception as e:
+                    print("Snapshot failed:", e)
+            elif choice == 9:
+                path = input("Enter path to snapshot file: ").strip()
+                confirm = input("This replaces ALL current data. Type 'yes' to continue: ").strip().lower()
+                if confirm != "yes":
+                    print("Restore cancelled.")
+                    continue
+                try:
+                    result = restore(path)
+                    print(f"Restored {result['counts']} into {result['engine']}.")
+                except Exception as e:
+                    print("Restore failed:", e)
             else:
                 print("Invalid choice, please try again.")
         except ValueError:
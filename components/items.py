@@ -1,5 +1,5 @@
 from email.message import EmailMessage
-from data_store import load_data, save_data
+from data_store import load_data, save_data, ItemRepository, VersionConflict, find_item_by_name, allocate_ids
 import os
 import smtplib
 
@@ -8,7 +8,7 @@ from reservation import create_reservation_for_item, list_reservations
 
 def send_depletion_email(item, data=None):
     if data is None:
-        data = load_data()
+        data = load_data(sections=("admins",))
     admins = list(data.get("admins", {}).items())
     if not admins:
         print("No admin users found — cannot send depletion email.")
@@ -43,7 +43,7 @@ def send_depletion_email(item, data=None):
             print(f"Failed to send depletion email to {admin_email}: {e}")
 
 def item_used(current_user_email):
-    data = load_data()
+    data = load_data(sections=("admins", "staff"))
     staff = data.get("staff", {})
     if not current_user_email or current_user_email not in staff:
         print("Unable to determine your department. Contact admin.")
@@ -58,11 +58,10 @@ def item_used(current_user_email):
     if not name_query:
         print("Item name cannot be empty.")
         return
-    matches = [it for it in data.get("items", []) if it.get("department") == dept and it.get("name","").lower() == name_query.lower()]
-    if not matches:
+    item = find_item_by_name(dept, name_query)
+    if not item:
         print("Item not found in your department.")
         return
-    item = matches[0]
     try:
         used = int(input("Enter amount used (integer): "))
         if used <= 0:
@@ -72,26 +71,27 @@ def item_used(current_user_email):
         print("Invalid amount. Enter an integer.")
         return
 
-    if used >= item.get("current_amount", 0):
-        item["current_amount"] = 0
-        save_data(data)
+    item, just_depleted = ItemRepository().consume(item.get("id"), dept, used)
+    if item is None:
+        print("Item not found in your department.")
+        return
+    if item.get("current_amount", 0) == 0:
         print(f"Used {used}. Current amount for '{item['name']}' is now 0.")
         print(f"Stock for '{item['name']}' is empty — reservation is required.")
-        # send email and create automatic reservation
-        send_depletion_email(item, data=data)
-        ok, res = create_reservation_for_item(item.get("id"), current_user_email)
-        if ok:
-            print("Reservation created:", res)
-        else:
-            print("Reservation creation failed:", res)
+        if just_depleted:
+            # send email and create automatic reservation (once per depletion)
+            send_depletion_email(item, data=data)
+            ok, res = create_reservation_for_item(item.get("id"), current_user_email)
+            if ok:
+                print("Reservation created:", res)
+            else:
+                print("Reservation creation failed:", res)
     else:
-        item["current_amount"] = item.get("current_amount", 0) - used
-        save_data(data)
         print(f"Used {used}. New current amount for '{item['name']}' is {item['current_amount']}.")
 
 # manage_items remains unchanged (other modules call this)
 def manage_items(admin=False, current_user_email=None):
-    data = load_data()
+    data = load_data(sections=("staff", "departments", "items"))
     while True:
         print("="*8, " Manage Items ", "="*8)
         print("Current items:")
@@ -103,7 +103,7 @@ def manage_items(admin=False, current_user_email=None):
                 print("Unable to determine your department. Contact admin.")
                 return
             dept = staff[current_user_email].get("department")
-            items_to_show = [it for it in data.get("items", []) if it.get("department") == dept]
+            items_to_show = data.department_items(dept)
         if not items_to_show:
             print("  (no items)")
         else:
@@ -154,7 +154,7 @@ def manage_items(admin=False, current_user_email=None):
                 except ValueError:
                     print("Invalid amount. Enter an integer.")
                     continue
-                next_id = max([it.get("id", 0) for it in data.get("items", [])], default=0) + 1
+                next_id = allocate_ids("items")
                 item = {
                     "id": next_id,
                     "department": department,
@@ -172,7 +172,7 @@ def manage_items(admin=False, current_user_email=None):
                 except ValueError:
                     print("Invalid ID.")
                     continue
-                found = next((it for it in data.get("items", []) if it["id"] == iid), None)
+                found = data.items_by_id.get(iid)
                 if not found:
                     print("Item not found.")
                     continue
@@ -190,7 +190,7 @@ def manage_items(admin=False, current_user_email=None):
                 except ValueError:
                     print("Invalid ID.")
                     continue
-                item = next((it for it in data.get("items", []) if it["id"] == iid), None)
+                item = data.items_by_id.get(iid)
                 if not item:
                     print("Item not found.")
                     continue
@@ -204,7 +204,7 @@ def manage_items(admin=False, current_user_email=None):
                     print("Available departments:", data.get("departments", []))
                     new_dept = input("Enter new department (or press enter to keep): ").strip()
                     if new_dept:
-                        item["department"] = new_dept
+                        data.update_item(item, {"department": new_dept})
                         if new_dept not in data.get("departments", []):
                             data.setdefault("departments", []).append(new_dept)
                 new_type = input(f"Enter new type (consumable/non-consumable) or press enter to keep [{item['type']}]: ").strip().lower()
@@ -252,7 +252,7 @@ def manage_items(admin=False, current_user_email=None):
                 except ValueError:
                     print("Invalid ID.")
                     continue
-                item = next((it for it in data.get("items", []) if it["id"] == iid), None)
+                item = data.items_by_id.get(iid)
                 if not item:
                     print("Item not found.")
                     continue
@@ -273,7 +273,7 @@ def manage_items(admin=False, current_user_email=None):
                 except ValueError:
                     print("Invalid ID.")
                     continue
-                item = next((it for it in data.get("items", []) if it["id"] == iid), None)
+                item = data.items_by_id.get(iid)
                 if not item:
                     print("Item not found.")
                     continue
@@ -308,4 +308,7 @@ def manage_items(admin=False, current_user_email=None):
             else:
                 print("Invalid choice, please try again.")
         except ValueError:
-            print("Invalid input. Please enter a number.")
\ No newline at end of file
+            print("Invalid input. Please enter a number.")
+        except VersionConflict as e:
+            print(f"Not saved: {e}. Reloading items.")
+            data = load_data(sections=("staff", "departments", "items"))
\ No newline at end of file
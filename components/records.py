@@ -0,0 +1,130 @@
+# Typed records for items, staff and reservations.
+#
+# The stores keep plain documents; these are the in-process form handed to the
+# code that works with single records. Each class uses __slots__ (no per-object
+# __dict__), from_doc() normalizes numeric fields to int once, and to_doc()
+# builds a fresh document. Fields this module doesn't know about are kept in
+# `extra` so a round trip never drops data. A stored value that isn't a
+# number where one is expected is reported and replaced by the field's
+# default, so reading never fails and numeric fields always hold ints.
+
+def _to_int(value, default):
+    if value in (None, ""):
+        return default
+    return int(value)
+
+def _int(value):
+    return _to_int(value, 0)
+
+def _opt_int(value):
+    return _to_int(value, None)
+
+def _same(value):
+    return value
+
+class _Record:
+    __slots__ = ("extra",)
+    # (attribute, document field, converter, default) in document order
+    _fields = ()
+    # attribute holding the record's key; for staff it lives outside the document
+    _key_attr = "id"
+
+    def __init__(self, extra=None, **values):
+        for attr, field, convert, default in self._fields:
+            value = values.pop(attr, default)
+            if value is not None:
+                try:
+                    value = convert(value)
+                except (TypeError, ValueError):
+                    print(f"{type(self).__name__}: {field or attr} {value!r} is not a number, using {default!r}")
+                    value = default
+            setattr(self, attr, value)
+        if values:
+            raise TypeError(f"{type(self).__name__}: unknown fields {sorted(values)}")
+        self.extra = extra or None
+
+    @classmethod
+    def from_doc(cls, doc, key=None):
+        """Build a record from a stored document (`key` supplies the email for staff)."""
+        doc = dict(doc)
+        doc.pop("_id", None)
+        values = {attr: doc.pop(field) for attr, field, _c, _d in cls._fields if field in doc}
+        if key is not None:
+            values[cls._key_attr] = key
+        return cls(extra=doc, **values)
+
+    @classmethod
+    def of(cls, value):
+        """`value` as a record: records pass through, documents are converted."""
+        return value if isinstance(value, cls) else cls.from_doc(value)
+
+    @property
+    def key(self):
+        return getattr(self, self._key_attr)
+
+    def to_doc(self):
+        """The record as a new document; fields that are None are left out."""
+        doc = {}
+        for attr, field, _c, _d in self._fields:
+            value = getattr(self, attr)
+            if field is not None and value is not None:
+                doc[field] = value
+        if self.extra:
+            doc.update(self.extra)
+        return doc
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, a) == getattr(other, a) for a in self.__slots__) and self.extra == other.extra
+
+    def __repr__(self):
+        fields = ", ".join(f"{attr}={getattr(self, attr)!r}" for attr, _f, _c, _d in self._fields)
+        return f"{type(self).__name__}({fields})"
+
+class Item(_Record):
+    __slots__ = ("id", "department", "type", "name", "amount_needed", "current_amount", "version")
+    _fields = (
+        ("id", "id", _opt_int, None),
+        ("department", "department", _same, None),
+        ("type", "type", _same, None),
+        ("name", "name", _same, None),
+        ("amount_needed", "amount_needed", _int, 0),
+        ("current_amount", "current_amount", _int, 0),
+        ("version", "_v", _int, 0),
+    )
+
+    @property
+    def depleted(self):
+        return self.current_amount <= 0
+
+class StaffMember(_Record):
+    __slots__ = ("email", "name", "password", "role", "department", "type", "version")
+    # the email is the record's key (the Mongo _id), not a document field
+    _fields = (
+        ("email", None, _same, None),
+        ("name", "name", _same, None),
+        ("password", "password", _same, None),
+        ("role", "role", _same, None),
+        ("department", "department", _same, None),
+        ("type", "type", _same, "staff"),
+        ("version", "_v", _int, 0),
+    )
+    _key_attr = "email"
+
+class Reservation(_Record):
+    __slots__ = ("id", "item_id", "item_name", "department", "user_email", "created_on",
+                 "expected_restock_date", "amount_to_refill", "status", "fulfilled_on", "version")
+    _fields = (
+        ("id", "id", _opt_int, None),
+        ("item_id", "item_id", _opt_int, None),
+        ("item_name", "item_name", _same, None),
+        ("department", "department", _same, None),
+        ("user_email", "user_email", _same, None),
+        ("created_on", "created_on", _same, None),
+        ("expected_restock_date", "expected_restock_date", _same, None),
+        ("amount_to_refill", "amount_to_refill", _int, 0),
+        ("status", "status", _same, "pending"),  # pending / fulfilled / cancelled
+        ("fulfilled_on", "fulfilled_on", _same, None),
+        ("version", "_v", _int, 0),
+    )
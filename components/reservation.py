@@ -1,6 +1,7 @@
 from datetime import date, timedelta
 import math
-from data_store import load_data, save_data
+from data_store import load_data, ItemRepository, ReservationRepository, VersionConflict, CONFLICT_RETRIES, allocate_ids
+from records import Item, Reservation
 
 # new imports for email
 import os
@@ -12,19 +13,20 @@ def _default_daily_usage(item):
     Estimate a default daily usage if no real usage metric is available.
     Use amount_needed/7 (one-week turnover) rounded up, at least 1.
     """
-    amt = item.get("amount_needed", 0) or 0
+    amt = Item.of(item).amount_needed
     est = max(1, math.ceil(amt / 7)) if amt > 0 else 1
     return est
 
 def estimate_depletion_date(item, daily_usage=None):
     """
     Estimate the date when current_amount will reach zero.
-    item: dict with keys 'current_amount' (int)
+    item: Item (or an item dict)
     daily_usage: optional int (units/day). If None, a heuristic is used.
     Returns a date object (today if already depleted).
     """
+    item = Item.of(item)
     today = date.today()
-    current = int(item.get("current_amount", 0) or 0)
+    current = item.current_amount
     if current <= 0:
         return today
     rate = int(daily_usage) if daily_usage and int(daily_usage) > 0 else _default_daily_usage(item)
@@ -38,21 +40,16 @@ def estimate_refill_date_to_target(item, target_amount=None, daily_usage=None):
     Returns date object when current_amount will fall below target (i.e., when refill needed),
     and amount_to_refill (target - current if positive).
     """
+    item = Item.of(item)
     today = date.today()
-    target = int(target_amount) if target_amount is not None else int(item.get("amount_needed", 0) or 0)
-    current = int(item.get("current_amount", 0) or 0)
+    target = int(target_amount) if target_amount is not None else item.amount_needed
+    current = item.current_amount
     if current >= target:
         # Enough stock for now; compute depletion date instead
         return estimate_depletion_date(item, daily_usage), max(0, target - current)
     # amount short now -> needs refill immediately
     return today, max(0, target - current)
 
-def _next_reservation_id(data):
-    res = data.get("reservations", [])
-    if not res:
-        return 1
-    return max(r.get("id", 0) for r in res) + 1
-
 def _send_reservation_email(reservation, data=None):
     """
     Send email to all admins notifying about the reservation.
@@ -60,7 +57,7 @@ def _send_reservation_email(reservation, data=None):
     Subject: "Item Reservation"
     """
     if data is None:
-        data = load_data()
+        data = load_data(sections=("admins", "staff"))
     admins = list(data.get("admins", {}).items())
     if not admins:
         # no admins configured
@@ -115,36 +112,30 @@ def create_reservation_for_item(item_id, user_email, daily_usage=None, target_am
     - Finds item by id
     - Computes expected_restock_date (when current_amount depletes) using daily_usage or heuristic
     - Computes amount_to_refill = max(0, target_amount - current_amount) where target_amount defaults to amount_needed
-    - Saves reservation into data['reservations']
+    - Allocates its id from the reservations counter and stores it
     Returns (True, reservation_dict) on success, (False, message) on failure.
     """
-    data = load_data()
-    items = data.get("items", [])
-    item = next((it for it in items if int(it.get("id", 0)) == int(item_id)), None)
+    data = load_data(sections=("admins", "staff"))
+    item = ItemRepository().get_record(int(item_id))
     if item is None:
         return False, f"Item id {item_id} not found."
 
     # estimate depletion
     depletion_date = estimate_depletion_date(item, daily_usage)
     # estimate amount to refill to reach target
-    target = int(target_amount) if target_amount is not None else int(item.get("amount_needed", 0) or 0)
-    current = int(item.get("current_amount", 0) or 0)
-    amount_to_refill = max(0, target - current)
-
-    reservation = {
-        "id": _next_reservation_id(data),
-        "item_id": int(item_id),
-        "item_name": item.get("name"),
-        "department": item.get("department"),
-        "user_email": user_email,
-        "created_on": date.today().isoformat(),
-        "expected_restock_date": depletion_date.isoformat(),
-        "amount_to_refill": amount_to_refill,
-        "status": "pending"  # pending / fulfilled / cancelled
-    }
-
-    data.setdefault("reservations", []).append(reservation)
-    save_data(data)
+    target = int(target_amount) if target_amount is not None else item.amount_needed
+    amount_to_refill = max(0, target - item.current_amount)
+
+    reservation = ReservationRepository().put_record(Reservation(
+        id=allocate_ids("reservations"),
+        item_id=item.id,
+        item_name=item.name,
+        department=item.department,
+        user_email=user_email,
+        created_on=date.today().isoformat(),
+        expected_restock_date=depletion_date.isoformat(),
+        amount_to_refill=amount_to_refill,
+    )).to_doc()
 
     # send notification email to admins (best-effort)
     try:
@@ -158,31 +149,40 @@ def list_reservations(status=None, department=None):
     """
     Return list of reservations, optionally filtered by status or department.
     """
-    data = load_data()
-    res = data.get("reservations", [])
+    query = {}
     if status:
-        res = [r for r in res if r.get("status") == status]
+        query["status"] = status
     if department:
-        res = [r for r in res if r.get("department") == department]
-    return res
+        query["department"] = department
+    return ReservationRepository().find(query)
 
 def fulfill_reservation(reservation_id):
     """
     Mark a reservation as fulfilled and (optionally) update item current_amount to amount_needed.
-    Returns (True, reservation) or (False, message).
+    Returns (True, reservation) or (False, message). Raises VersionConflict if
+    the reservation changed under each of CONFLICT_RETRIES attempts.
     """
-    data = load_data()
-    res_list = data.get("reservations", [])
-    r = next((x for x in res_list if x.get("id", int(reservation_id))), None)
-    if not r:
-        return False, "Reservation not found."
-    if r.get("status") != "pending":
-        return False, "Reservation not pending."
+    reservations = ReservationRepository()
+    for attempt in range(CONFLICT_RETRIES):
+        r = reservations.get_record(int(reservation_id))
+        if not r:
+            return False, "Reservation not found."
+        if r.status != "pending":
+            return False, "Reservation not pending."
+        try:
+            # claim the reservation first: of two concurrent fulfills only one gets past this
+            doc = reservations.update_fields(r.id, {"status": "fulfilled", "fulfilled_on": date.today().isoformat()},
+                                             expected_version=r.version)
+            if doc is None:
+                return False, "Reservation not found."
+            break
+        except VersionConflict:
+            # re-read; it may have been fulfilled or cancelled meanwhile
+            if attempt == CONFLICT_RETRIES - 1:
+                raise
     # find item and refill to amount_needed
-    item = next((it for it in data.get("items", []) if int(it.get("id", 0)) == int(r.get("item_id"))), None)
+    items = ItemRepository()
+    item = items.get_record(r.item_id)
     if item:
-        item["current_amount"] = int(item.get("amount_needed", item.get("current_amount", 0)) or 0)
-    r["status"] = "fulfilled"
-    r["fulfilled_on"] = date.today().isoformat()
-    save_data(data)
-    return True, r
\ No newline at end of file
+        items.update_fields(item.id, {"current_amount": item.amount_needed})
+    return True, doc
\ No newline at end of file
@@ -1,7 +1,7 @@
 from data_store import load_data, save_data
 
 def manage_roles():
-    data = load_data()
+    data = load_data(sections=("roles",))
     while True:
         print("="*8, " Manage Roles ", "="*8)
         print("Current roles:", data["roles"])
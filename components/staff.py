@@ -1,7 +1,7 @@
-from data_store import load_data, save_data
+from data_store import load_data, save_data, VersionConflict
 
 def manage_staff(admin=False):
-    data = load_data()
+    data = load_data(sections=("admins", "staff", "roles", "departments"))
     while True:
         print("="*8, " Manage Staff ", "="*8)
         if admin:
@@ -69,6 +69,9 @@ def manage_staff(admin=False):
                 print("Invalid choice, please try again.")
         except ValueError:
             print("Invalid input. Please enter a number.")
+        except VersionConflict as e:
+            print(f"Not saved: {e}. Reloading staff.")
+            data = load_data(sections=("admins", "staff", "roles", "departments"))
 
 def update_staff_admin(data, email):
     user = data["staff"][email]
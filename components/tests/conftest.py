@@ -0,0 +1,35 @@
+import sys
+from pathlib import Path
+import pytest
+
+# the modules live flat in components/ and import each other by name
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import data_store
+import async_data_store
+
+@pytest.fixture(params=["json", "sqlite", "mongo"])
+def engine(request, tmp_path, monkeypatch):
+    monkeypatch.setattr(data_store, "DATA_JSON", tmp_path / "data.json")
+    monkeypatch.delenv("MONGO_URI", raising=False)
+    monkeypatch.setenv("DATA_ENGINE", request.param)
+    if request.param == "sqlite":
+        monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "data.sqlite3"))
+        monkeypatch.setattr(data_store._sqlite_local, "conn", None, raising=False)
+    elif request.param == "mongo":
+        mongomock = pytest.importorskip("mongomock")
+        client = mongomock.MongoClient()
+        monkeypatch.setenv("MONGO_URI", "mongodb://localhost")
+        monkeypatch.setattr(data_store, "MongoClient", lambda *a, **k: client)
+        # motor reads go to the same mock (without mongomock_motor: to worker threads)
+        try:
+            import mongomock_motor
+            motor = lambda *a, **k: mongomock_motor.AsyncMongoMockClient(mock_mongo_client=client)
+        except ImportError:
+            motor = None
+        monkeypatch.setattr(async_data_store, "AsyncIOMotorClient", motor)
+    data_store._invalidate_cache()
+    yield request.param
+    async_data_store.close_motor_client()
+    data_store.close_mongo_client()
+    data_store._invalidate_cache()
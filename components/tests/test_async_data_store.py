@@ -0,0 +1,66 @@
+# async_data_store reads through motor (mongomock_motor here) and runs every
+# write through data_store's implementation, so both behave the same.
+import asyncio
+import pytest
+import data_store
+import async_data_store as ads
+from data_store import load_data, ItemRepository, VersionConflict
+
+@pytest.fixture
+def store(engine):
+    ItemRepository().put_many([(1, _item(1, 5)), (2, _item(2, 5))])
+    return engine
+
+def _item(iid, amount):
+    return {"id": iid, "department": "Gym", "type": "consumable", "name": f"Item {iid}",
+            "amount_needed": 5, "current_amount": amount}
+
+def _stored_items():
+    data_store._invalidate_cache()
+    return {it["id"]: it for it in load_data(sections=("items",))["items"]}
+
+def test_consume_decrements_once(store):
+    repo = ads.AsyncItemRepository()
+    item, depleted = asyncio.run(repo.consume(1, "Gym", 2))
+    assert (item["current_amount"], depleted) == (3, False)
+    item, depleted = asyncio.run(repo.consume(1, "Gym", 9))
+    assert (item["current_amount"], depleted) == (0, True)
+    assert asyncio.run(repo.consume(1, "Gym", 1))[1] is False
+    stored = _stored_items()[1]
+    assert stored["current_amount"] == 0 and stored["_v"] == 3
+
+def test_update_fields_checks_the_version(store):
+    repo = ads.AsyncItemRepository()
+    version = asyncio.run(repo.get(1))["_v"]
+    assert asyncio.run(repo.update_fields(1, {"name": "Bands"}, expected_version=version))["name"] == "Bands"
+    with pytest.raises(VersionConflict):
+        asyncio.run(repo.update_fields(1, {"name": "Mats"}, expected_version=version))
+    assert asyncio.run(repo.find_by_name("Gym", "Bands"))["id"] == 1
+
+def test_reads_match_the_sync_store(store):
+    repo, sync = ads.AsyncItemRepository(), ItemRepository()
+    assert asyncio.run(repo.get(2)) == sync.get(2)
+    assert asyncio.run(repo.find({"department": "Gym"}, projection=["id"])) == [{"id": 1}, {"id": 2}]
+    assert [it.id for it in asyncio.run(repo.find_records({"id": 1}))] == [1]
+    assert asyncio.run(repo.get(9)) is None
+    data = asyncio.run(ads.load_data(sections=("items",)))
+    assert sorted(data.items_by_id) == [1, 2] and data.base["items"].keys() == {1, 2}
+
+def test_stale_save_keeps_records_added_since(store):
+    data = asyncio.run(ads.load_data(sections=("items", "roles")))
+    ItemRepository().put(3, _item(3, 5))
+    data.update_item(data.items_by_id[1], {"current_amount": 4})
+    data["roles"].append("Coach")
+    asyncio.run(ads.save_data(data))
+    stored = _stored_items()
+    assert sorted(stored) == [1, 2, 3] and stored[1]["current_amount"] == 4
+    assert "Coach" in load_data(sections=("roles",))["roles"]
+
+def test_reads_fall_back_to_data_store_when_motor_fails(store, monkeypatch):
+    if store != "mongo":
+        pytest.skip("motor is only used with MongoDB")
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    async def down(*args, **kwargs):
+        raise RuntimeError("down")
+    monkeypatch.setattr(mongomock_motor.AsyncMongoMockCollection, "find_one", down)
+    assert asyncio.run(ads.AsyncItemRepository().get(2))["current_amount"] == 5
@@ -0,0 +1,85 @@
+# load_data() serves sections from an in-process cache while the stored
+# version matches; writes by this process keep it current, writes by another
+# worker (which bump the version) make the next load read the store again.
+import json
+import pytest
+import data_store
+from data_store import load_data, ItemRepository
+
+def _item(iid, amount=5):
+    return {"id": iid, "department": "Gym", "type": "consumable", "name": f"Item {iid}",
+            "amount_needed": 5, "current_amount": amount}
+
+@pytest.fixture
+def fetches(engine, monkeypatch):
+    if engine == "json":
+        pytest.skip("the JSON engine caches by file modification instead")
+    calls = []
+    for name in ("_fetch_section", "_sqlite_fetch_section"):
+        fetch = getattr(data_store, name)
+        def counting(conn, section, *args, fetch=fetch):
+            calls.append(section)
+            return fetch(conn, section, *args)
+        monkeypatch.setattr(data_store, name, counting)
+    ItemRepository().put(1, _item(1))
+    return calls
+
+def _other_worker_writes(engine, doc):
+    """Write `doc` straight to the store and bump the version, as another process would."""
+    if engine == "mongo":
+        db = data_store.get_db()
+        db["items"].insert_one(dict(doc))
+        db.meta.update_one({"_id": "dataset"}, {"$inc": {"version": 1}}, upsert=True)
+    else:
+        with data_store._sqlite_transaction() as conn:
+            data_store._sqlite_put(conn, "items", doc["id"], doc)
+            data_store._sqlite_bump(conn)
+
+def _ids():
+    return sorted(load_data(sections=("items",)).items_by_id)
+
+def test_second_load_is_served_from_the_cache(fetches):
+    assert _ids() == [1]
+    fetches.clear()
+    assert _ids() == [1]
+    assert fetches == []
+
+def test_own_writes_keep_the_cache_current(fetches):
+    _ids()
+    fetches.clear()
+    ItemRepository().put(2, _item(2))
+    ItemRepository().update_fields(1, {"current_amount": 1})
+    data = load_data(sections=("items",))
+    assert sorted(data.items_by_id) == [1, 2] and data.items_by_id[1]["current_amount"] == 1
+    assert fetches == []
+
+def test_another_workers_write_invalidates_the_cache(fetches, engine):
+    _ids()
+    _other_worker_writes(engine, _item(2))
+    fetches.clear()
+    assert _ids() == [1, 2]
+    assert fetches == ["items"]
+
+def test_callers_get_copies(fetches):
+    data = load_data(sections=("items",))
+    data.items_by_id[1]["current_amount"] = 0
+    data["items"].append(_item(2))
+    again = load_data(sections=("items",))
+    assert sorted(again.items_by_id) == [1] and again.items_by_id[1]["current_amount"] == 5
+
+def test_max_age_zero_disables_the_cache(fetches, monkeypatch):
+    monkeypatch.setenv("DATA_CACHE_MAX_AGE", "0")
+    _ids()
+    fetches.clear()
+    _ids()
+    assert fetches == ["items"]
+
+def test_json_store_changed_on_disk_is_reread(engine):
+    if engine != "json":
+        pytest.skip("JSON engine")
+    ItemRepository().put(1, _item(1))
+    assert _ids() == [1]
+    # another process folds its writes into data.json
+    data_store.DATA_JSON.write_text(json.dumps({"items": [_item(1), _item(2)]}), encoding="utf-8")
+    data_store._wal_path().unlink(missing_ok=True)
+    assert _ids() == [1, 2]
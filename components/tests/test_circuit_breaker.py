@@ -0,0 +1,76 @@
+# The MongoDB circuit breaker opens after MONGO_BREAKER_FAILURES connection
+# failures within MONGO_BREAKER_WINDOW seconds, sends calls to the fallback
+# store while open and closes again once a background probe succeeds.
+import time
+import pytest
+import data_store
+from data_store import CircuitBreaker
+from pymongo.errors import AutoReconnect, OperationFailure
+
+@pytest.fixture(autouse=True)
+def settings(monkeypatch):
+    monkeypatch.setenv("MONGO_BREAKER_FAILURES", "2")
+    monkeypatch.setenv("MONGO_BREAKER_WINDOW", "30")
+    monkeypatch.setenv("MONGO_BREAKER_PROBE_INTERVAL", "0.1")
+
+def _wait_for(condition, timeout=3):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.02)
+
+def test_opens_after_repeated_failures():
+    breaker = CircuitBreaker("test", lambda: False)
+    breaker.record_failure(AutoReconnect("down"))
+    assert breaker.allow()
+    breaker.record_failure(AutoReconnect("down"))
+    assert not breaker.allow() and not breaker.allow()
+    status = breaker.status()
+    assert (status["opened"], status["failures"], status["short_circuited"]) == (1, 2, 2)
+    assert status["last_error"] == "down"
+
+def test_failures_outside_the_window_do_not_add_up(monkeypatch):
+    monkeypatch.setenv("MONGO_BREAKER_WINDOW", "0")
+    breaker = CircuitBreaker("test", lambda: False)
+    breaker.record_failure(AutoReconnect("down"))
+    time.sleep(0.01)
+    breaker.record_failure(AutoReconnect("down"))
+    assert breaker.allow()
+
+def test_successful_probe_closes_the_breaker():
+    probes = []
+    def probe():
+        probes.append(time.monotonic())
+        # the first probe fails, the second one succeeds
+        return len(probes) > 1
+    breaker = CircuitBreaker("test", probe)
+    breaker.trip("connection failed")
+    assert breaker.status()["state"] == CircuitBreaker.OPEN
+    _wait_for(lambda: breaker.status()["state"] == CircuitBreaker.CLOSED)
+    assert len(probes) == 2 and breaker.allow()
+    states = [t["to"] for t in breaker.status()["transitions"]]
+    assert states == ["open", "half-open", "open", "half-open", "closed"]
+
+def test_probe_errors_keep_it_open():
+    def probe():
+        raise AutoReconnect("still down")
+    breaker = CircuitBreaker("test", probe)
+    breaker.trip("connection failed")
+    _wait_for(lambda: breaker.status()["failures"] >= 2)
+    assert not breaker.allow() and breaker.status()["last_error"] == "still down"
+
+def test_open_breaker_sends_calls_to_the_fallback(engine, monkeypatch):
+    if engine != "mongo":
+        pytest.skip("MongoDB breaker")
+    breaker = CircuitBreaker("mongo", lambda: False)
+    monkeypatch.setattr(data_store, "_breaker", breaker)
+    data_store.ItemRepository().put(1, {"id": 1, "name": "in mongo"})
+    data_store._mongo_failed(OperationFailure("bad query"))
+    data_store._mongo_failed(OperationFailure("bad query"))
+    assert breaker.allow(), "only connection failures count"
+    data_store.close_mongo_client()
+    breaker.trip("connection failed")
+    assert data_store.get_mongo_client() is None
+    # served by data.json until the probe reconnects
+    assert data_store.ItemRepository().get(1) is None
+    assert data_store.storage_status()["mongo_breaker"]["state"] == "open"
@@ -0,0 +1,48 @@
+# ItemRepository.consume() takes stock in one conditional update: concurrent
+# uses never take more than there is, and exactly one of them reports the
+# item as just depleted.
+import threading
+import pytest
+from data_store import ItemRepository
+
+@pytest.fixture
+def repo(engine):
+    repo = ItemRepository()
+    repo.put(1, {"id": 1, "department": "Gym", "type": "consumable", "name": "Bands",
+                 "amount_needed": 5, "current_amount": 5})
+    return repo
+
+def test_consume_clamps_at_zero(repo):
+    item, depleted = repo.consume(1, "Gym", 3)
+    assert (item["current_amount"], depleted) == (2, False)
+    item, depleted = repo.consume(1, "Gym", 9)
+    assert (item["current_amount"], depleted) == (0, True)
+    # already empty: nothing changes and nobody is told again
+    version = repo.get(1)["_v"]
+    item, depleted = repo.consume(1, "Gym", 1)
+    assert (item["current_amount"], depleted) == (0, False)
+    assert repo.get(1)["_v"] == version
+
+def test_consume_needs_the_items_department(repo):
+    assert repo.consume(1, "Pool", 1) == (None, False)
+    assert repo.consume(2, "Gym", 1) == (None, False)
+    with pytest.raises(ValueError):
+        repo.consume(1, "Gym", 0)
+    assert repo.get(1)["current_amount"] == 5
+
+def test_concurrent_consumers_deplete_once(repo, engine):
+    if engine == "mongo":
+        pytest.skip("mongomock's updates aren't atomic across threads")
+    results = []
+    start = threading.Barrier(8)
+    def use():
+        start.wait()
+        results.append(repo.consume(1, "Gym", 1))
+    threads = [threading.Thread(target=use) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sum(depleted for _item, depleted in results) == 1
+    assert sorted(item["current_amount"] for item, _ in results) == [0, 0, 0, 0, 1, 2, 3, 4]
+    assert repo.get(1)["current_amount"] == 0
@@ -0,0 +1,56 @@
+# CSV exports are streamed from the store in chunks (the header first) and
+# served by the API without writing anything to disk.
+import csv
+import io
+import os
+from fastapi.testclient import TestClient
+from data_io import iter_csv_export, export_file, import_file
+from data_store import ItemRepository, StaffRepository
+
+def _fill(count=30):
+    ItemRepository().put_many([(i, {"id": i, "department": "Gym", "type": "consumable", "name": f"Item, {i}",
+                                    "amount_needed": 5, "current_amount": i % 5}) for i in range(1, count + 1)])
+
+def _rows(text):
+    return list(csv.reader(io.StringIO(text)))
+
+def test_chunks_start_with_the_header(engine):
+    _fill()
+    chunks = list(iter_csv_export("items", chunk_size=200))
+    assert chunks[0] == "id,department,type,name,amount_needed,current_amount\r\n"
+    assert len(chunks) > 3 and all(len(c) >= 200 for c in chunks[1:-1])
+    rows = _rows("".join(chunks))
+    assert len(rows) == 31 and rows[1] == ["1", "Gym", "consumable", "Item, 1", "5", "1"]
+
+def test_staff_export_has_the_email_column(engine):
+    StaffRepository().put("a@x.com", {"name": "A", "password": "p", "role": "PT", "department": "Gym", "type": "staff"})
+    assert _rows("".join(iter_csv_export("staff"))) == [
+        ["email", "name", "password", "role", "department", "type"], ["a@x.com", "A", "p", "PT", "Gym", "staff"]]
+
+def test_export_file_round_trips(engine, tmp_path):
+    _fill(3)
+    path = tmp_path / "items.csv"
+    ok, message, filename = export_file("items", str(path))
+    assert ok and filename == str(path)
+    ItemRepository().update_fields(2, {"current_amount": 0})
+    ok, message = import_file("items", str(path), progress=lambda *a: None)
+    assert ok and "0 added, 3 updated" in message
+    assert ItemRepository().get(2)["current_amount"] == 2
+
+def test_api_streams_without_temp_files(engine, tmp_path, monkeypatch):
+    from backend.main import app
+    _fill()
+    cwd = tmp_path / "cwd"
+    cwd.mkdir()
+    monkeypatch.chdir(cwd)
+    client = TestClient(app)
+    response = client.get("/items/export", params={"kind": "items", "gzip": "false"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.headers["content-disposition"].startswith('attachment; filename="items_')
+    assert len(_rows(response.text)) == 31
+    zipped = client.get("/items/export", params={"kind": "items", "gzip": "true"})
+    # the test client undoes the content-encoding
+    assert zipped.headers["content-encoding"] == "gzip" and zipped.text == response.text
+    assert os.listdir(cwd) == []
+    assert client.get("/items/export", params={"kind": "widgets"}).status_code == 400
@@ -0,0 +1,95 @@
+# CSV imports are streamed: rows are read, validated and written a batch at a
+# time, invalid rows are skipped and reported by line number.
+import pytest
+import data_store
+from data_io import import_file, import_csv_file
+from data_store import load_data, ItemRepository, allocate_ids
+
+ITEMS = "id,department,type,name,amount_needed,current_amount\n"
+
+def _write(tmp_path, text, name="import.csv"):
+    path = tmp_path / name
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+def _items():
+    data_store._invalidate_cache()
+    return {it["id"]: it for it in load_data(sections=("items",))["items"]}
+
+def test_rows_are_written_batch_by_batch(engine, tmp_path):
+    path = _write(tmp_path, ITEMS + "".join(f",Gym,consumable,Item {i},5,{i}\n" for i in range(5)))
+    seen = []
+    def progress(kind, batch, rows, totals):
+        # each batch is stored before the next one is read
+        seen.append((batch, rows, totals["added"], len(_items())))
+    ok, message = import_file("items", path, batch_size=2, progress=progress)
+    assert ok and message == "Imported items: 5 added, 0 updated."
+    assert seen == [(1, 2, 2, 2), (2, 2, 4, 4), (3, 1, 5, 5)]
+    assert sorted(it["name"] for it in _items().values()) == [f"Item {i}" for i in range(5)]
+
+def test_invalid_rows_are_skipped_and_reported(engine, tmp_path):
+    path = _write(tmp_path, ITEMS + "1,Gym,consumable,Bands,5,5\nx,Gym,consumable,Mats,5,5\n"
+                                    "3,Gym,consumable,Tape,-1,5\n4,Gym,consumable,Gel,2,\n")
+    ok, message = import_file("items", path, batch_size=2, progress=lambda *a: None)
+    assert ok
+    assert message == ("Imported items: 2 added, 0 updated. Skipped 2 invalid row(s): line 3: invalid id 'x'; "
+                       "line 4: invalid amount: amount_needed must not be negative.")
+    items = _items()
+    assert sorted(items) == [1, 4] and items[4]["current_amount"] == 2
+
+def test_explicit_ids_move_the_counter(engine, tmp_path):
+    path = _write(tmp_path, ITEMS + "40,Gym,consumable,Bands,5,5\n,Gym,consumable,Mats,5,5\n")
+    assert import_file("items", path, progress=lambda *a: None)[0]
+    assert sorted(_items()) == [40, 41]
+    assert allocate_ids("items") == 42
+
+def test_staff_import_adds_roles_and_departments(engine, tmp_path):
+    path = _write(tmp_path, "email,name,password,role,department\n"
+                            "a@x.com,A,p,Coach,Pool\nb@x.com,B,p,Head,Office\n,C,p,PT,Gym\n")
+    ok, message = import_file("staff", path, progress=lambda *a: None)
+    assert ok and "2 added, 0 updated" in message and "line 4: missing email" in message
+    data = load_data(sections=("staff", "roles", "departments"))
+    # staff can't be Head or in the Office
+    assert data["staff"]["b@x.com"]["role"] == "Default Role"
+    assert {"Coach", "Default Role"} <= set(data["roles"])
+    assert {"Pool", "Default Department"} <= set(data["departments"])
+
+def test_reservation_import_checks_fields(engine, tmp_path):
+    path = _write(tmp_path, "id,item_id,status,created_on\n1,3,pending,2024-01-02\n2,3,lost,\n3,,pending,\n4,3,,2024-13-01\n")
+    ok, message = import_file("reservations", path, progress=lambda *a: None)
+    assert ok and "1 added" in message
+    assert "line 3: invalid status 'lost'" in message and "line 4: missing item_id" in message
+    assert "line 5: invalid created_on '2024-13-01'" in message
+
+def test_failing_batch_keeps_earlier_batches(engine, tmp_path, monkeypatch):
+    path = _write(tmp_path, ITEMS + "".join(f"{i},Gym,consumable,Item {i},5,5\n" for i in range(1, 6)))
+    put_many = ItemRepository.put_many
+    def failing(self, pairs):
+        pairs = list(pairs)
+        if pairs[0][0] == 3:
+            raise RuntimeError("disk full")
+        return put_many(self, pairs)
+    monkeypatch.setattr(ItemRepository, "put_many", failing)
+    ok, message = import_file("items", path, batch_size=2, progress=lambda *a: None)
+    assert not ok and message == "Import stopped: disk full (2 added, 0 updated before the error)"
+    assert sorted(_items()) == [1, 2]
+
+def test_unusable_requests(engine, tmp_path):
+    assert import_file("widgets", "x.csv") == (False, "Unsupported kind 'widgets'. Supported: "
+                                                      "('items', 'staff', 'roles', 'departments', 'reservations')")
+    assert import_file("items", str(tmp_path / "missing.csv"))[1].startswith("File not found")
+    path = _write(tmp_path, "name\nCoach\n\xff\n", name="roles.txt")
+    # import_csv_file reads CSV whatever the extension
+    assert import_csv_file("roles", path, progress=lambda *a: None)[0]
+    bad = tmp_path / "bad.csv"
+    bad.write_bytes(b"name\n\xff\xfe\n")
+    ok, message = import_file("roles", str(bad), progress=lambda *a: None)
+    assert not ok and message.startswith("Failed to read CSV")
+
+@pytest.mark.parametrize("batch_size", [1, 3, 1000])
+def test_batch_size_does_not_change_the_result(engine, tmp_path, batch_size):
+    rows = "".join(f",Gym,consumable,Item {i % 4},5,{i}\n" for i in range(10))
+    ok, message = import_file("items", _write(tmp_path, ITEMS + rows), batch_size=batch_size, progress=lambda *a: None)
+    assert ok and "4 added, 6 updated" in message
+    assert sorted((it["name"], it["current_amount"]) for it in _items().values()) == [
+        ("Item 0", 8), ("Item 1", 9), ("Item 2", 6), ("Item 3", 7)]
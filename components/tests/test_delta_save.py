@@ -0,0 +1,55 @@
+# save_data() diffs each section against the state it was loaded with and
+# writes only the documents that changed, one bulk_write per collection.
+import pytest
+import data_store
+from data_store import load_data, save_data, ItemRepository, _section_changes
+
+def _item(iid, amount=5):
+    return {"id": iid, "department": "Gym", "type": "consumable", "name": f"Item {iid}",
+            "amount_needed": 5, "current_amount": amount}
+
+def test_section_changes():
+    base = {1: dict(_item(1), _v=1), 2: dict(_item(2), _v=1), 3: dict(_item(3), _v=4)}
+    current = {1: dict(base[1]), 2: dict(_item(2, 1), _v=1), 4: _item(4)}
+    deleted, changed, expected = _section_changes("items", current, base)
+    assert deleted == [3]
+    assert sorted(changed) == [2, 4]
+    assert expected == {3: 4, 2: 1, 4: None}
+    assert (changed[2]["_v"], changed[4]["_v"]) == (2, 1)
+
+def test_unversioned_section_changes():
+    deleted, changed, expected = _section_changes("roles", {"Coach": "Coach"}, {"PT": "PT"})
+    assert (deleted, list(changed), expected) == (["PT"], ["Coach"], {})
+
+@pytest.fixture
+def writes(engine, monkeypatch):
+    if engine != "mongo":
+        pytest.skip("counts MongoDB bulk writes")
+    import mongomock
+    calls = []
+    bulk_write = mongomock.collection.Collection.bulk_write
+    def counting(self, ops, *args, **kwargs):
+        calls.append((self.name, [type(op).__name__ for op in ops]))
+        return bulk_write(self, ops, *args, **kwargs)
+    monkeypatch.setattr(mongomock.collection.Collection, "bulk_write", counting)
+    ItemRepository().put_many([(i, _item(i)) for i in range(1, 6)])
+    # the first save stores the default roles and departments
+    save_data(load_data())
+    calls.clear()
+    return calls
+
+def test_only_changed_documents_are_written(writes):
+    data = load_data()
+    data.update_item(data.items_by_id[2], {"current_amount": 1})
+    data["items"].remove(data.items_by_id[5])
+    save_data(data)
+    assert writes == [("items", ["DeleteOne", "ReplaceOne"])]
+    data_store._invalidate_cache()
+    stored = {it["id"]: it["current_amount"] for it in load_data(sections=("items",))["items"]}
+    assert stored == {1: 5, 2: 1, 3: 5, 4: 5}
+
+def test_unchanged_save_writes_nothing(writes):
+    data = load_data()
+    save_data(data)
+    save_data(data)
+    assert writes == []
@@ -0,0 +1,82 @@
+# Exports and imports in JSON Lines, Parquet and Arrow: the same columns as
+# CSV, integer columns typed as int64, and a round trip gives the same records.
+import io
+import json
+import pytest
+import data_io
+import data_store
+from data_io import export_file, import_file, iter_export, format_for_path
+from data_store import load_data, ItemRepository, ReservationRepository
+
+FORMATS = ["jsonl", "parquet", "arrow"]
+
+@pytest.fixture
+def stored(engine):
+    ItemRepository().put_many([(i, {"id": i, "department": "Gym", "type": "consumable", "name": f"Item {i}",
+                                    "amount_needed": 5, "current_amount": i}) for i in range(1, 6)])
+    ReservationRepository().put(1, {"id": 1, "item_id": 2, "item_name": "Item 2", "department": "Gym",
+                                    "user_email": "a@x.com", "created_on": "2024-01-02", "amount_to_refill": 3,
+                                    "status": "pending"})
+    return engine
+
+def _state():
+    data_store._invalidate_cache()
+    data = load_data(sections=("items", "reservations"))
+    strip = lambda r: {f: v for f, v in r.items() if f != "_v" and v is not None}
+    return [strip(it) for it in data["items"]], [strip(r) for r in data["reservations"]]
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_round_trip(stored, tmp_path, fmt):
+    if fmt != "jsonl":
+        pytest.importorskip("pyarrow")
+    before = _state()
+    for kind in ("items", "reservations"):
+        assert export_file(kind, str(tmp_path / f"{kind}.{fmt}"))[0]
+    ItemRepository().update_fields(1, {"current_amount": 0})
+    ReservationRepository().update_fields(1, {"status": "cancelled"})
+    for kind in ("items", "reservations"):
+        ok, message = import_file(kind, str(tmp_path / f"{kind}.{fmt}"), batch_size=2, progress=lambda *a: None)
+        assert ok and "0 added" in message, message
+    assert _state() == before
+
+def test_jsonl_lines_are_objects(stored):
+    lines = b"".join(iter_export("items", "jsonl")).decode("utf-8").splitlines()
+    assert json.loads(lines[0]) == {"id": 1, "department": "Gym", "type": "consumable", "name": "Item 1",
+                                    "amount_needed": 5, "current_amount": 1}
+
+def test_columnar_exports_are_typed(stored):
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+    table = pq.read_table(io.BytesIO(b"".join(iter_export("items", "parquet", batch_size=2))))
+    assert table.schema.field("id").type == pa.int64() and table.schema.field("name").type == pa.string()
+    assert table.column("current_amount").to_pylist() == [1, 2, 3, 4, 5]
+    assert pq.ParquetFile(io.BytesIO(b"".join(iter_export("items", "parquet", batch_size=2)))).num_row_groups == 3
+    reader = pa.ipc.open_file(pa.BufferReader(b"".join(iter_export("reservations", "arrow"))))
+    assert reader.read_all().column("amount_to_refill").to_pylist() == [3]
+
+def test_arrow_stream_import(stored, tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    table = pa.table({"department": ["Pool"], "type": ["consumable"], "name": ["Float"],
+                      "amount_needed": pa.array([4], pa.int64())})
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    sink.seek(0)
+    ok, message = import_file("items", sink, format="arrow", progress=lambda *a: None)
+    assert ok and "1 added" in message
+    assert ItemRepository().find_by_name("Pool", "Float")["current_amount"] == 4
+
+def test_jsonl_errors(stored, tmp_path):
+    path = tmp_path / "items.ndjson"
+    path.write_text('{"name": "A", "department": "Gym"}\n\n[1, 2]\n', encoding="utf-8")
+    ok, message = import_file("items", str(path), progress=lambda *a: None)
+    assert not ok and "line 3: expected a JSON object" in message
+
+def test_format_selection(monkeypatch):
+    assert [format_for_path(p) for p in ("a.CSV", "a.ndjson", "a.feather", "a.parquet", "a.txt")] == [
+        "csv", "jsonl", "arrow", "parquet", "csv"]
+    assert import_file("items", "a.xml", format="xml")[1].startswith("Unsupported format 'xml'")
+    monkeypatch.setattr(data_io, "pa", None)
+    assert import_file("items", "a.parquet") == (False, "The Parquet format needs pyarrow (pip install pyarrow)")
+    with pytest.raises(ValueError, match="needs pyarrow"):
+        iter_export("items", "arrow")
@@ -0,0 +1,54 @@
+# Item and reservation ids come from per-section counters: blocks are
+# contiguous, never handed out twice (also across threads), seeded from the
+# highest stored id and moved past ids written explicitly with bump_counter().
+import threading
+import pytest
+from data_store import allocate_ids, bump_counter, IdAllocator, ItemRepository
+
+def test_blocks_are_consecutive(engine):
+    assert allocate_ids("items") == 1
+    assert allocate_ids("items", 10) == 2
+    assert allocate_ids("items") == 12
+    # each section counts on its own
+    assert allocate_ids("reservations") == 1
+
+def test_counter_is_seeded_from_the_highest_id(engine):
+    ItemRepository().put_many([(7, {"id": 7, "name": "A"}), (3, {"id": 3, "name": "B"})])
+    assert allocate_ids("items") == 8
+
+def test_bump_counter_skips_written_ids(engine):
+    assert allocate_ids("items") == 1
+    bump_counter("items", 50)
+    assert allocate_ids("items") == 51
+    # never moves the counter back
+    bump_counter("items", 10)
+    assert allocate_ids("items") == 52
+
+def test_invalid_requests(engine):
+    with pytest.raises(ValueError):
+        allocate_ids("staff")
+    with pytest.raises(ValueError):
+        allocate_ids("items", 0)
+
+def test_concurrent_allocations_never_overlap(engine):
+    if engine == "mongo":
+        pytest.skip("mongomock's updates aren't atomic across threads")
+    got = []
+    lock = threading.Lock()
+    def allocate():
+        for _ in range(10):
+            first = allocate_ids("items", 3)
+            with lock:
+                got.extend(range(first, first + 3))
+    threads = [threading.Thread(target=allocate) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(got) == list(range(1, 121))
+
+def test_id_allocator_reserves_blocks(engine):
+    allocator = IdAllocator("items", block=4)
+    assert [allocator.next() for _ in range(6)] == [1, 2, 3, 4, 5, 6]
+    # the rest of the second block stays reserved
+    assert allocate_ids("items") == 9
@@ -0,0 +1,51 @@
+# Imported items are matched to stored ones by id, else by department and
+# name ignoring case; rows repeating an earlier row's key are reported.
+import pytest
+import data_store
+from data_io import import_file
+from data_store import load_data, ItemRepository
+
+HEADER = "department,type,name,amount_needed,current_amount\n"
+
+@pytest.fixture
+def store(engine):
+    if engine == "mongo":
+        pytest.skip("mongomock ignores collations")
+    return engine
+
+def _import(tmp_path, text):
+    path = tmp_path / "items.csv"
+    path.write_text(text, encoding="utf-8")
+    return import_file("items", str(path))
+
+def _items():
+    data_store._invalidate_cache()
+    return [(it["department"], it["name"], it["current_amount"]) for it in load_data(sections=("items",))["items"]]
+
+def test_reimport_updates_items_with_non_ascii_names(store, tmp_path):
+    assert _import(tmp_path, HEADER + "A,consumable,Ärmel,3,3\n")[0]
+    ok, message = _import(tmp_path, HEADER + "A,consumable,ÄRMEL,3,1\n")
+    assert ok and "0 added, 1 updated" in message
+    assert _items() == [("A", "ÄRMEL", 1)]
+
+def test_duplicate_rows_are_reported_and_the_last_one_wins(store, tmp_path):
+    ok, message = _import(tmp_path, HEADER + "A,consumable,Tape,3,3\nB,consumable,Tape,3,3\nA,consumable,TAPE,3,2\n")
+    assert ok and "1 row(s) repeat an earlier row: line 4" in message
+    assert sorted(_items()) == [("A", "TAPE", 2), ("B", "Tape", 3)]
+
+def test_rows_are_matched_with_one_lookup_per_batch(store, tmp_path, monkeypatch):
+    ItemRepository().put_many([(i, {"id": i, "department": "A", "type": "consumable", "name": f"Item {i}",
+                                    "amount_needed": 3, "current_amount": 3}) for i in range(1, 7)])
+    lookups = []
+    find_by_names = ItemRepository.find_by_names
+    def counting(self, pairs):
+        pairs = list(pairs)
+        lookups.append(len(pairs))
+        return find_by_names(self, pairs)
+    monkeypatch.setattr(ItemRepository, "find_by_names", counting)
+    rows = "".join(f"A,consumable,ITEM {i},3,1\n" for i in range(1, 7))
+    path = tmp_path / "items.csv"
+    path.write_text(HEADER + rows, encoding="utf-8")
+    ok, message = import_file("items", str(path), batch_size=4, progress=lambda *a: None)
+    assert ok and "0 added, 6 updated" in message
+    assert lookups == [4, 2]
@@ -0,0 +1,87 @@
+# Imports run as background jobs on a small thread pool; the job's progress
+# and result are polled through GET /imports/{id}.
+import threading
+import time
+import pytest
+from fastapi.testclient import TestClient
+import import_jobs
+from import_jobs import submit_import, get_import_job, shutdown_import_jobs
+from data_store import ItemRepository
+
+ITEMS = "department,type,name,amount_needed,current_amount\n"
+
+@pytest.fixture
+def jobs(engine, monkeypatch):
+    monkeypatch.setattr(import_jobs, "_jobs", {})
+    yield
+    shutdown_import_jobs()
+
+def _wait(job_id, timeout=5):
+    deadline = time.monotonic() + timeout
+    while True:
+        job = get_import_job(job_id).to_dict()
+        if job["status"] in ("succeeded", "failed", "cancelled"):
+            return job
+        assert time.monotonic() < deadline, job
+        time.sleep(0.01)
+
+def _upload(tmp_path, text, name="items.csv"):
+    path = tmp_path / name
+    path.write_text(text, encoding="utf-8")
+    return path
+
+def test_job_reports_progress_and_result(jobs, tmp_path, monkeypatch):
+    monkeypatch.setenv("IMPORT_BATCH_SIZE", "2")
+    path = _upload(tmp_path, ITEMS + "".join(f"Gym,consumable,Item {i},5,5\n" for i in range(5)) + "Gym,consumable,Bad,x,1\n")
+    job = submit_import("items", str(path), "csv", "items.csv")
+    result = _wait(job.id)
+    assert result["status"] == "succeeded" and result["message"].startswith("Imported items: 5 added")
+    assert (result["batches"], result["rows"], result["added"], result["invalid"]) == (3, 6, 5, 1)
+    assert result["filename"] == "items.csv" and result["finished_at"] is not None
+    # the job deletes its upload when done
+    assert not path.exists()
+    assert len(ItemRepository().find()) == 5
+
+def test_failed_import_is_reported(jobs, tmp_path):
+    path = _upload(tmp_path, '{"name": "A"}\nnot json\n', name="items.jsonl")
+    result = _wait(submit_import("items", str(path), "jsonl").id)
+    assert result["status"] == "failed" and "line 2: invalid JSON" in result["message"]
+
+def test_shutdown_cancels_queued_jobs(jobs, tmp_path, monkeypatch):
+    monkeypatch.setenv("IMPORT_WORKERS", "1")
+    started, release = threading.Event(), threading.Event()
+    def slow_import(*args, **kwargs):
+        started.set()
+        release.wait(5)
+        return True, "done"
+    monkeypatch.setattr(import_jobs, "import_file", slow_import)
+    running = submit_import("items", str(_upload(tmp_path, ITEMS, "a.csv")))
+    queued = submit_import("items", str(_upload(tmp_path, ITEMS, "b.csv")))
+    assert started.wait(5)
+    assert queued.to_dict()["status"] == "queued"
+    threading.Timer(0.05, release.set).start()
+    shutdown_import_jobs()
+    # the running job finished its work, the queued one never started
+    assert running.to_dict()["status"] == "succeeded"
+    assert queued.to_dict()["status"] == "cancelled" and not (tmp_path / "b.csv").exists()
+
+def test_finished_jobs_expire(jobs, tmp_path, monkeypatch):
+    job = submit_import("roles", str(_upload(tmp_path, "name\nCoach\n")))
+    _wait(job.id)
+    monkeypatch.setenv("IMPORT_JOB_RETENTION", "0")
+    time.sleep(0.01)
+    assert get_import_job(job.id) is None
+
+def test_api(jobs, tmp_path):
+    from backend.main import app
+    client = TestClient(app)
+    response = client.post("/imports", data={"kind": "items"},
+                           files={"file": ("items.csv", ITEMS + "Gym,consumable,Bands,5,5\n", "text/csv")})
+    assert response.status_code == 202
+    job_id = response.json()["id"]
+    _wait(job_id)
+    status = client.get(f"/imports/{job_id}").json()
+    assert status["status"] == "succeeded" and status["added"] == 1 and status["format"] == "csv"
+    assert client.get("/imports/unknown").status_code == 404
+    assert client.post("/imports", data={"kind": "widgets"}, files={"file": ("a.csv", "x", "text/csv")}).status_code == 400
+    assert client.post("/imports", data={"kind": "items", "format": "xml"}, files={"file": ("a.xml", "x", "text/xml")}).status_code == 400
@@ -0,0 +1,77 @@
+# IndexedRecords keeps its key index and groups in step with every list
+# mutation, including records that compare equal but are different objects.
+import copy
+from data_store import IndexedRecords, Dataset
+
+def _item(iid, department):
+    return {"id": iid, "department": department, "name": f"Item {iid}"}
+
+def _records(*items):
+    return IndexedRecords(items, groups=("department",))
+
+def _consistent(records):
+    fresh = IndexedRecords(list(records), key=records.key, groups=records.groups)
+    assert {k: id(r) for k, r in records.by_key.items()} == {k: id(r) for k, r in fresh.by_key.items()}
+    # group order may differ: updated records move to the end
+    for field in records.groups:
+        assert ({v: sorted(map(id, g)) for v, g in records.grouped[field].items()}
+                == {v: sorted(map(id, g)) for v, g in fresh.grouped[field].items()})
+
+def test_lookup_and_groups():
+    records = _records(_item(1, "A"), _item(2, "B"), _item(3, "A"))
+    assert records.get(2)["department"] == "B" and records.get(9) is None
+    assert [r["id"] for r in records.group("department", "A")] == [1, 3]
+    records.update(records.get(1), {"department": "B"})
+    assert [r["id"] for r in records.group("department", "B")] == [2, 1]
+    _consistent(records)
+
+def test_remove_unindexes_the_record_it_removed():
+    first, twin = _item(1, "A"), _item(1, "A")
+    records = _records(first, twin)
+    # equal, so list.remove drops `first` even when asked for `twin`
+    records.remove(twin)
+    assert len(records) == 1 and records[0] is twin
+    assert records.get(1) is twin
+    assert records.group("department", "A") == [twin] and records.group("department", "A")[0] is twin
+    _consistent(records)
+    records.remove(twin)
+    assert records.get(1) is None and records.group("department", "A") == []
+
+def test_duplicate_keys_fall_back_to_the_next_record():
+    first, second = _item(1, "A"), _item(1, "B")
+    records = _records(first, second)
+    assert records.get(1) is first
+    records.pop(0)
+    assert records.get(1) is second
+    _consistent(records)
+
+def test_list_mutations_keep_indexes_in_step():
+    records = _records(_item(1, "A"), _item(2, "B"))
+    records.append(_item(3, "A"))
+    records += [_item(4, "C")]
+    records.insert(0, _item(5, "B"))
+    records[1] = _item(6, "C")
+    del records[2]
+    records.sort(key=lambda r: r["id"], reverse=True)
+    records.reverse()
+    _consistent(records)
+    assert sorted(records.by_key) == [3, 4, 5, 6]
+    records.clear()
+    assert records.by_key == {} and records.group("department", "A") == []
+
+def test_copy_is_indexed_separately():
+    records = _records(_item(1, "A"))
+    clone = copy.deepcopy(records)
+    clone.append(_item(2, "A"))
+    assert records.get(2) is None and clone.get(2)["id"] == 2
+    _consistent(clone)
+
+def test_dataset_wraps_sections():
+    data = Dataset(items=[_item(1, "A")], roles=["PT"])
+    assert data.items_by_id[1]["name"] == "Item 1"
+    data["reservations"] = [{"id": 7, "status": "pending", "department": "A", "item_id": 1}]
+    assert [r["id"] for r in data.reservations_with_status("pending")] == [7]
+    data.update_item(data.items_by_id[1], {"department": "B"})
+    assert data.department_items("A") == [] and data.items_by_department["B"][0]["id"] == 1
+    # a section that wasn't loaded has empty indexes and isn't added
+    assert Dataset(roles=[]).items_by_id == {} and "items" not in Dataset(roles=[])
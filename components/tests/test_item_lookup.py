@@ -0,0 +1,59 @@
+# Items are found by department and name ignoring case, non-ASCII letters
+# included, on every engine.
+import json
+import sqlite3
+import pytest
+import data_store
+from data_store import ItemRepository, find_item_by_name
+
+def _item(iid, department, name):
+    return {"id": iid, "department": department, "type": "consumable", "name": name,
+            "amount_needed": 3, "current_amount": 3}
+
+@pytest.fixture
+def store(engine):
+    if engine == "mongo":
+        # case-insensitive matching is the collation's job there
+        pytest.skip("mongomock ignores collations")
+    return engine
+
+def test_find_by_name_ignores_case(store):
+    repo = ItemRepository()
+    repo.put_many([(1, _item(1, "A", "Ärmel")), (2, _item(2, "A", "Tape")), (3, _item(3, "B", "ärmel"))])
+    assert repo.find_by_name("A", "ärmel")["id"] == 1
+    assert repo.find_by_name("A", "ÄRMEL")["id"] == 1
+    assert repo.find_by_name("A", "tAPE")["id"] == 2
+    assert repo.find_by_name("B", "Ärmel")["id"] == 3
+    assert repo.find_by_name("C", "Ärmel") is None
+    assert find_item_by_name("A", "ärmel")["id"] == 1
+
+    found = repo.find_by_names([("A", "ÄRMEL"), ("B", "Ärmel"), ("A", "Gel")])
+    assert {k: v["id"] for k, v in found.items()} == {("A", "ärmel"): 1, ("B", "ärmel"): 3}
+
+def test_renamed_item_is_found_by_its_new_name(store):
+    repo = ItemRepository()
+    repo.put(1, _item(1, "A", "Tape"))
+    repo.update_fields(1, {"name": "Ärmel"})
+    assert repo.find_by_name("A", "tape") is None
+    assert repo.find_by_name("A", "ärmel")["id"] == 1
+
+def test_sqlite_store_without_name_key_is_upgraded(tmp_path, monkeypatch):
+    path = tmp_path / "old.sqlite3"
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE items (key INTEGER PRIMARY KEY, doc TEXT NOT NULL);
+        CREATE INDEX items_department_name
+            ON items (json_extract(doc, '$.department'), lower(json_extract(doc, '$.name')));
+    """)
+    conn.execute("INSERT INTO items (key, doc) VALUES (1, ?)", (json.dumps(_item(1, "A", "Ärmel")),))
+    conn.commit()
+    conn.close()
+    monkeypatch.delenv("MONGO_URI", raising=False)
+    monkeypatch.setenv("DATA_ENGINE", "sqlite")
+    monkeypatch.setenv("SQLITE_PATH", str(path))
+    monkeypatch.setattr(data_store._sqlite_local, "conn", None, raising=False)
+    data_store._invalidate_cache()
+
+    assert ItemRepository().find_by_name("A", "ÄRMEL")["id"] == 1
+    indexes = {row[0] for row in data_store._sqlite_conn().execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert "items_department_name_key" in indexes and "items_department_name" not in indexes
@@ -0,0 +1,55 @@
+# The JSON store is shared by several processes: writers serialize on
+# data.json.lock and data.json is only ever replaced by renaming a complete
+# temp file over it.
+import json
+import multiprocessing
+import pytest
+import data_store
+from data_store import ItemRepository, load_data
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_store, "DATA_JSON", tmp_path / "data.json")
+    monkeypatch.delenv("MONGO_URI", raising=False)
+    monkeypatch.setenv("DATA_ENGINE", "json")
+    # compact often so renames race with appends
+    monkeypatch.setenv("DATA_WAL_MAX_RECORDS", "7")
+    data_store._invalidate_cache()
+    return tmp_path
+
+def _writer(first, count):
+    repo = ItemRepository()
+    for iid in range(first, first + count):
+        repo.put(iid, {"id": iid, "name": f"Item {iid}"})
+        data_store.allocate_ids("reservations")
+
+@pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(), reason="needs fork")
+def test_concurrent_processes_lose_no_writes(store):
+    ctx = multiprocessing.get_context("fork")
+    workers = [ctx.Process(target=_writer, args=(n * 100, 20)) for n in range(1, 5)]
+    for p in workers:
+        p.start()
+    for p in workers:
+        p.join()
+    assert [p.exitcode for p in workers] == [0, 0, 0, 0]
+    ids = sorted(load_data(sections=("items",)).items_by_id)
+    assert ids == [n * 100 + i for n in range(1, 5) for i in range(20)]
+    assert data_store.allocate_ids("reservations") == 81
+
+def test_failed_replace_keeps_the_old_file(store):
+    path = store / "data.json"
+    path.write_text('{"roles": ["PT"]}', encoding="utf-8")
+    def write(f):
+        f.write('{"roles": [')
+        raise OSError("disk full")
+    with pytest.raises(OSError):
+        data_store._replace_file(path, write)
+    assert json.loads(path.read_text(encoding="utf-8")) == {"roles": ["PT"]}
+    assert sorted(p.name for p in store.iterdir()) == ["data.json"]
+
+def test_lock_is_reentrant(store):
+    with data_store._json_lock:
+        with data_store._json_lock:
+            ItemRepository().put(1, {"id": 1, "name": "A"})
+    assert (store / "data.json.lock").exists()
+    assert ItemRepository().get(1)["name"] == "A"
@@ -0,0 +1,91 @@
+# The JSON engine appends every change to data.json.log and folds the log
+# back into data.json once it passes DATA_WAL_MAX_RECORDS / DATA_WAL_MAX_BYTES.
+import json
+import pytest
+import data_store
+from data_store import load_data, save_data, ItemRepository, StaffRepository
+
+def _item(iid, amount=5):
+    return {"id": iid, "department": "Gym", "type": "consumable", "name": f"Item {iid}",
+            "amount_needed": 5, "current_amount": amount}
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_store, "DATA_JSON", tmp_path / "data.json")
+    monkeypatch.delenv("MONGO_URI", raising=False)
+    monkeypatch.setenv("DATA_ENGINE", "json")
+    monkeypatch.setenv("DATA_WAL_MAX_RECORDS", "1000")
+    data_store._invalidate_cache()
+    return tmp_path
+
+def _log():
+    text = data_store._wal_path().read_text(encoding="utf-8")
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+def _snapshot():
+    return json.loads(data_store.DATA_JSON.read_text(encoding="utf-8"))
+
+def _reread():
+    # as a new process would: parse both files again
+    data_store._json_cache.update(stamp=None, data=None)
+    return load_data()
+
+def test_writes_are_appended_to_the_log(store):
+    repo = ItemRepository()
+    repo.put(1, _item(1))
+    snapshot = _snapshot()
+    repo.put(2, _item(2))
+    repo.update_fields(1, {"current_amount": 3})
+    repo.delete(2)
+    assert [(r["s"], r["k"], "d" in r) for r in _log()] == [("items", 2, True), ("items", 1, True), ("items", 2, False)]
+    assert _snapshot() == snapshot
+    data = _reread()
+    assert sorted(data.items_by_id) == [1] and data.items_by_id[1]["current_amount"] == 3
+
+def test_save_data_appends_only_its_changes(store):
+    ItemRepository().put_many([(1, _item(1)), (2, _item(2))])
+    data = load_data()
+    data.update_item(data.items_by_id[2], {"current_amount": 0})
+    data["roles"].append("Coach")
+    before = len(_log())
+    save_data(data)
+    assert sorted((r["s"], r["k"]) for r in _log()[before:]) == [("items", 2), ("roles", "Coach")]
+    reread = _reread()
+    assert reread.items_by_id[2]["current_amount"] == 0 and "Coach" in reread["roles"]
+
+def test_log_is_compacted_past_max_records(store, monkeypatch):
+    monkeypatch.setenv("DATA_WAL_MAX_RECORDS", "3")
+    repo = ItemRepository()
+    for iid in range(1, 4):
+        repo.put(iid, _item(iid))
+    assert len(_log()) == 2
+    repo.put(4, _item(4))
+    assert _log() == []
+    assert [it["id"] for it in _snapshot()["items"]] == [1, 2, 3, 4]
+    assert sorted(_reread().items_by_id) == [1, 2, 3, 4]
+
+def test_log_is_compacted_past_max_bytes(store, monkeypatch):
+    monkeypatch.setenv("DATA_WAL_MAX_BYTES", "200")
+    repo = ItemRepository()
+    repo.put(1, _item(1))
+    repo.put(2, _item(2))
+    assert len(_log()) == 1
+    repo.put(3, _item(3))
+    assert _log() == [] and len(_snapshot()["items"]) == 3
+
+def test_record_cut_short_by_a_crash_is_skipped(store):
+    repo = ItemRepository()
+    repo.put(1, _item(1))
+    repo.put(2, _item(2))
+    with data_store._wal_path().open("a", encoding="utf-8") as f:
+        f.write('{"s":"items","k":3,"d":{"id":3,"na')
+    assert sorted(_reread().items_by_id) == [1, 2]
+    # the next record starts on a line of its own
+    StaffRepository().put("a@x.com", {"name": "A", "password": "p", "role": "PT", "department": "Gym", "type": "staff"})
+    data = _reread()
+    assert sorted(data.items_by_id) == [1, 2] and "a@x.com" in data["staff"]
+
+def test_counters_are_logged(store):
+    assert data_store.allocate_ids("items", 3) == 1
+    data_store._json_cache.update(stamp=None, data=None)
+    assert data_store.allocate_ids("items") == 4
@@ -0,0 +1,46 @@
+# load_data(sections=..., projection=...) fetches only the requested sections
+# and limits their documents to the requested fields, on every engine.
+import pytest
+import data_store
+from data_store import load_data, ItemRepository, StaffRepository
+
+@pytest.fixture
+def store(engine):
+    ItemRepository().put_many([(i, {"id": i, "department": "Gym", "type": "consumable", "name": f"Item {i}",
+                                    "amount_needed": 5, "current_amount": i}) for i in (1, 2)])
+    StaffRepository().put("a@x.com", {"name": "A", "password": "secret", "role": "PT", "department": "Gym", "type": "staff"})
+    data_store._invalidate_cache()
+    return engine
+
+def test_only_requested_sections_are_returned(store):
+    data = load_data(sections=("items", "roles"))
+    assert sorted(data) == ["items", "roles"]
+    assert [it["id"] for it in data["items"]] == [1, 2]
+    assert sorted(load_data(sections=["staff"])) == ["staff"]
+
+def test_only_requested_sections_are_fetched(store, monkeypatch):
+    if store == "json":
+        pytest.skip("the JSON engine reads one file")
+    fetched = []
+    for name in ("_fetch_section", "_sqlite_fetch_section"):
+        fetch = getattr(data_store, name)
+        def counting(conn, section, *args, fetch=fetch):
+            fetched.append(section)
+            return fetch(conn, section, *args)
+        monkeypatch.setattr(data_store, name, counting)
+    load_data(sections=("items",))
+    assert fetched == ["items"]
+
+def test_projection_limits_fields(store):
+    data = load_data(sections=("items",), projection=["id", "current_amount"])
+    assert data["items"] == [{"id": 1, "current_amount": 1}, {"id": 2, "current_amount": 2}]
+    assert data.items_by_id[2]["current_amount"] == 2
+
+def test_exclusion_projection_keeps_user_keys(store):
+    staff = load_data(sections=("staff",), projection={"password": 0})["staff"]
+    assert list(staff) == ["a@x.com"]
+    assert "password" not in staff["a@x.com"] and staff["a@x.com"]["name"] == "A"
+
+def test_projected_loads_leave_the_cache_whole(store):
+    load_data(sections=("items",), projection=["id"])
+    assert load_data(sections=("items",))["items"][0]["name"] == "Item 1"
@@ -0,0 +1,105 @@
+# migrate_json_to_mongo() streams data.json and its log into MongoDB in
+# batches, checkpointing after each one so a stopped run resumes where it was.
+import io
+import json
+import pytest
+import data_store
+from data_store import migrate_json_to_mongo
+
+mongomock = pytest.importorskip("mongomock")
+
+def _item(iid, **fields):
+    return dict({"id": iid, "department": "Gym", "type": "consumable", "name": f"Item {iid}",
+                 "amount_needed": 5, "current_amount": 5}, **fields)
+
+@pytest.fixture
+def db():
+    return mongomock.MongoClient()["migration"]
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "data.json"
+    path.write_text(json.dumps({
+        "users": {"root@x.com": {"name": "Root", "type": "admin"}, "a@x.com": {"name": "A", "type": "staff"}},
+        "roles": ["PT", "Head"],
+        "items": [_item(i) for i in range(1, 8)] + [_item(8, current_amount="lots"), {"name": "no id"}],
+        "reservations": [{"id": 1, "item_id": 1, "status": "pending"}],
+    }), encoding="utf-8")
+    log = [{"s": "items", "k": 2, "d": _item(2, name="Renamed")}, {"s": "items", "k": 3},
+           {"s": "items", "k": 20, "d": _item(20)}, {"s": "roles", "k": "Coach", "d": {"name": "Coach"}},
+           {"s": "counters", "k": "reservations", "d": 9}]
+    data_store._wal_path(path).write_text("".join(json.dumps(r) + "\n" for r in log), encoding="utf-8")
+    return path
+
+def _ids(db, coll="items"):
+    return sorted(doc["id"] for doc in db[coll].find())
+
+def test_migrates_snapshot_and_log(db, source):
+    summary = migrate_json_to_mongo(db, source, batch_size=3)
+    assert _ids(db) == [1, 2, 4, 5, 6, 7, 8, 20]
+    assert db.items.find_one({"id": 2})["name"] == "Renamed"
+    # a malformed number becomes the field's default; a record without an id is counted as an error
+    assert db.items.find_one({"id": 8})["current_amount"] == 0
+    assert summary["items"] == {"written": 8, "errors": 1, "skipped": 0}
+    assert [d["_id"] for d in db.admins.find()] == ["root@x.com"] and [d["_id"] for d in db.staff.find()] == ["a@x.com"]
+    assert sorted(d["name"] for d in db.roles.find()) == ["Coach", "Head", "PT"]
+    assert _ids(db, "reservations") == [1]
+    counters = {d["_id"]: d["seq"] for d in db.counters.find()}
+    assert counters == {"items": 20, "reservations": 9}
+    assert db.meta.find_one({"_id": "migration"}) is None
+
+def test_stopped_migration_resumes_after_the_last_batch(db, source, monkeypatch):
+    write = data_store._write_migration_batch
+    calls = []
+    def flaky(db, batch, overwrite):
+        calls.append([doc.get("id") for _coll, _filter, doc in batch])
+        if len(calls) == 4:
+            raise ConnectionError("lost the server")
+        return write(db, batch, overwrite)
+    monkeypatch.setattr(data_store, "_write_migration_batch", flaky)
+    # users, roles, then items in batches of 3
+    assert migrate_json_to_mongo(db, source, batch_size=3) is None
+    assert calls[2:] == [[1, 2, 4], [5, 6, 7]]
+    assert _ids(db) == [1, 2, 4]
+    checkpoint = db.meta.find_one({"_id": "migration"})
+    assert (checkpoint["section"], checkpoint["done"]) == ("items", 3)
+
+    calls.clear()
+    summary = migrate_json_to_mongo(db, source, batch_size=3)
+    # finished sections and the first items batch are not written again
+    assert calls == [[5, 6, 7], [8, 20], [1]]
+    assert summary["items"]["skipped"] == 3 and "roles" not in summary
+    assert _ids(db) == [1, 2, 4, 5, 6, 7, 8, 20]
+
+def test_changed_source_starts_over(db, source, monkeypatch):
+    def down(*args):
+        raise ConnectionError("lost the server")
+    monkeypatch.setattr(data_store, "_write_migration_batch", down)
+    assert migrate_json_to_mongo(db, source) is None
+    monkeypatch.undo()
+    with data_store._wal_path(source).open("a", encoding="utf-8") as f:
+        f.write(json.dumps({"s": "items", "k": 21, "d": _item(21)}) + "\n")
+    summary = migrate_json_to_mongo(db, source)
+    assert summary["users"]["skipped"] == 0 and 21 in _ids(db)
+
+def test_existing_documents_win_unless_overwriting(db, source):
+    db.items.insert_one(_item(1, name="Kept"))
+    migrate_json_to_mongo(db, source)
+    assert db.items.find_one({"id": 1})["name"] == "Kept"
+    db.items.insert_one(_item(99))
+    migrate_json_to_mongo(db, source, overwrite=True)
+    assert db.items.find_one({"id": 1})["name"] == "Item 1"
+    assert 99 not in _ids(db)
+
+def test_stream_reads_values_split_across_chunks():
+    text = json.dumps({"a": [12.5e3, "x" * 10, {"b": [1, 2]}], "c": {"k": -7}, "d": 123456})
+    stream = data_store._JsonStream(io.StringIO(text), chunk_size=3)
+    stream.expect("{")
+    sections = {}
+    for key, value in stream.members("}"):
+        sections[key] = value
+    assert sections == json.loads(text)
+
+    sections = {s: list(members) for s, members in data_store._iter_json_sections(io.StringIO(text))}
+    assert sections == {"a": [(None, 12500.0), (None, "x" * 10), (None, {"b": [1, 2]})],
+                        "c": [("k", -7)], "d": [(None, 123456)]}
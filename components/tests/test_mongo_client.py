@@ -0,0 +1,67 @@
+# One MongoClient per process: created (and pinged) on first use, reused by
+# every load/save, closed by close_mongo_client() and never shared across fork().
+import pytest
+import data_store
+from data_store import load_data, save_data, get_mongo_client, close_mongo_client
+
+mongomock = pytest.importorskip("mongomock")
+
+class _Client(mongomock.MongoClient):
+    created = []
+
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+        self.options = kwargs
+        self.closed = False
+        _Client.created.append(self)
+
+    def close(self):
+        self.closed = True
+        super().close()
+
+@pytest.fixture
+def clients(monkeypatch, tmp_path):
+    monkeypatch.setattr(data_store, "DATA_JSON", tmp_path / "data.json")
+    monkeypatch.setenv("DATA_ENGINE", "mongo")
+    monkeypatch.setenv("MONGO_URI", "mongodb://localhost")
+    monkeypatch.setattr(data_store, "MongoClient", _Client)
+    monkeypatch.setattr(_Client, "created", [])
+    close_mongo_client()
+    data_store._invalidate_cache()
+    yield _Client.created
+    close_mongo_client()
+    data_store._invalidate_cache()
+
+def test_loads_and_saves_share_one_client(clients):
+    for n in range(3):
+        data = load_data()
+        data["roles"].append(f"Role {n}")
+        save_data(data)
+    assert len(clients) == 1
+    assert get_mongo_client() is clients[0]
+
+def test_pool_options_come_from_the_environment(clients, monkeypatch):
+    monkeypatch.setenv("MONGO_MAX_POOL_SIZE", "7")
+    monkeypatch.setenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "not a number")
+    get_mongo_client()
+    assert clients[0].options["maxPoolSize"] == 7
+    assert clients[0].options["serverSelectionTimeoutMS"] == 5000
+
+def test_close_releases_the_client(clients):
+    first = get_mongo_client()
+    close_mongo_client()
+    assert first.closed
+    assert get_mongo_client() is not first and len(clients) == 2
+
+def test_client_inherited_across_fork_is_replaced_not_closed(clients, monkeypatch):
+    parent = get_mongo_client()
+    # as seen from a forked child: the client belongs to another pid
+    monkeypatch.setattr(data_store, "_client_pid", data_store._client_pid + 1)
+    child = get_mongo_client()
+    assert child is not parent and not parent.closed
+    close_mongo_client()
+    assert child.closed
+
+def test_no_uri_means_no_client(clients, monkeypatch):
+    monkeypatch.delenv("MONGO_URI")
+    assert get_mongo_client() is None and clients == []
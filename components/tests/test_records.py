@@ -0,0 +1,30 @@
+# Records normalize numeric fields to int; a stored value that isn't a number
+# is replaced by the field's default instead of breaking the code reading it.
+from fastapi.testclient import TestClient
+from data_store import ItemRepository, StaffRepository
+from records import Item, Reservation
+
+def test_numbers_are_normalized():
+    item = Item.of({"id": "7", "name": "Bands", "amount_needed": "5", "current_amount": 2.0})
+    assert (item.id, item.amount_needed, item.current_amount) == (7, 5, 2)
+    assert Item.of({"id": 1, "current_amount": ""}).current_amount == 0
+
+def test_malformed_numbers_become_the_default(capsys):
+    item = Item.of({"id": 1, "name": "Bands", "current_amount": "lots", "amount_needed": [3]})
+    assert (item.current_amount, item.amount_needed) == (0, 0)
+    assert item.depleted
+    assert "current_amount 'lots' is not a number" in capsys.readouterr().out
+    assert Reservation.of({"id": "x", "item_id": 1}).id is None
+
+def test_round_trip_keeps_unknown_fields():
+    doc = {"id": 1, "name": "Bands", "current_amount": 3, "colour": "red"}
+    assert Item.of(doc).to_doc()["colour"] == "red"
+
+def test_use_of_an_item_with_a_malformed_amount(engine):
+    from backend.main import app
+    StaffRepository().put("a@x.com", {"name": "A", "password": "p", "role": "PT", "department": "Gym", "type": "staff"})
+    ItemRepository().put(1, {"id": 1, "department": "Gym", "type": "consumable", "name": "Bands",
+                             "amount_needed": 5, "current_amount": "lots"})
+    response = TestClient(app).post("/items/1/use", data={"user_email": "a@x.com", "amount": 1})
+    assert response.status_code == 200
+    assert response.json() == {"used": 1, "current_amount": 0, "depleted": True}
@@ -0,0 +1,65 @@
+# The per-entity repositories read and write single records on every engine,
+# without loading the whole dataset.
+import pytest
+from fastapi.testclient import TestClient
+import async_data_store
+import data_store
+from data_store import StaffRepository, ItemRepository, ReservationRepository, ensure_roles, load_data
+from records import StaffMember
+
+def _item(iid, department="Gym", amount=5):
+    return {"id": iid, "department": department, "type": "consumable", "name": f"Item {iid}",
+            "amount_needed": 5, "current_amount": amount}
+
+@pytest.fixture
+def no_full_loads(monkeypatch):
+    def load(*args, **kwargs):
+        raise AssertionError("repositories must not load the whole dataset")
+    monkeypatch.setattr(data_store, "load_data", load)
+    monkeypatch.setattr(async_data_store, "load_data", load)
+
+def test_items_round_trip(engine, no_full_loads):
+    repo = ItemRepository()
+    repo.put_many([(1, _item(1)), (2, _item(2, "Pool")), (3, _item(3))])
+    assert repo.get(2)["department"] == "Pool" and repo.get(9) is None
+    assert [it["id"] for it in repo.find({"department": "Gym"})] == [1, 3]
+    assert repo.find({"id": 3}, projection=["name"]) == [{"name": "Item 3"}]
+    assert sorted(repo.get_many([3, 1, 9, 1])) == [1, 3]
+    assert repo.update_fields(1, {"current_amount": 2})["current_amount"] == 2
+    assert repo.update_fields(9, {"current_amount": 2}) is None
+    assert repo.delete(2) and not repo.delete(2)
+    assert sorted(k for k, _ in repo.scan(batch_size=1)) == [1, 3]
+
+def test_staff_are_keyed_by_email(engine, no_full_loads):
+    repo = StaffRepository()
+    repo.put("a@x.com", {"name": "A", "password": "p", "role": "PT", "department": "Gym", "type": "staff"})
+    assert repo.get("a@x.com")["name"] == "A"
+    assert list(repo.find({"department": "Gym"})) == ["a@x.com"]
+    member = repo.get_record("a@x.com")
+    assert isinstance(member, StaffMember) and member.email == "a@x.com"
+    assert repo.delete("a@x.com") and repo.get("a@x.com") is None
+
+def test_reservations_by_status(engine, no_full_loads):
+    repo = ReservationRepository()
+    for rid, status in ((1, "pending"), (2, "fulfilled"), (3, "pending")):
+        repo.put(rid, {"id": rid, "item_id": 1, "department": "Gym", "status": status})
+    assert [r.id for r in repo.find_records({"status": "pending"})] == [1, 3]
+
+def test_writes_are_seen_by_load_data(engine):
+    ItemRepository().put(1, _item(1))
+    assert ensure_roles(["Coach", "Coach", "Nurse"]) == 2
+    ItemRepository().update_fields(1, {"name": "Bands"})
+    data = load_data(sections=("items", "roles"))
+    assert data.items_by_id[1]["name"] == "Bands"
+    assert {"Coach", "Nurse"} <= set(data["roles"])
+
+def test_item_endpoints_use_the_repository(engine, no_full_loads):
+    from backend.main import app
+    client = TestClient(app)
+    created = client.post("/items", json={"department": "Gym", "type": "consumable", "name": "Bands", "amount_needed": 4})
+    assert created.status_code == 200
+    iid = created.json()["id"]
+    assert client.put(f"/items/{iid}", json={"name": "Mats"}).json()["name"] == "Mats"
+    assert client.get(f"/items/{iid}").json()["current_amount"] == 4
+    assert client.delete(f"/items/{iid}").status_code == 200
+    assert client.get(f"/items/{iid}").status_code == 404
@@ -0,0 +1,58 @@
+# Reservations live in their own section (a MongoDB collection indexed on
+# id, status, department and item_id) and are looked up by id.
+import pytest
+import data_store
+import reservation
+from data_store import load_data, save_data, ItemRepository, ReservationRepository
+
+def _item(iid, department="Gym"):
+    return {"id": iid, "department": department, "type": "consumable", "name": f"Item {iid}",
+            "amount_needed": 5, "current_amount": 1}
+
+@pytest.fixture
+def items(engine, monkeypatch):
+    monkeypatch.delenv("GET_SENDER", raising=False)
+    ItemRepository().put_many([(1, _item(1)), (2, _item(2, "Pool"))])
+    return engine
+
+def test_created_reservations_are_stored(items):
+    ok, first = reservation.create_reservation_for_item(1, "a@x.com")
+    assert ok and first["amount_to_refill"] == 4 and first["status"] == "pending"
+    ok, second = reservation.create_reservation_for_item(2, "b@x.com")
+    assert second["id"] == first["id"] + 1
+    assert reservation.create_reservation_for_item(9, "a@x.com") == (False, "Item id 9 not found.")
+    data_store._invalidate_cache()
+    assert sorted(load_data(sections=("reservations",)).reservations_by_id) == [first["id"], second["id"]]
+
+def test_list_reservations_filters(items):
+    for iid in (1, 2, 1):
+        reservation.create_reservation_for_item(iid, "a@x.com")
+    assert [r["item_id"] for r in reservation.list_reservations(department="Gym")] == [1, 1]
+    reservation.fulfill_reservation(3)
+    assert [r["id"] for r in reservation.list_reservations(status="pending")] == [1, 2]
+    assert [r["id"] for r in reservation.list_reservations(status="pending", department="Gym")] == [1]
+
+def test_fulfill_picks_the_reservation_by_id(items):
+    for iid in (1, 2):
+        reservation.create_reservation_for_item(iid, "a@x.com")
+    ok, fulfilled = reservation.fulfill_reservation(2)
+    assert ok and fulfilled["id"] == 2
+    assert ReservationRepository().get(1)["status"] == "pending"
+    assert ItemRepository().get(2)["current_amount"] == 5 and ItemRepository().get(1)["current_amount"] == 1
+    assert reservation.fulfill_reservation(7) == (False, "Reservation not found.")
+
+def test_saved_reservations_survive_a_reload(items):
+    data = load_data()
+    data["reservations"].append({"id": 5, "item_id": 1, "department": "Gym", "status": "pending"})
+    save_data(data)
+    data_store._invalidate_cache()
+    assert load_data().reservations_by_id[5]["item_id"] == 1
+
+def test_reservation_indexes(items):
+    if items != "mongo":
+        pytest.skip("MongoDB indexes")
+    data_store.get_mongo_client()
+    indexes = data_store.get_db().reservations.index_information()
+    keys = {tuple(field for field, _ in index["key"]): index.get("unique", False) for index in indexes.values()}
+    assert keys[("id",)] is True
+    assert {("status",), ("department",), ("item_id",)} <= set(keys)
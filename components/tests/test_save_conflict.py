@@ -0,0 +1,38 @@
+# A save_data() based on stale records must be rejected as a whole: on every
+# engine a VersionConflict leaves the store exactly as it was.
+import pytest
+import data_store
+from data_store import load_data, save_data, ItemRepository, StaffRepository, VersionConflict
+
+def _stored():
+    data_store._invalidate_cache()
+    data = load_data(sections=("staff", "roles", "items"))
+    return {section: data[section] for section in ("staff", "roles", "items")}
+
+def test_conflicting_save_writes_nothing(engine):
+    ItemRepository().put(1, {"id": 1, "department": "Gym", "type": "consumable", "name": "Bands",
+                             "amount_needed": 5, "current_amount": 5})
+    StaffRepository().put("a@x.com", {"name": "A", "password": "p", "role": "PT", "department": "Gym", "type": "staff"})
+    data = load_data()
+    # someone else uses item 1 after it was loaded
+    ItemRepository().update_fields(1, {"current_amount": 3})
+    before = _stored()
+
+    # staff and roles are saved before items: none of it may be written
+    data["staff"]["a@x.com"]["name"] = "Renamed"
+    data["roles"].append("Coach")
+    data["items"].append({"id": 2, "department": "Gym", "type": "consumable", "name": "Mats",
+                          "amount_needed": 2, "current_amount": 2})
+    next(it for it in data["items"] if it["id"] == 1)["current_amount"] = 4
+    with pytest.raises(VersionConflict):
+        save_data(data)
+    assert _stored() == before
+
+    # the same changes on fresh data go through
+    data = load_data()
+    data["roles"].append("Coach")
+    next(it for it in data["items"] if it["id"] == 1)["current_amount"] = 4
+    save_data(data)
+    stored = _stored()
+    assert "Coach" in stored["roles"]
+    assert [it["current_amount"] for it in stored["items"]] == [4]
@@ -0,0 +1,88 @@
+# snapshot() streams the whole store into a compressed JSON Lines file with a
+# checksummed trailer; restore() verifies it and replaces the store with it,
+# whichever engine wrote it.
+import gzip
+import pytest
+import data_store
+from data_store import load_data, save_data, snapshot, verify_snapshot, restore, allocate_ids, ItemRepository
+
+def _fill():
+    data = load_data()
+    data["staff"]["a@x.com"] = {"name": "A", "password": "p", "role": "PT", "department": "Gym", "type": "staff"}
+    data["roles"].append("Coach")
+    data["items"].extend({"id": i, "department": "Gym", "type": "consumable", "name": f"Item {i}",
+                          "amount_needed": 5, "current_amount": i} for i in (1, 2, 3))
+    data["reservations"].append({"id": 1, "item_id": 2, "department": "Gym", "status": "pending"})
+    save_data(data)
+    allocate_ids("items", 3)
+
+def _state():
+    data_store._invalidate_cache()
+    data = load_data()
+    return {
+        "staff": {k: {f: v for f, v in doc.items() if f != "_v"} for k, doc in data["staff"].items()},
+        # the JSON engine doesn't add the default roles on load
+        "roles": sorted(set(data["roles"]) - {"Head"}),
+        "items": sorted((it["id"], it["name"], it["current_amount"]) for it in data["items"]),
+        "reservations": sorted(r["id"] for r in data["reservations"]),
+    }
+
+def test_restore_brings_back_the_snapshot(engine, tmp_path):
+    _fill()
+    before = _state()
+    result = snapshot(tmp_path / "backup.jsonl.gz")
+    assert result["engine"] == ("json" if engine == "json" else engine)
+    assert result["counts"]["items"] == 3 and result["counts"]["counters"] >= 1
+
+    ItemRepository().delete(1)
+    ItemRepository().put(9, {"id": 9, "name": "Later"})
+    restored = restore(tmp_path / "backup.jsonl.gz", batch_size=2)
+    assert restored["counts"] == result["counts"]
+    assert _state() == before
+    # the counters come back too: ids handed out before the snapshot stay used
+    assert allocate_ids("items") == 7
+
+def test_snapshot_restores_into_another_engine(engine, tmp_path, monkeypatch):
+    _fill()
+    before = _state()
+    snapshot(tmp_path / "backup.jsonl.gz")
+    target = "sqlite" if engine != "sqlite" else "json"
+    monkeypatch.delenv("MONGO_URI", raising=False)
+    monkeypatch.setenv("DATA_ENGINE", target)
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "other.sqlite3"))
+    monkeypatch.setattr(data_store, "DATA_JSON", tmp_path / "other.json")
+    monkeypatch.setattr(data_store._sqlite_local, "conn", None, raising=False)
+    assert restore(tmp_path / "backup.jsonl.gz")["engine"] == target
+    assert _state() == before
+
+def _damaged(tmp_path, change):
+    path = tmp_path / "backup.jsonl.gz"
+    snapshot(path)
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        lines = f.readlines()
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.writelines(change(lines))
+    return path
+
+@pytest.mark.parametrize("change, message", [
+    (lambda lines: lines[:-1], "truncated"),
+    (lambda lines: [line.replace("Item 2", "Item 7") for line in lines], "checksum mismatch"),
+    (lambda lines: lines[:1] + lines[2:], "record counts"),
+    (lambda lines: ['{"hello": "world"}\n'] + lines[1:], "not a snapshot"),
+])
+def test_damaged_snapshots_are_refused(engine, tmp_path, change, message):
+    _fill()
+    path = _damaged(tmp_path, change)
+    before = _state()
+    with pytest.raises(ValueError, match=message):
+        verify_snapshot(path)
+    with pytest.raises(ValueError):
+        restore(path)
+    assert _state() == before
+
+def test_zstd_snapshots(engine, tmp_path):
+    pytest.importorskip("zstandard")
+    _fill()
+    path = tmp_path / "backup.jsonl.zst"
+    snapshot(path)
+    assert verify_snapshot(path)["counts"]["items"] == 3
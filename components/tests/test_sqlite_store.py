@@ -0,0 +1,85 @@
+# DATA_ENGINE=sqlite keeps one table per section in a WAL-mode database,
+# behind the same load_data/save_data contract as the other engines.
+import os
+import sqlite3
+import threading
+import pytest
+import data_store
+from data_store import load_data, save_data, ItemRepository
+
+def _item(iid, amount=5):
+    return {"id": iid, "department": "Gym", "type": "consumable", "name": f"Item {iid}",
+            "amount_needed": 5, "current_amount": amount}
+
+@pytest.fixture
+def store(engine):
+    if engine != "sqlite":
+        pytest.skip("SQLite engine")
+    data_store._sqlite_conn()
+    return os.environ["SQLITE_PATH"]
+
+def _rows(path, sql):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute(sql).fetchall()
+    finally:
+        conn.close()
+
+def test_full_dataset_round_trip(store):
+    data = load_data()
+    data["admins"]["root@x.com"] = {"name": "Root", "password": "p", "type": "admin"}
+    data["staff"]["a@x.com"] = {"name": "A", "password": "p", "role": "PT", "department": "Gym", "type": "staff"}
+    data["roles"].append("Coach")
+    data["items"].extend([_item(1), _item(2)])
+    data["reservations"].append({"id": 1, "item_id": 2, "department": "Gym", "status": "pending"})
+    save_data(data)
+    data_store._invalidate_cache()
+    again = load_data()
+    for section in ("admins", "staff", "roles", "departments"):
+        assert again[section] == data[section]
+    assert [it["id"] for it in again["items"]] == [1, 2]
+    assert again.reservations_by_id[1]["item_id"] == 2
+    # one row per document, keyed by its id / email / name
+    assert _rows(store, "SELECT key FROM items ORDER BY key") == [(1,), (2,)]
+    assert _rows(store, "SELECT key FROM staff") == [("a@x.com",)]
+    assert ("Coach",) in _rows(store, "SELECT key FROM roles")
+
+def test_database_uses_wal_and_indexes(store):
+    ItemRepository().put(1, _item(1))
+    assert _rows(store, "PRAGMA journal_mode") == [("wal",)]
+    indexes = {name for (name,) in _rows(store, "SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {"items_department_name_key", "reservations_status", "reservations_department",
+            "reservations_item_id"} <= indexes
+
+def test_every_write_bumps_the_version(store):
+    version = lambda: _rows(store, "SELECT value FROM meta WHERE name = 'version'")[0][0]
+    before = version()
+    ItemRepository().put(1, _item(1))
+    assert version() == before + 1
+    data = load_data(sections=("items",))
+    data.update_item(data.items_by_id[1], {"current_amount": 1})
+    save_data(data)
+    assert version() == before + 2
+    # an unchanged save writes nothing
+    save_data(data)
+    assert version() == before + 2
+
+def test_failed_transaction_writes_nothing(store):
+    ItemRepository().put(1, _item(1))
+    with pytest.raises(RuntimeError):
+        with data_store._sqlite_transaction() as conn:
+            data_store._sqlite_put(conn, "items", 2, _item(2))
+            raise RuntimeError("crash")
+    assert _rows(store, "SELECT key FROM items") == [(1,)]
+
+def test_threads_have_their_own_connection(store):
+    ItemRepository().put(1, _item(1))
+    seen = []
+    def other():
+        seen.append((data_store._sqlite_conn(), ItemRepository().get(1)["name"]))
+        ItemRepository().put(2, _item(2))
+    t = threading.Thread(target=other)
+    t.start()
+    t.join()
+    assert seen[0][0] is not data_store._sqlite_conn() and seen[0][1] == "Item 1"
+    assert ItemRepository().get(2)["id"] == 2
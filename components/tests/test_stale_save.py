@@ -0,0 +1,80 @@
+# save_data() writes the difference between a Dataset and the state it was
+# loaded with: records others wrote since are kept, records the caller
+# deleted are removed only if nobody changed them meanwhile.
+import threading
+import pytest
+import data_store
+from data_store import load_data, save_data, ItemRepository, VersionConflict
+
+def _item(iid, name, amount=5):
+    return {"id": iid, "department": "Gym", "type": "consumable", "name": name,
+            "amount_needed": 5, "current_amount": amount}
+
+def _stored_items():
+    data_store._invalidate_cache()
+    return {it["id"]: it for it in load_data(sections=("items",))["items"]}
+
+def _in_thread(fn):
+    t = threading.Thread(target=fn)
+    t.start()
+    t.join()
+
+@pytest.fixture
+def two_items(engine):
+    ItemRepository().put_many([(1, _item(1, "Bands")), (2, _item(2, "Mats"))])
+
+@pytest.mark.parametrize("writer", ["same thread", "other thread"])
+def test_stale_save_keeps_records_added_since(two_items, writer):
+    data = load_data()
+    put = lambda: ItemRepository().put(3, _item(3, "Balls"))
+    put() if writer == "same thread" else _in_thread(put)
+
+    data.update_item(data.items_by_id[1], {"current_amount": 4})
+    save_data(data)
+    stored = _stored_items()
+    assert sorted(stored) == [1, 2, 3]
+    assert stored[1]["current_amount"] == 4
+
+    # the saved state is the new base: a second save still leaves item 3 alone
+    data["items"].remove(data.items_by_id[2])
+    save_data(data)
+    assert sorted(_stored_items()) == [1, 3]
+
+def test_stale_delete_is_a_conflict(two_items):
+    data = load_data()
+    ItemRepository().update_fields(2, {"current_amount": 1})
+    data["items"].remove(data.items_by_id[2])
+    with pytest.raises(VersionConflict):
+        save_data(data)
+    assert _stored_items()[2]["current_amount"] == 1
+
+def test_adding_a_record_someone_else_added_is_a_conflict(two_items):
+    data = load_data()
+    ItemRepository().put(3, _item(3, "Balls"))
+    data["items"].append(_item(3, "Weights"))
+    with pytest.raises(VersionConflict):
+        save_data(data)
+    assert _stored_items()[3]["name"] == "Balls"
+
+def test_concurrent_loads_keep_their_own_base(two_items):
+    first = load_data(sections=("roles", "items"))
+    second = load_data(sections=("roles", "items"))
+    first["roles"].append("Coach")
+    first.update_item(first.items_by_id[1], {"current_amount": 1})
+    save_data(first)
+    # `second` never saw Coach or the change to item 1: neither is undone
+    second["roles"].append("Nurse")
+    second.update_item(second.items_by_id[2], {"current_amount": 2})
+    save_data(second)
+
+    data_store._invalidate_cache()
+    roles = load_data(sections=("roles",))["roles"]
+    assert "Coach" in roles and "Nurse" in roles
+    stored = _stored_items()
+    assert (stored[1]["current_amount"], stored[2]["current_amount"]) == (1, 2)
+
+def test_section_not_loaded_is_not_wiped(two_items):
+    data = load_data(sections=("roles",))
+    data["items"] = [_item(3, "Balls")]
+    save_data(data)
+    assert sorted(_stored_items()) == [1, 2, 3]
@@ -0,0 +1,54 @@
+# POST /items/import parses the upload straight from its spool file:
+# import_file() takes a binary file object, reads it from its current
+# position and leaves it open.
+import io
+import tempfile
+import pytest
+from fastapi.testclient import TestClient
+from data_io import import_file, iter_export
+from data_store import ItemRepository
+
+ITEMS = "department,type,name,amount_needed,current_amount\n"
+
+def test_file_object_is_read_and_left_open(engine):
+    upload = tempfile.SpooledTemporaryFile(max_size=1 << 20)
+    upload.write(b"ignored preamble\n" + (ITEMS + "Gym,consumable,\xc3\x84rmel,5,5\n").encode("latin-1"))
+    upload.seek(len(b"ignored preamble\n"))
+    ok, message = import_file("items", upload, "csv", progress=lambda *a: None)
+    assert ok and "1 added" in message
+    assert not upload.closed
+    assert ItemRepository().find_by_name("Gym", "Ärmel")["amount_needed"] == 5
+
+def test_columnar_upload_from_a_file_object(engine):
+    pytest.importorskip("pyarrow")
+    ItemRepository().put(1, {"id": 1, "department": "Gym", "type": "consumable", "name": "Bands",
+                             "amount_needed": 5, "current_amount": 5})
+    data = b"".join(iter_export("items", "parquet"))
+    ItemRepository().delete(1)
+    upload = io.BytesIO(data)
+    upload.name = "items.parquet"
+    # the format comes from the file object's name
+    assert import_file("items", upload, progress=lambda *a: None)[0]
+    assert ItemRepository().get(1)["name"] == "Bands"
+
+def test_api_import_writes_no_temp_files(engine, tmp_path, monkeypatch):
+    from backend.main import app
+    cwd = tmp_path / "cwd"
+    cwd.mkdir()
+    monkeypatch.chdir(cwd)
+    copies = []
+    mkstemp = tempfile.mkstemp
+    def recording(*args, **kwargs):
+        # the JSON store's own temp files go next to data.json
+        if kwargs.get("dir") is None:
+            copies.append(args)
+        return mkstemp(*args, **kwargs)
+    monkeypatch.setattr(tempfile, "mkstemp", recording)
+    client = TestClient(app)
+    response = client.post("/items/import", data={"kind": "items"},
+                           files={"file": ("items.csv", ITEMS + "Gym,consumable,Bands,5,5\n", "text/csv")})
+    assert response.status_code == 200 and "1 added" in response.json()["message"]
+    bad = client.post("/items/import", data={"kind": "items"},
+                      files={"file": ("items.jsonl", "not json\n", "application/x-ndjson")})
+    assert bad.status_code == 400 and "invalid JSON" in bad.json()["detail"]
+    assert copies == [] and list(cwd.iterdir()) == []
@@ -0,0 +1,65 @@
+# Conditional updates: a stale "_v" is a VersionConflict (409 from the API),
+# and retry loops give up after CONFLICT_RETRIES attempts.
+import pytest
+from fastapi.testclient import TestClient
+import data_store
+import reservation
+from data_store import ItemRepository, ReservationRepository, StaffRepository, VersionConflict, CONFLICT_RETRIES
+from records import Reservation
+
+@pytest.fixture
+def client(engine):
+    from backend.main import app
+    return TestClient(app)
+
+def _reservation():
+    ItemRepository().put(1, {"id": 1, "department": "Gym", "type": "consumable", "name": "Bands",
+                             "amount_needed": 5, "current_amount": 1})
+    return ReservationRepository().put_record(Reservation(id=1, item_id=1, item_name="Bands", department="Gym",
+                                                          user_email="a@x.com", amount_to_refill=4))
+
+def test_stale_update_is_a_conflict(engine):
+    repo = ItemRepository()
+    repo.put(1, {"id": 1, "name": "Bands"})
+    version = repo.get(1)["_v"]
+    repo.update_fields(1, {"name": "Mats"}, expected_version=version)
+    with pytest.raises(VersionConflict):
+        repo.update_fields(1, {"name": "Tape"}, expected_version=version)
+    with pytest.raises(VersionConflict):
+        repo.delete(1, expected_version=version)
+    assert repo.get(1)["name"] == "Mats"
+
+def test_fulfill_reservation_refills_the_item(engine):
+    _reservation()
+    ok, doc = reservation.fulfill_reservation(1)
+    assert ok and doc["status"] == "fulfilled"
+    assert ItemRepository().get(1)["current_amount"] == 5
+    assert reservation.fulfill_reservation(1) == (False, "Reservation not pending.")
+
+def test_fulfill_reservation_gives_up_after_conflict_retries(engine, monkeypatch):
+    _reservation()
+    calls = []
+    def conflict(self, key, fields, expected_version=None):
+        calls.append(key)
+        raise VersionConflict("reservations", key)
+    monkeypatch.setattr(ReservationRepository, "update_fields", conflict)
+    with pytest.raises(VersionConflict):
+        reservation.fulfill_reservation(1)
+    assert len(calls) == CONFLICT_RETRIES
+
+def test_fulfill_conflict_is_a_409(client, monkeypatch):
+    _reservation()
+    def conflict(self, key, fields, expected_version=None):
+        raise VersionConflict("reservations", key)
+    monkeypatch.setattr(ReservationRepository, "update_fields", conflict)
+    assert client.post("/reservations/1/fulfill").status_code == 409
+
+def test_staff_update_takes_a_version_and_register_does_not(client):
+    assert "version" not in client.app.openapi()["components"]["schemas"]["RegisterIn"]["properties"]
+    StaffRepository().put("a@x.com", {"name": "A", "password": "p", "role": "PT", "department": "Gym", "type": "staff"})
+    version = StaffRepository().get("a@x.com")["_v"]
+    body = {"name": "B", "password": "p", "version": version}
+    assert client.put("/staff/a@x.com", json=body).status_code == 200
+    assert client.put("/staff/a@x.com", json=dict(body, name="C")).status_code == 409
+    data_store._invalidate_cache()
+    assert StaffRepository().get("a@x.com")["name"] == "B"